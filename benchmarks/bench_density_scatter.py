@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: huge scatter plots as markers vs. a density image
+Times an Agg draw and an SVG export of the 'scatter' graph for growing
+inputs, drawn with ax.scatter and with graph_render.density_scatter
+"""
+
+import io
+import os
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_render import density_scatter
+
+SIZES = [100_000, 1_000_000, 10_000_000]
+
+# ax.scatter gets too slow to be worth waiting for beyond this
+MARKER_LIMIT = 1_000_000
+
+
+def render(x, y, density):
+    """Draw once and export to SVG; returns (draw seconds, SVG bytes)"""
+    start = time.perf_counter()
+    figure = Figure(figsize=(10, 8), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    if density:
+        density_scatter(ax, x, y)
+    else:
+        ax.scatter(x, y, s=4)
+    canvas.draw()
+    elapsed = time.perf_counter() - start
+    svg = io.BytesIO()
+    figure.savefig(svg, format='svg')
+    return elapsed, svg.tell()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>12} {'markers s':>10} {'markers SVG':>12} {'density s':>10} {'density SVG':>12}")
+    for n in SIZES:
+        x = rng.standard_normal(n)
+        y = rng.standard_normal(n) * 3
+        markers = render(x, y, False) if n <= MARKER_LIMIT else (float('nan'), 0)
+        density = render(x, y, True)
+        print(f"{n:>12,} {markers[0]:>10.3f} {markers[1] / 1e6:>10.1f}MB "
+              f"{density[0]:>10.3f} {density[1] / 1e6:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: big heatmaps drawn with imshow vs. a zoom-level pyramid
+Times the first draw and a zoomed redraw of the 'heatmap' graph for growing
+memory-mapped Z matrices, drawn with ax.imshow and with
+graph_render.pyramid_heatmap (pyramid build time reported separately)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_lod import build_pyramid
+from graph_render import pyramid_heatmap
+
+SIZES = [2_000, 8_000, 16_000]
+
+# imshow gets too slow (and memory hungry) to be worth waiting for beyond this
+IMSHOW_LIMIT = 8_000
+
+
+def make_matrix(path, n):
+    """Write an n x n float32 test matrix to `path` and memory-map it"""
+    Z = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n, n))
+    cols = np.cos(np.arange(n) / 200.0)
+    for start in range(0, n, 1000):
+        rows = np.sin(np.arange(start, min(start + 1000, n)) / 300.0)
+        Z[start:start + 1000] = rows[:, np.newaxis] * cols
+    Z.flush()
+    return np.load(path, mmap_mode='r')
+
+
+def render(Z, levels):
+    """Draw the full view, then a zoomed view; returns (first s, zoom s)"""
+    figure = Figure(figsize=(10, 8), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    start = time.perf_counter()
+    if levels is None:
+        ax.imshow(Z, aspect='auto', interpolation='bilinear')
+    else:
+        pyramid_heatmap(ax, levels, interpolation='bilinear')
+    canvas.draw()
+    first = time.perf_counter() - start
+    n = len(Z)
+    ax.set_xlim(n * 0.4, n * 0.45)
+    ax.set_ylim(n * 0.55, n * 0.5)
+    start = time.perf_counter()
+    canvas.draw()
+    return first, time.perf_counter() - start
+
+
+def main():
+    print(f"{'size':>8} {'imshow s':>9} {'zoom s':>8} {'build s':>8} {'pyramid s':>10} {'zoom s':>8}")
+    with tempfile.TemporaryDirectory() as folder:
+        for n in SIZES:
+            Z = make_matrix(os.path.join(folder, f'z{n}.npy'), n)
+            plain = render(Z, None) if n <= IMSHOW_LIMIT else (float('nan'),) * 2
+            start = time.perf_counter()
+            levels = build_pyramid(Z)
+            build = time.perf_counter() - start
+            pyramid = render(Z, levels)
+            print(f"{n:>8,} {plain[0]:>9.3f} {plain[1]:>8.3f} {build:>8.3f} "
+                  f"{pyramid[0]:>10.3f} {pyramid[1]:>8.3f}")
+            del Z, levels
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark: line rendering with and without decimation
+Times an Agg draw of the 'line' graph for growing inputs using every
+graph_lod decimation mode
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_lod import DECIMATION_MODES, decimate_line
+
+SIZES = [100_000, 1_000_000, 10_000_000]
+
+
+def render(x, y, mode):
+    """Decimate and draw once; returns (seconds, points drawn)"""
+    start = time.perf_counter()
+    figure = Figure(figsize=(10, 8), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    x, y = decimate_line(x, y, ax.bbox.width, mode)
+    ax.plot(x, y, linewidth=2)
+    canvas.draw()
+    return time.perf_counter() - start, len(x)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>12} " + " ".join(f"{mode + ' s':>12}" for mode in DECIMATION_MODES))
+    for n in SIZES:
+        x = np.arange(n, dtype=np.float64)
+        y = np.cumsum(rng.standard_normal(n))
+        y[n // 3] += 500  # A single spike that must survive decimation
+        timings = [render(x, y, mode) for mode in DECIMATION_MODES]
+        print(f"{n:>12,} " + " ".join(f"{t:>12.3f}" for t, _ in timings)
+              + "   (points drawn: " + ", ".join(f"{k:,}" for _, k in timings) + ")")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: live streaming into the ring buffer while frames are blitted
+A child process writes "x,y" lines into a named pipe at a fixed sample rate
+(or as fast as it can); a LiveStream reads them while LivePlot frames are
+drawn on an Agg canvas at LIVE_FPS. Reports the samples/s ingested, how far
+the reader fell behind the writer, and the time per frame
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_live import LIVE_FPS, LivePlot, LiveStream
+
+SECONDS = 5
+# Samples per second written (None: as fast as possible)
+RATES = [100_000, 250_000, None]
+BATCH = 5_000
+
+
+def writer(path, rate, seconds):
+    x = np.arange(BATCH)
+    with open(path, 'wb') as f:
+        start = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - start < seconds:
+            t = x + sent
+            lines = np.column_stack([t, np.sin(t / 5000.0)])
+            f.write(("\n".join(f"{a:.0f},{b:.5f}" for a, b in lines.tolist()) + "\n").encode())
+            sent += BATCH
+            if rate is not None:
+                time.sleep(max(sent / rate - (time.perf_counter() - start), 0))
+
+
+def run(rate, kind):
+    path = os.path.join(tempfile.mkdtemp(), 'live')
+    os.mkfifo(path)
+    stream = LiveStream(path, ['1', '2'])
+    figure = Figure(figsize=(10, 8), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    plot = LivePlot(figure, canvas, stream.buffer, kind)
+    stream.start()
+
+    process = multiprocessing.get_context('spawn').Process(target=writer, args=(path, rate, SECONDS))
+    process.start()
+    frames = []
+    start = time.perf_counter()
+    while process.is_alive():
+        begin = time.perf_counter()
+        plot.frame()
+        frames.append(time.perf_counter() - begin)
+        time.sleep(max(1 / LIVE_FPS - frames[-1], 0))
+    elapsed = time.perf_counter() - start
+    process.join()
+    time.sleep(0.2)
+    stream.stop()
+    plot.close()
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    return stream.buffer.total / SECONDS, len(frames) / elapsed, np.median(frames), max(frames)
+
+
+def main():
+    print(f"{'kind':>8} {'rate':>10} {'samples/s':>11} {'fps':>6} {'frame ms':>9} {'worst ms':>9}")
+    for kind in ('line', 'scatter'):
+        for rate in RATES:
+            samples, fps, median, worst = run(rate, kind)
+            label = f"{rate:,}" if rate else "max"
+            print(f"{kind:>8} {label:>10} {samples:>11,.0f} {fps:>6.1f} "
+                  f"{median * 1000:>9.1f} {worst * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: block-parallel expression evaluation
+Compares graph_expressions.evaluate (one NumPy pass) with evaluate_parallel
+/ evaluate_grid (cache-sized blocks on a thread pool)
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_expressions import evaluate, evaluate_parallel, evaluate_grid
+
+EQUATION = "exp(-x**2/10) * sin(x) + x**3 - 3*x"
+Z_FORMULA = "np.sin(np.sqrt(X**2 + Y**2)) * np.exp(-0.1*np.sqrt(X**2 + Y**2))"
+
+
+def measure(func):
+    """Return (seconds, peak traced MB) for one call"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def report(name, direct, blocked):
+    (direct_t, direct_m), (blocked_t, blocked_m) = direct, blocked
+    print(f"{name:<28} {direct_t:>9.3f} {blocked_t:>9.3f} {direct_t / blocked_t:>7.1f}x "
+          f"{direct_m:>10.1f} {blocked_m:>10.1f}")
+
+
+def main():
+    print(f"threads: {os.cpu_count()}")
+    print(f"{'case':<28} {'direct s':>9} {'blocks s':>9} {'speedup':>8} "
+          f"{'direct MB':>10} {'blocks MB':>10}")
+
+    x = np.linspace(-10, 10, 20_000_000)
+    report("equation, 20M points",
+           measure(lambda: evaluate(EQUATION, x=x)),
+           measure(lambda: evaluate_parallel(EQUATION, x=x)))
+
+    g = np.linspace(-8, 8, 4000)
+
+    def meshgrid_eval():
+        # The previous generate_graph path: full meshgrid, then one eval
+        X, Y = np.meshgrid(g, g)
+        return evaluate(Z_FORMULA, X=X, Y=Y)
+
+    report("Z formula, 4000x4000 grid",
+           measure(meshgrid_eval),
+           measure(lambda: evaluate_grid(Z_FORMULA, g, g)))
+
+
+if __name__ == "__main__":
+    main()
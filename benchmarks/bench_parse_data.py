@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: comma-separated data parsing
+Compares the old list-comprehension parser with graph_data.parse_numbers,
+after checking that malformed input is refused
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_data import parse_numbers
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+
+
+def legacy_parse(data_str):
+    """Original parse_data comma path"""
+    return np.array([float(x.strip()) for x in data_str.split(',')])
+
+
+def measure(func, text):
+    """Return (seconds, peak traced bytes) for one call"""
+    # Time and memory are taken in separate runs since tracing slows parsing
+    start = time.perf_counter()
+    func(text)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+# Inputs that must be refused, not read as their numeric prefix or with
+# an empty field dropped
+BAD_INPUTS = ['3 4 5a', '3 4a 5', '1, 2, x', '1e', '1_0',
+              '1,,2', '1, ,2', ',1,2', '1,2,', '1;;2', '1,2,\n3,4']
+
+
+def check_bad_tokens():
+    """Regression check: every bad token raises ValueError"""
+    for text in BAD_INPUTS:
+        try:
+            parse_numbers(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"parse_numbers accepted {text!r}")
+
+
+def main():
+    check_bad_tokens()
+    rng = np.random.default_rng(0)
+    print(f"{'values':>12} {'legacy s':>10} {'fast s':>10} {'speedup':>8} "
+          f"{'legacy MB':>10} {'fast MB':>10}")
+    for n in SIZES:
+        # Six significant digits, like typical pasted measurements
+        text = ', '.join('%.6g' % v for v in rng.standard_normal(n))
+        assert np.array_equal(legacy_parse(text), parse_numbers(text))
+        legacy_t, legacy_m = measure(legacy_parse, text)
+        fast_t, fast_m = measure(parse_numbers, text)
+        print(f"{n:>12,} {legacy_t:>10.3f} {fast_t:>10.3f} {legacy_t / fast_t:>7.1f}x "
+              f"{legacy_m / 1e6:>10.1f} {fast_m / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: drawing a graph vs. showing it from the render cache
+Times a full render of a few graphs, then the content key lookup and pixel
+restore that a render cache hit costs instead
+"""
+
+import os
+import sys
+import time
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_cache import RenderCache, content_key
+from graph_core import GraphSpec, render
+
+SPECS = {
+    'line': GraphSpec(graph_type='line', x_data='0:10', y_data='sin(x) * exp(-x / 5)'),
+    'contour': GraphSpec(graph_type='contour', x_data='-5:5:0.01', y_data='-5:5:0.01',
+                         z_data='sin(X) * cos(Y)'),
+    '3d_surface': GraphSpec(graph_type='3d_surface', x_data='-5:5:0.05', y_data='-5:5:0.05',
+                            z_data='sin(sqrt(X**2 + Y**2))'),
+}
+
+
+def main():
+    cache = RenderCache()
+    print(f"{'graph':>12} {'render s':>10} {'cache hit s':>12}")
+    for name, spec in SPECS.items():
+        start = time.perf_counter()
+        figure = render(spec)
+        rendered = time.perf_counter() - start
+        renderer = figure.canvas.get_renderer()
+        cache.put(content_key(spec), renderer.copy_from_bbox(figure.bbox),
+                  renderer.width * renderer.height * 4)
+
+        # What a hit costs: hash the spec, look it up, copy the pixels back
+        canvas = FigureCanvasAgg(figure)
+        start = time.perf_counter()
+        pixels = cache.get(content_key(spec))
+        canvas.get_renderer().restore_region(pixels)
+        hit = time.perf_counter() - start
+        print(f"{name:>12} {rendered:>10.3f} {hit:>12.5f}")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: moving arrays between processes through a pipe vs. shared memory
+A child process sends back arrays of growing size (a Z grid, an RGBA frame)
+once pickled through a multiprocessing pipe and once as graph_shm blocks
+that the parent adopts; times the round trip and the parent's extra memory
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import graph_shm
+from graph_memory import rss_bytes
+
+# (label, shape, dtype) of the arrays sent back
+ARRAYS = [
+    ('frame 1000x800', (800, 1000, 4), np.uint8),
+    ('frame 4K', (2160, 3840, 4), np.uint8),
+    ('Z 2000x2000', (2000, 2000), np.float64),
+    ('Z 6000x6000', (6000, 6000), np.float64),
+]
+
+
+def child(conn):
+    names = []
+    while True:
+        request = conn.recv()
+        if request is None:
+            return
+        shape, dtype, shared = request
+        graph_shm.hand_over(names)
+        array = np.ones(shape, dtype)
+        names = []
+        conn.send(graph_shm.pack(array, graph_shm.transfer_prefix(), names) if shared else array)
+
+
+def main():
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe()
+    process = context.Process(target=child, args=(child_conn,), daemon=True)
+    process.start()
+    print(f"{'array':>16} {'MB':>7} {'pipe s':>8} {'shm s':>8} {'pipe +MB':>9} {'shm +MB':>9}")
+    for label, shape, dtype in ARRAYS:
+        times, memory = [], []
+        for shared in (False, True):
+            before = rss_bytes()
+            start = time.perf_counter()
+            conn.send((shape, dtype, shared))
+            array = graph_shm.unpack(conn.recv(), take=True)
+            array.sum()
+            times.append(time.perf_counter() - start)
+            memory.append((rss_bytes() - before) / 1e6)
+            del array
+        size = np.prod(shape) * np.dtype(dtype).itemsize / 1e6
+        print(f"{label:>16} {size:>7.0f} {times[0]:>8.3f} {times[1]:>8.3f} "
+              f"{memory[0]:>9.0f} {memory[1]:>9.0f}")
+    conn.send(None)
+    process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: histogram of np.random expressions, whole array vs. streamed
+Compares numpy.histogram on the fully evaluated array with a
+graph_lod.exact_histogram fed by graph_expressions.sample_chunks,
+reporting time and peak traced memory for growing sample counts, after
+checking that large inputs are counted exactly
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph_expressions import evaluate, sample_chunks
+from graph_lod import HISTOGRAM_EXACT_SAMPLES, exact_histogram
+
+SIZES = [10**6, 10**7, 5 * 10**7]
+RULE = 'auto'
+
+
+def measure(fn):
+    """Run fn once; returns (seconds, peak MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def whole(text):
+    np.histogram(evaluate(text), bins=RULE)
+
+
+def streamed(text):
+    state = np.random.get_state()
+
+    def chunks():
+        # Both passes must see the same samples
+        np.random.set_state(state)
+        return sample_chunks(text)
+    exact_histogram(chunks, RULE).result()
+
+
+def check_exact_counts():
+    """Regression check: too many samples to keep, still counted exactly"""
+    values = np.random.default_rng(0).standard_normal(3 * HISTOGRAM_EXACT_SAMPLES)
+    chunks = lambda: np.array_split(values, 7)
+    counts, edges = exact_histogram(chunks, 20).result()
+    expected, expected_edges = np.histogram(values, 20)
+    assert np.array_equal(counts, expected) and np.array_equal(edges, expected_edges)
+    # Automatic rules pick their edges from a sketch, but count exactly
+    for rule in ('auto', 'fd'):
+        counts, edges = exact_histogram(chunks, rule).result()
+        assert np.array_equal(counts, np.histogram(values, edges)[0]), rule
+
+
+def main():
+    check_exact_counts()
+    print(f"{'samples':>12} {'whole s':>9} {'whole MB':>9} {'stream s':>9} {'stream MB':>10}")
+    for n in SIZES:
+        text = f'np.random.randn({n}) * 2 + 1'
+        a = measure(lambda: whole(text))
+        b = measure(lambda: streamed(text))
+        print(f"{n:>12,} {a[0]:>9.2f} {a[1]:>9.0f} {b[0]:>9.2f} {b[1]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
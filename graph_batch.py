@@ -0,0 +1,383 @@
+"""
+Batch rendering for the Professional Graph Generator
+Renders a JSON or JSON Lines file of graph specs in parallel worker
+processes, without opening the window:
+
+    python graph_generator.py batch specs.jsonl -o charts -f svg -j 8
+
+Each record holds GUI settings by name (see graph_core.SPEC_DEFAULTS),
+plus an optional "output" file name whose extension picks the format.
+Identical graphs are rendered once per batch, and with --cache once ever
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import matplotlib
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from graph_cache import EXPORT_CACHE_BYTES, ExportCache, content_key, export_key
+from graph_core import FIGURE_SIZE, SPEC_DEFAULTS, GraphSpec, draw_graph
+from graph_render import EXPORT_DPI, MODE_STYLES, style_params, use_style
+from graph_trace import EventLog, RenderTrace, stage, start_memory_tracing, tracing
+
+OUTPUT_FORMATS = ('png', 'pdf', 'svg')
+
+# Seconds a single graph may take before it is abandoned
+DEFAULT_TIMEOUT = 60
+
+# Extra seconds after which a graph stuck where the timeout cannot
+# interrupt it (inside one C call) has its worker process killed
+KILL_GRACE = 5
+
+# How often the pool is checked for graphs past that deadline (seconds)
+POLL_SECONDS = 0.2
+
+# Record keys that are not graph settings
+JOB_KEYS = {'output'}
+
+
+class JobTimeout(Exception):
+    """Raised inside a worker when a graph runs past its time limit"""
+
+
+def load_records(path):
+    """Read graph records from a JSON list/object or a JSON Lines file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+
+    records = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}, line {number}: {e.msg}")
+    return records
+
+
+def make_job(index, record, out_dir, fmt):
+    """Turn one record into (spec, output path); raises ValueError if invalid"""
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    settings = {name: value for name, value in record.items() if name not in JOB_KEYS}
+    spec = GraphSpec.from_dict(settings)
+    output = record.get('output') or f"{index:05d}_{spec.graph_type}.{fmt}"
+    ext = os.path.splitext(output)[1].lower().lstrip('.')
+    if ext not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{ext}' (use png, pdf or svg)")
+    return spec, os.path.join(out_dir, output)
+
+
+# ===== WORKER PROCESS =====
+
+# Figure reused by every job of a worker process
+_figure = None
+
+# Shared with the parent: start time (time.time()) and worker pid of
+# every job by index, so it can kill a worker stuck on a job
+_started = None
+_pids = None
+
+
+def _init_worker(trace_memory=False, started=None, pids=None):
+    """Warm a worker up once: Agg backend, resolved styles and a figure"""
+    global _figure, _started, _pids
+    _started, _pids = started, pids
+    matplotlib.use('Agg')
+    if trace_memory:
+        start_memory_tracing()
+    for style in set(MODE_STYLES.values()) | {SPEC_DEFAULTS['plot_style']}:
+        style_params(style)
+    _figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(_figure)
+
+
+def _alarm(signum, frame):
+    raise JobTimeout()
+
+
+def _reset_figure():
+    """Blank the reused figure for the next graph (under its plot style)"""
+    _figure.clear()
+    _figure.set_size_inches(FIGURE_SIZE)
+    _figure.set_facecolor(mpl.rcParams['figure.facecolor'])
+    _figure.set_edgecolor(mpl.rcParams['figure.edgecolor'])
+    return _figure
+
+
+def render_job(index, spec, filename, dpi=EXPORT_DPI, timeout=DEFAULT_TIMEOUT):
+    """Render one spec to `filename` in a worker process
+
+    Returns (index, filename, seconds, error message or None, render
+    event with the stage timings). The time limit is checked between
+    render steps and, where the platform has SIGALRM, also interrupts
+    long-running Python code; the parent kills a worker still stuck
+    KILL_GRACE seconds later.
+    """
+    if _figure is None:
+        _init_worker()
+    if _started is not None:
+        _pids[index] = os.getpid()
+        _started[index] = time.time()
+    start = time.perf_counter()
+    trace = RenderTrace('batch', graph_type=spec.graph_type, index=index, output=filename,
+                        pid=os.getpid())
+
+    def check():
+        if timeout and time.perf_counter() - start > timeout:
+            raise JobTimeout()
+
+    alarm = bool(timeout) and hasattr(signal, 'setitimer')
+    if alarm:
+        signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    failure = None
+    try:
+        with tracing(trace), use_style(spec.plot_style):
+            figure = _reset_figure()
+            draw_graph(figure, spec, check, dpi)
+            check()
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            with stage('savefig'):
+                figure.savefig(filename, dpi=dpi, bbox_inches='tight')
+        error = None
+    except JobTimeout as e:
+        error = f"timed out after {timeout:g} s"
+        failure = e
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        failure = e
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    event = trace.finish(_figure if failure is None else None, failure)
+    return index, filename, time.perf_counter() - start, error, event
+
+
+def _render_jobs(jobs, workers, dpi, timeout, trace_memory):
+    """Render (index, spec, filename, ...) jobs across a process pool
+
+    Yields (job, render_job result) once for every job, in completion
+    order. A worker that dies (killed for memory, or crashing inside a C
+    library) breaks the whole pool: it is started again and the jobs that
+    had not started are submitted again. Those that were running are tried
+    again one at a time, so the one that takes its worker down again is
+    known and reported as failed. A job running past its timeout plus
+    KILL_GRACE has its worker killed the same way and is reported as timed
+    out; the jobs lost with it are simply submitted again.
+    """
+    context = multiprocessing.get_context()
+    size = max((job[0] for job in jobs), default=-1) + 1
+    started = context.RawArray('d', size)
+    pids = context.RawArray('i', size)
+    waiting, suspects = list(jobs), []
+    while waiting or suspects:
+        alone = bool(suspects)
+        if alone:
+            batch, suspects = suspects, []
+        else:
+            batch, waiting = waiting, []
+        killed = set()
+        with ProcessPoolExecutor(max_workers=1 if alone else workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(trace_memory, started, pids)) as pool:
+            futures = {}
+            for job in batch:
+                started[job[0]] = 0.0
+                futures[pool.submit(render_job, job[0], job[1], job[2], dpi, timeout)] = job
+            while futures:
+                done, _ = wait(futures, POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    index, filename = job[0], job[2]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        result = None
+                    except Exception as e:
+                        result = (index, filename, 0.0, f"{type(e).__name__}: {e}", None)
+                    if result is not None:
+                        yield job, result
+                        continue
+                    seconds = time.time() - started[index] if started[index] else 0.0
+                    if index in killed:
+                        error = f"timed out after {timeout:g} s (worker killed)"
+                    elif not started[index] or (killed and not alone):
+                        (suspects if alone else waiting).append(job)
+                        continue
+                    elif not alone:
+                        suspects.append(job)
+                        continue
+                    else:
+                        error = "worker process died (out of memory or crashed)"
+                    yield job, (index, filename, seconds, error, None)
+                if timeout:
+                    now = time.time()
+                    for job in futures.values():
+                        index = job[0]
+                        if (started[index] and index not in killed
+                                and now - started[index] > timeout + KILL_GRACE):
+                            killed.add(index)
+                            try:
+                                os.kill(pids[index], getattr(signal, 'SIGKILL', signal.SIGTERM))
+                            except OSError:
+                                pass
+
+
+# ===== COMMAND LINE =====
+
+def copy_output(source, filename):
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    shutil.copyfile(source, filename)
+
+
+def run_batch(records, out_dir, fmt='png', workers=None, timeout=DEFAULT_TIMEOUT,
+              dpi=EXPORT_DPI, cache=None, events=None, trace_memory=False, log=sys.stderr):
+    """Render every record across a process pool; returns the summary dict
+
+    Records with the same content are rendered once and copied; with an
+    ExportCache `cache`, graphs exported by earlier runs are copied too.
+    The render event of every job is written to the EventLog `events`;
+    `trace_memory` adds tracemalloc allocation peaks to its stages.
+    """
+    start = time.perf_counter()
+    failures = []
+    jobs = []
+    copies = {}
+    cached = 0
+    for index, record in enumerate(records):
+        try:
+            spec, filename = make_job(index, record, out_dir, fmt)
+        except ValueError as e:
+            failures.append((index, None, str(e)))
+            continue
+        ext = os.path.splitext(filename)[1].lower().lstrip('.')
+        content = content_key(spec)
+        key = export_key(content, ext, FIGURE_SIZE, dpi) if content else None
+        if key in copies:
+            copies[key].append((index, filename))
+            continue
+        if key and cache is not None:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            if cache.fetch(key, ext, filename):
+                cached += 1
+                continue
+        if key:
+            copies[key] = []
+        jobs.append((index, spec, filename, key, ext))
+
+    rendered = 0
+    render_seconds = 0.0
+    for (_, _, _, key, ext), result in _render_jobs(jobs, workers, dpi, timeout, trace_memory):
+        index, filename, seconds, error, event = result
+        render_seconds += seconds
+        if events is not None and event is not None:
+            events.write(event)
+        duplicates = copies.get(key, [])
+        if error is not None:
+            for failed_index, failed_file in [(index, filename)] + duplicates:
+                failures.append((failed_index, failed_file, error))
+                print(f"#{failed_index} {failed_file}: {error}", file=log)
+            continue
+        rendered += 1
+        if key and cache is not None:
+            cache.store(key, ext, filename)
+        for copy_index, copy in duplicates:
+            try:
+                copy_output(filename, copy)
+                cached += 1
+            except OSError as e:
+                failures.append((copy_index, copy, str(e)))
+
+    elapsed = time.perf_counter() - start
+    summary = {'total': len(records), 'rendered': rendered, 'cached': cached,
+               'failed': sorted(failures), 'seconds': elapsed,
+               'render_seconds': render_seconds,
+               'cache': cache.stats() if cache is not None else None}
+    if events is not None:
+        events.write({'event': 'batch', **summary, 'failed': len(failures)})
+    return summary
+
+
+def print_summary(summary, out=sys.stdout):
+    total, rendered, failed = summary['total'], summary['rendered'], summary['failed']
+    cached, seconds = summary['cached'], summary['seconds']
+    rate = (rendered + cached) / seconds if seconds else 0.0
+    print(f"Wrote {rendered + cached}/{total} graphs in {seconds:.1f} s "
+          f"({rate:.1f} graphs/s, {summary['render_seconds']:.1f} s of render time)", file=out)
+    print(f"{rendered} rendered, {cached} copied from identical graphs or the cache", file=out)
+    if summary['cache'] is not None:
+        stats = summary['cache']
+        print(f"Export cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} files ({stats['bytes'] / 1e6:.1f} MB), "
+              f"{stats['evictions']} evicted", file=out)
+    if failed:
+        timeouts = sum(1 for _, _, error in failed if error.startswith("timed out"))
+        print(f"{len(failed)} failed ({timeouts} timed out):", file=out)
+        for index, filename, error in failed:
+            print(f"  #{index} {filename or '-'}: {error}", file=out)
+
+
+def main(argv=None):
+    """Entry point of 'graph_generator.py batch'; returns the exit status"""
+    parser = argparse.ArgumentParser(
+        prog='graph_generator.py batch',
+        description="Render graph specs from a JSON or JSON Lines file in parallel.")
+    parser.add_argument('specs', help="JSON list or JSON Lines file of graph settings")
+    parser.add_argument('-o', '--out', default='.', help="output folder (default: .)")
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='png',
+                        help="format for records without an 'output' name (default: png)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"seconds per graph, 0 for none (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument('--dpi', type=int, default=EXPORT_DPI,
+                        help=f"resolution of PNG output (default: {EXPORT_DPI})")
+    parser.add_argument('--events', metavar='FILE',
+                        help="append per-stage timings of every graph as JSON lines to FILE")
+    parser.add_argument('--cache', metavar='DIR',
+                        help="keep exported files in DIR and copy them when a graph repeats")
+    parser.add_argument('--cache-size', type=float, default=EXPORT_CACHE_BYTES / 1e6,
+                        metavar='MB', help="size limit of --cache (default: %(default)g MB)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="record allocation peaks per stage in --events (slower)")
+    args = parser.parse_args(argv)
+
+    try:
+        records = load_records(args.specs)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read {args.specs}: {e}", file=sys.stderr)
+        return 2
+    cache = None
+    if args.cache:
+        try:
+            cache = ExportCache(args.cache, int(args.cache_size * 1e6))
+        except OSError as e:
+            print(f"Cannot use cache folder {args.cache}: {e}", file=sys.stderr)
+            return 2
+    events = EventLog(args.events) if args.events else None
+    try:
+        summary = run_batch(records, args.out, args.format, args.jobs, args.timeout, args.dpi,
+                            cache, events, args.trace_memory)
+    finally:
+        if events is not None:
+            events.close()
+    print_summary(summary)
+    return 1 if summary['failed'] else 0
@@ -0,0 +1,348 @@
+"""
+Render caching for the Professional Graph Generator
+Graphs are identified by a content key: a stable hash of the normalized
+spec and of the data it reads. Rendered figures are kept in an in-memory
+LRU together with their pixels, and exported files can be kept in an
+on-disk cache with size-based eviction, so repeated renders and saves of
+the same graph skip Matplotlib entirely
+"""
+
+import ast
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import matplotlib
+import numpy as np
+from matplotlib.path import Path
+from graph_data import is_file_reference, iter_file_chunks, parse_numbers, split_file_reference
+from graph_expressions import compile_expression
+
+# Bump when a change in drawing makes old cached exports wrong
+CACHE_VERSION = 1
+
+# Settings that only matter to some graph types; left out of the key
+# elsewhere so e.g. a leftover Z field does not defeat the cache
+TYPE_SETTINGS = {
+    'z_data': ['3d_surface', '3d_scatter', 'contour', 'heatmap'],
+    'zlabel': ['3d_surface', '3d_scatter'],
+    'decimation': ['line'],
+    'density_threshold': ['scatter'],
+    'density_log': ['scatter'],
+    'heatmap_reduction': ['heatmap'],
+    'hist_bins': ['histogram'],
+    'memory_budget': ['contour', 'heatmap'],
+}
+
+# Data fields: hashed by the arrays they stand for rather than by text
+DATA_FIELDS = ('x_data', 'y_data', 'z_data')
+
+# In-memory cache limits: figures kept, and the memory they may hold
+# (their pixels plus every array their artists and render state keep)
+RENDER_CACHE_ENTRIES = 16
+RENDER_CACHE_BYTES = 256 << 20
+
+# Default size budget of the on-disk export cache
+EXPORT_CACHE_BYTES = 512 << 20
+
+# Digests of typed values kept, by a hash of their text
+VALUE_DIGESTS = 64
+_value_digests = OrderedDict()
+_DIGEST_LOCK = threading.Lock()
+
+
+def _array_digest(chunks):
+    """Hash of the values (and their types) of a sequence of arrays"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        chunk = np.ascontiguousarray(chunk)
+        digest.update(chunk.dtype.str.encode('ascii'))
+        digest.update(memoryview(chunk).cast('B'))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _file_digest(text, path, size, mtime_ns):
+    """Digest of the values a file reference reads; the file's size and
+    modification time are arguments only so a changed file is read again"""
+    return _array_digest(iter_file_chunks(text))
+
+
+def _values_digest(text):
+    """Digest of typed values, remembered by a hash of their text so a long
+    paste is parsed only once"""
+    key = hashlib.sha256(text.encode('ascii')).digest()
+    with _DIGEST_LOCK:
+        digest = _value_digests.get(key)
+    if digest is None:
+        digest = _array_digest([parse_numbers(text)])
+        with _DIGEST_LOCK:
+            _value_digests[key] = digest
+            if len(_value_digests) > VALUE_DIGESTS:
+                _value_digests.popitem(last=False)
+    return digest
+
+
+def data_digest(text):
+    """Digest of the array a data field stands for, or None if it has none
+
+    Files and typed values are hashed by the values they parse to, ranges
+    by their bounds and expressions by their syntax tree (which decides
+    their result). Expressions that draw np.random samples differ on every
+    render and are never cached, nor is data that cannot be read.
+    """
+    text = text.strip()
+    if is_file_reference(text):
+        path, _ = split_file_reference(text)
+        try:
+            stat = os.stat(path)
+            return ['file', _file_digest(text, os.path.abspath(path), stat.st_size,
+                                         stat.st_mtime_ns)]
+        except (OSError, ValueError):
+            return None
+    parts = text.split(':')
+    if len(parts) in (2, 3):
+        try:
+            return ['range', [float(part) for part in parts]]
+        except ValueError:
+            return None
+    try:
+        return ['values', _values_digest(text)]
+    except ValueError:
+        pass
+    try:
+        expression = compile_expression(text)
+    except ValueError:
+        return None
+    if expression.random:
+        return None
+    return ['expression', ast.dump(ast.parse(text, mode='eval'))]
+
+
+def content_key(spec):
+    """Stable hash of everything that decides how `spec` looks
+
+    Returns None when the graph cannot be cached (random or missing data).
+    """
+    settings = spec._asdict()
+    for name, graph_types in TYPE_SETTINGS.items():
+        if spec.graph_type not in graph_types:
+            del settings[name]
+    for name in DATA_FIELDS:
+        if name in settings:
+            digest = data_digest(settings[name])
+            if digest is None:
+                return None
+            settings[name] = digest
+    settings['version'] = [CACHE_VERSION, matplotlib.__version__]
+    text = json.dumps(settings, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def export_key(content, fmt, figsize, dpi):
+    """Key of an exported file: the graph plus the output it was saved to"""
+    text = f"{content}:{fmt.lower()}:{figsize[0]:.4f}x{figsize[1]:.4f}:{dpi}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def held_bytes(figure, *values):
+    """Bytes of the arrays kept alive by `figure`'s artists and by `values`
+    (render state, pixels...); buffers shared between them count once"""
+    buffers = {}
+
+    def add(value, depth=0):
+        if isinstance(value, np.ndarray):
+            while isinstance(value.base, np.ndarray):
+                value = value.base
+            buffers[id(value)] = value.nbytes
+        elif isinstance(value, Path):
+            add(value.vertices)
+            add(value.codes)
+        elif depth < 3 and isinstance(value, dict):
+            for item in value.values():
+                add(item, depth + 1)
+        elif depth < 3 and isinstance(value, (list, tuple)):
+            for item in value:
+                add(item, depth + 1)
+
+    for artist in figure.findobj():
+        for value in vars(artist).values():
+            add(value)
+    for value in values:
+        add(value)
+    return sum(buffers.values())
+
+
+class RenderCache:
+    """In-memory LRU of rendered graphs
+
+    Values are whatever the caller needs to show a graph again without
+    drawing it (e.g. the figure, its artists and a copy of its pixels);
+    `nbytes` is their size for the memory limit (see held_bytes()). Hits and misses are
+    counted by get().
+    """
+
+    def __init__(self, max_entries=RENDER_CACHE_ENTRIES, max_bytes=RENDER_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Return the cached value of `key` (most recently used now) or None"""
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        """Store `value`, evicting the least recently used entries over the limits"""
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            self._discard(key)
+            self._entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self.bytes -= size
+                self.evictions += 1
+
+    def pop(self, key):
+        """Remove `key` and return its value (None if absent), e.g. before
+        the caller changes it"""
+        with self.lock:
+            entry = self._discard(key)
+            return entry[0] if entry else None
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'entries': len(self._entries), 'bytes': self.bytes,
+                    'evictions': self.evictions}
+
+
+class ExportCache:
+    """On-disk cache of exported graph files, evicted by total size
+
+    Files are named by export_key() and shared safely between processes:
+    new files are written under a temporary name and renamed into place.
+    Using a file refreshes its modification time, which orders eviction.
+    """
+
+    def __init__(self, directory, max_bytes=EXPORT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt.lower()}")
+
+    def fetch(self, key, fmt, filename):
+        """Copy the cached file for `key` to `filename`; False on a miss
+
+        Any other error reading or copying it (permissions, a full disk, a
+        stale handle) counts as a miss too and drops the entry, so the
+        caller renders the graph afresh.
+        """
+        path = self.path(key, fmt)
+        try:
+            shutil.copyfile(path, filename)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        except OSError:
+            self.misses += 1
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, fmt, filename):
+        """Add the exported `filename` under `key`, then trim the cache"""
+        path = self.path(key, fmt)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(filename, temp)
+            os.replace(temp, path)
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
+            return
+        self.evict()
+
+    def files(self):
+        """(modification time, size, path) of every cached file"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def evict(self):
+        """Delete the least recently used files until the cache fits its budget"""
+        files = sorted(self.files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        """Hit/miss counters of this process and the size on disk"""
+        files = self.files()
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(files), 'bytes': sum(size for _, size, _ in files),
+                'evictions': self.evictions}
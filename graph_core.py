@@ -0,0 +1,761 @@
+"""
+Headless rendering core for the Professional Graph Generator
+A GraphSpec describes one graph (data sources, graph type, mode, styling and
+axis ranges); render(spec) draws it on an Agg figure without Tk, so batch
+jobs, servers and benchmarks share the exact drawing code of the GUI
+"""
+
+import os
+import threading
+from collections import namedtuple
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from graph_data import (parse_numbers, is_file_reference, load_data_file,
+                        split_file_reference, iter_file_chunks)
+from graph_lod import (DENSITY_THRESHOLD, HISTOGRAM_RULES, build_pyramid, exact_histogram,
+                       decimate_line, surface_budget, surface_lod)
+from graph_render import DensityImage, LayoutCache, density_scatter, pyramid_heatmap, use_style
+from graph_expressions import sample_chunks
+from graph_sandbox import ExpressionStopped, ExpressionTimeout, sandbox_limits, sandboxed
+from graph_memory import (MEMORY_BUDGET_MB, MemoryBudgetError, check_values, estimate_values,
+                          format_bytes, grid_stride)
+from graph_trace import stage
+
+GRAPH_TYPES = ["line", "scatter", "bar", "3d_surface", "3d_scatter", "histogram",
+               "contour", "heatmap"]
+
+# Figure size (inches) of a headless render; the GUI uses its canvas size
+FIGURE_SIZE = (10, 8)
+
+# Every setting of one graph and its default (the GUI controls start here)
+SPEC_DEFAULTS = {
+    # Data sources: typed values, a:b[:step] ranges, expressions or '@file'
+    'graph_type': "line", 'x_data': "0, 1, 2, 3, 4, 5", 'y_data': "0, 1, 4, 9, 16, 25",
+    'z_data': "",
+    # Mode and plot style
+    'graph_mode': "professional", 'plot_style': "seaborn-v0_8", 'dpi': 100,
+    # Labels
+    'title': "My Beautiful Graph", 'xlabel': "X Axis", 'ylabel': "Y Axis",
+    'zlabel': "Z Axis", 'font_size': 12,
+    # Styling
+    'color': "blue", 'custom_color': "", 'line_width': 2.0, 'marker': "o",
+    'marker_size': 6.0, 'line_style': "-", 'alpha': 1.0, 'edge_color': "black",
+    'edge_width': 1.0, 'colormap': "viridis", 'show_grid': True, 'show_legend': True,
+    'show_origin_axes': False, 'tight_layout': True, 'antialiased': True,
+    'add_shadow': False,
+    # Axis ranges (used when auto_range is off)
+    'auto_range': True, 'x_min': "", 'x_max': "", 'y_min': "", 'y_max': "",
+    'z_min': "", 'z_max': "",
+    # Level of detail
+    'decimation': "min/max", 'density_threshold': str(DENSITY_THRESHOLD),
+    'density_log': True, 'heatmap_reduction': "mean", 'hist_bins': "20",
+    # Memory budget of one render in MB (bigger data is refused, grids thinned)
+    'memory_budget': str(MEMORY_BUDGET_MB),
+}
+
+
+class GraphSpec(namedtuple('GraphSpec', SPEC_DEFAULTS, defaults=SPEC_DEFAULTS.values())):
+    """Immutable description of one graph
+
+    Fields and defaults are listed in SPEC_DEFAULTS and match the GUI
+    controls of the same name. Use spec._replace(...) for variations.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, settings):
+        """Build a spec from plain settings (e.g. parsed JSON)
+
+        Unknown names raise ValueError; numbers are converted to the type
+        of the field's default, so "dpi": 150.0 and "line_width": 2 work.
+        """
+        unknown = set(settings) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown graph setting(s): {', '.join(sorted(unknown))}")
+        values = {}
+        for name, value in settings.items():
+            default = SPEC_DEFAULTS[name]
+            if isinstance(default, bool):
+                if not isinstance(value, bool):
+                    raise ValueError(f"'{name}' must be true or false, not {value!r}")
+            elif isinstance(default, (int, float)):
+                try:
+                    value = type(default)(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{name}' must be a number, not {value!r}")
+            else:
+                value = str(value)
+            values[name] = value
+        return cls(**values)
+
+
+# Pyramid of the last heatmap, reused while its Z inputs are unchanged
+_pyramid = (None, None)
+_PYRAMID_LOCK = threading.Lock()
+
+# Tight layout results shared by renders that do not bring their own cache
+_layout_cache = LayoutCache()
+
+
+# ===== DATA =====
+
+def parse_data(data_str, sources=None):
+    """Parse a data field into a numpy array
+
+    `sources` maps file references to arrays already in memory (e.g. CSV
+    files streamed by the GUI); other references are loaded from disk.
+    """
+    data_str = data_str.strip()
+
+    # Check if it refers to a data file (@data.npy, @table.csv:col3)
+    if is_file_reference(data_str):
+        if sources and data_str in sources:
+            return sources[data_str]
+        return load_data_file(data_str)
+
+    # Check if it's a range expression
+    if ':' in data_str:
+        parts = data_str.split(':')
+        if len(parts) == 2:
+            return np.linspace(float(parts[0]), float(parts[1]), 100)
+        elif len(parts) == 3:
+            return np.arange(float(parts[0]), float(parts[1]), float(parts[2]))
+
+    # Parse as separated values (commas, semicolons, spaces or newlines)
+    try:
+        return parse_numbers(data_str)
+    except ValueError:
+        pass
+
+    # Otherwise treat it as a mathematical expression of x
+    try:
+        x = np.linspace(0, 10, 100)
+        return np.atleast_1d(np.asarray(sandboxed('evaluate', data_str, x=x), dtype=np.float64))
+    except (ExpressionTimeout, ExpressionStopped, MemoryBudgetError):
+        raise
+    except Exception:
+        preview = data_str if len(data_str) <= 60 else data_str[:60] + "..."
+        raise ValueError(f"Cannot parse data: {preview}")
+
+
+def iter_data_chunks(data_str, sources=None, budget=None):
+    """Yield a data field in pieces: file references and long np.random
+    expressions never have to fit in memory at once (anything else is
+    checked against the memory `budget` in bytes, if given)"""
+    data_str = data_str.strip()
+    if is_file_reference(data_str) and not (sources and data_str in sources):
+        yield from iter_file_chunks(data_str)
+        return
+    chunks = sample_chunks(data_str)
+    if chunks is None:
+        if budget is not None:
+            check_values(estimate_values(data_str), "The data", budget)
+        yield parse_data(data_str, sources)
+    else:
+        yield from chunks
+
+
+def replay_data_chunks(data_str, sources=None, budget=None):
+    """Return a function that yields the pieces of a data field like
+    iter_data_chunks, the same ones on every call: files are read again,
+    np.random samples drawn again from the same generator state and
+    anything else is parsed only once"""
+    data_str = data_str.strip()
+    if is_file_reference(data_str) and not (sources and data_str in sources):
+        return lambda: iter_file_chunks(data_str)
+    if sample_chunks(data_str) is None:
+        values = list(iter_data_chunks(data_str, sources, budget))
+        return lambda: iter(values)
+    state = np.random.get_state()
+
+    def replay():
+        np.random.set_state(state)
+        return sample_chunks(data_str)
+    return replay
+
+
+def get_histogram_bins(spec):
+    """Bin count or automatic rule entered for histograms"""
+    bins = spec.hist_bins.strip().lower()
+    if bins in HISTOGRAM_RULES:
+        return bins
+    try:
+        bins = int(bins)
+    except ValueError:
+        bins = 0
+    if bins < 1:
+        raise ValueError(f"Histogram bins must be a whole number or one of: "
+                         f"{', '.join(HISTOGRAM_RULES)}")
+    return bins
+
+
+def get_memory_budget(spec):
+    """Memory budget of a render in bytes"""
+    try:
+        budget = float(spec.memory_budget)
+    except ValueError:
+        budget = 0
+    if not budget > 0:
+        raise ValueError(f"Memory budget must be a positive number of MB: {spec.memory_budget}")
+    return int(budget * 1e6)
+
+
+def use_density(spec, x, y):
+    """Check whether a scatter plot is big enough to draw as a density image"""
+    if len(x) != len(y):
+        raise ValueError(f"x and y must be the same size ({len(x)} and {len(y)})")
+    try:
+        threshold = int(spec.density_threshold)
+    except ValueError:
+        raise ValueError(f"Scatter density threshold must be a whole number: "
+                         f"{spec.density_threshold}")
+    return len(x) > threshold
+
+
+def get_manual_range(spec):
+    """Return (min, max) of the manual x range, or None when auto/invalid"""
+    if spec.auto_range:
+        return None
+    try:
+        return float(spec.x_min), float(spec.x_max)
+    except ValueError:
+        return None
+
+
+def grid_note(stride, budget):
+    """Tell the user a Z grid was thinned out to fit the memory budget"""
+    return (f"Z grid thinned to 1 in {stride} rows and columns to fit the "
+            f"{format_bytes(budget)} memory budget")
+
+
+# ===== KEYS =====
+
+def structure_key(spec):
+    """Everything that needs a full rebuild of the graph when it changes
+
+    Line and scatter data are left out: their artists take new data in
+    place. Colours, widths, alpha, labels and axis ranges are updated in
+    place too.
+    """
+    graph_type = spec.graph_type
+    key = [graph_type, spec.graph_mode, spec.plot_style, spec.dpi, spec.show_grid,
+           spec.show_legend, spec.show_origin_axes, spec.tight_layout, spec.add_shadow]
+    if graph_type == "line":
+        key.append(spec.decimation)
+    if graph_type in ['scatter', '3d_scatter']:
+        key.append(spec.marker)
+    if graph_type == "scatter":
+        key += [spec.density_threshold, spec.density_log]
+    if graph_type not in ['line', 'scatter']:
+        key += [spec.x_data, spec.y_data, spec.z_data]
+    if graph_type == "contour":
+        key += [spec.colormap, spec.line_width]
+    if graph_type == "3d_surface" and spec.add_shadow:
+        key.append(spec.colormap)
+    if graph_type == "heatmap":
+        key.append(spec.heatmap_reduction)
+    if graph_type == "histogram":
+        key.append(spec.hist_bins)
+    if graph_type in ['contour', 'heatmap']:
+        key.append(spec.memory_budget)
+    return tuple(key)
+
+
+def data_key(spec):
+    """Inputs of the line/scatter data: the line is cropped to the x range"""
+    return spec.x_data, spec.y_data, get_manual_range(spec)
+
+
+def heatmap_key(spec):
+    """Inputs of a heatmap pyramid; file references add the file's mtime"""
+    mtime = None
+    if is_file_reference(spec.z_data):
+        try:
+            mtime = os.path.getmtime(split_file_reference(spec.z_data)[0])
+        except OSError:
+            pass  # load_data_file reports the missing file
+    return (spec.x_data, spec.y_data, spec.z_data, mtime, spec.heatmap_reduction,
+            spec.memory_budget)
+
+
+def label_key(spec):
+    """Label settings that change the size of the text around the axes
+    (the layout cache adds figure size, DPI and tick labels)"""
+    return (spec.title, spec.xlabel, spec.ylabel, spec.zlabel, spec.font_size)
+
+
+# ===== STYLING =====
+
+def get_plot_colors(spec):
+    """Return the (color, marker, edge color) chosen in the style settings"""
+    # Get color - check for custom hex color first
+    color = spec.color
+    if spec.custom_color.strip():
+        color = spec.custom_color.strip()
+    elif color == "custom":
+        color = "#1f77b4"  # Default matplotlib blue
+
+    # Get marker
+    marker = spec.marker
+    if marker == "None":
+        marker = None
+
+    # Get edge color
+    edge_color = spec.edge_color
+    if edge_color == "none":
+        edge_color = None
+    elif edge_color == "same as fill":
+        edge_color = color
+    return color, marker, edge_color
+
+
+def apply_labels(spec, ax):
+    """Set title and axis labels with the chosen font size"""
+    font_size = spec.font_size
+    ax.set_title(spec.title, fontsize=font_size+2, fontweight='bold', pad=20)
+    ax.set_xlabel(spec.xlabel, fontsize=font_size, fontweight='medium')
+    ax.set_ylabel(spec.ylabel, fontsize=font_size, fontweight='medium')
+
+    if spec.graph_type in ['3d_surface', '3d_scatter']:
+        ax.set_zlabel(spec.zlabel, fontsize=font_size, fontweight='medium')
+
+
+def apply_axis_ranges(spec, ax):
+    """Apply the manual axis ranges when auto range is off"""
+    if spec.auto_range:
+        return
+    try:
+        if spec.x_min and spec.x_max:
+            ax.set_xlim(float(spec.x_min), float(spec.x_max))
+        if spec.y_min and spec.y_max:
+            ax.set_ylim(float(spec.y_min), float(spec.y_max))
+        if spec.graph_type in ['3d_surface', '3d_scatter']:
+            if spec.z_min and spec.z_max:
+                ax.set_zlim(float(spec.z_min), float(spec.z_max))
+    except ValueError:
+        pass  # Ignore invalid range values
+
+
+def add_graph_legend(spec, ax):
+    """(Re)create the legend for graph types that have one"""
+    if not (spec.show_legend and spec.graph_type in ['line', 'scatter', 'bar']):
+        return
+    if not ax.get_legend_handles_labels()[0]:
+        return  # e.g. a density scatter has nothing to list
+    font_size = spec.font_size
+    if spec.graph_mode == "professional":
+        ax.legend(fontsize=font_size-2, framealpha=0.95, shadow=True,
+                 fancybox=True, loc='best')
+    else:
+        ax.legend(fontsize=font_size-2, framealpha=0.9, shadow=False)
+
+
+# ===== DRAWING =====
+
+def check_z_shape(Z, x, y):
+    """Refuse a Z array read from a file that does not match the X/Y grid"""
+    if np.shape(Z) != (len(y), len(x)):
+        raise ValueError(f"Z file has shape {np.shape(Z)}, expected "
+                         f"({len(y)}, {len(x)}) for len(y) x len(x)")
+
+
+def draw_graph(figure, spec, check=None, output_dpi=None, sources=None, layout_cache=None):
+    """Draw the graph described by `spec` on `figure`
+
+    Call under use_style(spec.plot_style). `check` is called between the
+    expensive steps and may raise to abandon the render; `output_dpi` is
+    the resolution the figure will be rasterized at (default: its own),
+    which sizes the level of detail. Returns the render state used by
+    update_graph.
+    """
+    check = check or (lambda: None)
+    layout_cache = layout_cache or _layout_cache
+    graph_type = spec.graph_type
+    # Things the user should know about the result (e.g. thinned grids)
+    notes = []
+
+    # Parse data (histograms read Y piece by piece instead), refusing
+    # sizes that would not fit the memory budget before allocating them
+    budget = get_memory_budget(spec)
+    with stage('parse_data') as info, sandbox_limits(budget, check):
+        check_values(estimate_values(spec.x_data), "X data", budget)
+        x = parse_data(spec.x_data, sources)
+        if graph_type != "histogram":
+            check_values(estimate_values(spec.y_data), "Y data", budget)
+            y = parse_data(spec.y_data, sources)
+            info['points'] = max(x.size, y.size)
+        else:
+            y = None
+    check()
+
+    mode = spec.graph_mode
+    color, marker, edge_color = get_plot_colors(spec)
+
+    # Set figure DPI for quality
+    figure.set_dpi(spec.dpi)
+
+    # Create appropriate plot
+    if graph_type == "line":
+        ax = figure.add_subplot(111)
+        # Millions of points cannot show more than the canvas has pixels
+        with stage('decimate') as info:
+            x, y = decimate_line(x, y, ax.bbox.width, spec.decimation, get_manual_range(spec))
+            info['kept'] = len(x)
+        with stage('artists'):
+            artist, = ax.plot(x, y, color=color, linewidth=spec.line_width,
+                              marker=marker, markersize=spec.marker_size,
+                              linestyle=spec.line_style, alpha=spec.alpha,
+                              label='Data', antialiased=spec.antialiased,
+                              markeredgecolor=edge_color, markeredgewidth=spec.edge_width)
+
+    elif graph_type == "scatter":
+        ax = figure.add_subplot(111)
+        if use_density(spec, x, y):
+            # Too many markers to draw one by one: show points per pixel
+            with stage('artists', density=True):
+                artist = density_scatter(ax, x, y, spec.density_log, cmap=spec.colormap,
+                                         alpha=spec.alpha)
+            with stage('colorbar'):
+                figure.colorbar(artist, ax=ax, label='Points per pixel')
+        else:
+            with stage('artists'):
+                artist = ax.scatter(x, y, color=color, s=spec.marker_size**2,
+                                    alpha=spec.alpha, marker=marker if marker else 'o',
+                                    label='Data', edgecolors=edge_color,
+                                    linewidths=spec.edge_width)
+
+    elif graph_type == "bar":
+        ax = figure.add_subplot(111)
+        with stage('artists'):
+            artist = ax.bar(x, y, color=color, alpha=spec.alpha,
+                            width=spec.line_width/5, label='Data',
+                            edgecolor=edge_color, linewidth=spec.edge_width)
+
+        # Add shadow effect if enabled
+        if spec.add_shadow:
+            for bar in artist:
+                bar.set_linewidth(spec.edge_width + 1)
+                bar.set_edgecolor('gray')
+
+    elif graph_type == "histogram":
+        # Counted chunk by chunk, so files and np.random expressions of
+        # any length are histogrammed in constant memory (large ones are
+        # read twice to count them exactly)
+        with stage('histogram') as info:
+            chunks = replay_data_chunks(spec.y_data, sources, budget)
+            histogram = exact_histogram(chunks, get_histogram_bins(spec), check)
+            counts, edges = histogram.result()
+            info['points'] = int(histogram.count)
+
+        ax = figure.add_subplot(111)
+        with stage('artists', bins=len(counts)):
+            _, _, artist = ax.hist(edges[:-1], bins=edges, weights=counts,
+                                   color=color, alpha=spec.alpha,
+                                   edgecolor=edge_color if edge_color else 'black',
+                                   linewidth=spec.edge_width)
+
+    elif graph_type == "3d_surface":
+        # Level of detail: only as many polygons as the canvas (or the
+        # export) can show; Z is computed or read for the kept rows only
+        width_px, height_px = figure.get_size_inches() * (output_dpi or figure.dpi)
+        rows, cols = surface_lod(len(y), len(x), surface_budget(width_px, height_px))
+
+        z_str = spec.z_data
+        with stage('eval_z', shape=[len(rows), len(cols)]), sandbox_limits(budget, check):
+            if not z_str:
+                # Generate surface from x, y
+                X, Y = np.meshgrid(x[cols], y[rows])
+                Z = np.sin(np.sqrt(X**2 + Y**2))
+            elif is_file_reference(z_str):
+                Z = load_data_file(z_str)
+                check_z_shape(Z, x, y)
+                X, Y = np.meshgrid(x[cols], y[rows])
+                Z = np.asarray(Z[np.ix_(rows, cols)], dtype=np.float64)
+            else:
+                X, Y = np.meshgrid(x[cols], y[rows])
+                Z = sandboxed('evaluate_grid', z_str, x[cols], y[rows])
+        check()
+
+        ax = figure.add_subplot(111, projection='3d')
+        with stage('artists'):
+            artist = ax.plot_surface(X, Y, Z, cmap=spec.colormap,
+                                     rcount=len(rows), ccount=len(cols),
+                                     linewidth=spec.line_width/2,
+                                     alpha=spec.alpha,
+                                     antialiased=spec.antialiased)
+        with stage('colorbar'):
+            figure.colorbar(artist, ax=ax, shrink=0.5)
+
+        # Add shadow/projection if enabled
+        if spec.add_shadow:
+            with stage('artists', shadow=True):
+                ax.contour(X, Y, Z, zdir='z', offset=Z.min(),
+                          cmap=spec.colormap, alpha=0.3, linewidths=1)
+
+    elif graph_type == "3d_scatter":
+        z_str = spec.z_data
+        with stage('eval_z') as info, sandbox_limits(budget, check):
+            if z_str:
+                check_values(estimate_values(z_str), "Z data", budget)
+                z = parse_data(z_str, sources)
+            else:
+                z = x + y  # Default
+            info['shape'] = list(np.shape(z))
+
+        ax = figure.add_subplot(111, projection='3d')
+        with stage('artists'):
+            artist = ax.scatter(x, y, z, color=color, s=spec.marker_size**2,
+                                alpha=spec.alpha, marker=marker if marker else 'o',
+                                edgecolors=edge_color, linewidths=spec.edge_width)
+
+    elif graph_type == "contour":
+        z_str = spec.z_data
+        with stage('eval_z') as info, sandbox_limits(budget, check):
+            # Thin out grids that would not fit the memory budget
+            stride = grid_stride(len(x), len(y), budget)
+            if is_file_reference(z_str):
+                Z = load_data_file(z_str)
+                check_z_shape(Z, x, y)
+            x, y = x[::stride], y[::stride]
+            X, Y = np.meshgrid(x, y)
+            if is_file_reference(z_str):
+                Z = Z[::stride, ::stride]
+            elif z_str:
+                Z = sandboxed('evaluate_grid', z_str, x, y)
+            else:
+                Z = np.sin(np.sqrt(X**2 + Y**2))
+            info['shape'] = list(np.shape(Z))
+            info['stride'] = stride
+        if stride > 1:
+            notes.append(grid_note(stride, budget))
+
+        ax = figure.add_subplot(111)
+        with stage('artists'):
+            artist = ax.contour(X, Y, Z, levels=15, linewidths=spec.line_width,
+                                cmap=spec.colormap)
+            ax.clabel(artist, inline=True, fontsize=8)
+        with stage('colorbar'):
+            figure.colorbar(artist, ax=ax)
+
+    elif graph_type == "heatmap":
+        # Zoom levels are built once per Z; each draw only resamples the
+        # visible window of the level that matches the screen resolution
+        global _pyramid
+        z_str = spec.z_data
+        # Z files are memory-mapped and reduced in chunks, so any size fits;
+        # computed grids are thinned out to fit the memory budget
+        stride = 1 if is_file_reference(z_str) else grid_stride(len(x), len(y), budget)
+        if stride > 1:
+            notes.append(grid_note(stride, budget))
+        key = heatmap_key(spec)
+        with _PYRAMID_LOCK:
+            cached_key, levels = _pyramid
+        if key != cached_key:
+            with stage('eval_z', stride=stride) as info, sandbox_limits(budget, check):
+                if is_file_reference(z_str):
+                    Z = load_data_file(z_str)
+                else:
+                    Z = sandboxed('evaluate_grid', z_str or 'sin(sqrt(X**2 + Y**2))',
+                                  x[::stride], y[::stride])
+                info['shape'] = list(Z.shape)
+            if Z.ndim != 2:
+                raise ValueError(f"Heatmap Z must be 2D, got shape {Z.shape}")
+            check()
+            with stage('pyramid') as info:
+                levels = build_pyramid(Z, spec.heatmap_reduction)
+                info['levels'] = len(levels)
+            with _PYRAMID_LOCK:
+                _pyramid = (key, levels)
+        check()
+
+        ax = figure.add_subplot(111)
+        with stage('artists'):
+            artist = pyramid_heatmap(ax, levels, cmap=spec.colormap, alpha=spec.alpha,
+                                     interpolation='bilinear')
+        with stage('colorbar'):
+            figure.colorbar(artist, ax=ax)
+
+    else:
+        raise ValueError(f"Unknown graph type '{graph_type}' (use one of: "
+                         f"{', '.join(GRAPH_TYPES)})")
+
+    # Set labels and title with custom font size
+    apply_labels(spec, ax)
+
+    # Apply axis ranges if manual mode
+    apply_axis_ranges(spec, ax)
+
+    # Apply mode-specific styling
+    if mode == "scientific":
+        # Scientific mode: Enhanced grid
+        if graph_type not in ['heatmap']:
+            ax.grid(True, alpha=0.4, linestyle='-', linewidth=0.8, which='both')
+            ax.minorticks_on()
+            ax.grid(which='minor', alpha=0.2, linestyle=':', linewidth=0.5)
+    elif mode == "professional":
+        # Professional mode: Subtle grid
+        if graph_type not in ['heatmap']:
+            ax.grid(True, alpha=0.2, linestyle='--', linewidth=0.5)
+    else:
+        # Normal mode: Standard grid
+        if spec.show_grid and graph_type not in ['heatmap']:
+            ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
+
+    # Show axes through origin if enabled
+    if spec.show_origin_axes and graph_type not in ['heatmap', '3d_surface', '3d_scatter']:
+        ax.axhline(y=0, color='black', linewidth=1.5, alpha=0.8, zorder=5)
+        ax.axvline(x=0, color='black', linewidth=1.5, alpha=0.8, zorder=5)
+
+    # Legend
+    add_graph_legend(spec, ax)
+
+    # Tight layout (cached: unchanged layouts skip measuring all the text)
+    layout_saved = None
+    if spec.tight_layout:
+        with stage('tight_layout') as info:
+            layout_saved = layout_cache.tight_layout(figure, (graph_type,) + label_key(spec))
+            info['cached'] = bool(layout_saved)
+
+    # Add mode watermark in corner (optional)
+    if mode == "professional":
+        figure.text(0.99, 0.01, '📊 Professional',
+                       ha='right', va='bottom', fontsize=7,
+                       alpha=0.3, style='italic')
+    elif mode == "scientific":
+        figure.text(0.99, 0.01, '🔬 Scientific',
+                       ha='right', va='bottom', fontsize=7,
+                       alpha=0.3, style='italic')
+
+    # Remember the artists so style-only changes can skip the rebuild
+    return {'key': structure_key(spec), 'ax': ax, 'artist': artist,
+            'data': data_key(spec), 'layout_saved': layout_saved, 'notes': notes}
+
+
+def update_graph(figure, state, spec, sources=None, layout_cache=None):
+    """Restyle the artists of a drawn graph to match `spec` without clearing it
+
+    Returns False when the graph structure changed and draw_graph is
+    needed instead. Otherwise updates `state` and returns True; the caller
+    redraws the canvas (under use_style).
+    """
+    if state is None or state['key'] != structure_key(spec):
+        return False
+    layout_cache = layout_cache or _layout_cache
+
+    ax, artist = state['ax'], state['artist']
+    graph_type = spec.graph_type
+    color, marker, edge_color = get_plot_colors(spec)
+    alpha = spec.alpha
+
+    data = data_key(spec)
+    if graph_type in ['line', 'scatter'] and data != state['data']:
+        # New data goes straight into the existing artist
+        budget = get_memory_budget(spec)
+        with stage('parse_data') as info, sandbox_limits(budget):
+            check_values(estimate_values(spec.x_data), "X data", budget)
+            x = parse_data(spec.x_data, sources)
+            check_values(estimate_values(spec.y_data), "Y data", budget)
+            y = parse_data(spec.y_data, sources)
+            info['points'] = max(x.size, y.size)
+        if graph_type == "line":
+            x, y = decimate_line(x, y, ax.bbox.width, spec.decimation, get_manual_range(spec))
+            artist.set_data(x, y)
+            ax.relim()
+        else:
+            # Crossing the density threshold swaps the artist type
+            density = use_density(spec, x, y)
+            if density != isinstance(artist, DensityImage):
+                return False
+            ax.ignore_existing_data_limits = True
+            if density:
+                artist.set_points(x, y)
+            else:
+                artist.set_offsets(np.column_stack(np.broadcast_arrays(x, y)))
+                ax.update_datalim(artist.get_offsets())
+        state['data'] = data
+
+    # Back to the data limits, then apply any manual ranges on top
+    ax.autoscale()
+    apply_axis_ranges(spec, ax)
+
+    if graph_type == "line":
+        artist.set_color(color)
+        artist.set_linewidth(spec.line_width)
+        artist.set_marker(marker)
+        artist.set_markersize(spec.marker_size)
+        artist.set_linestyle(spec.line_style)
+        artist.set_alpha(alpha)
+        artist.set_antialiased(spec.antialiased)
+        artist.set_markeredgecolor(edge_color)
+        artist.set_markeredgewidth(spec.edge_width)
+
+    elif isinstance(artist, DensityImage):
+        artist.set_cmap(spec.colormap)
+        artist.set_alpha(alpha)
+
+    elif graph_type in ['scatter', '3d_scatter']:
+        artist.set_facecolor(color)
+        artist.set_edgecolor(edge_color if edge_color else 'face')
+        artist.set_sizes([spec.marker_size**2])
+        artist.set_alpha(alpha)
+        artist.set_linewidths(spec.edge_width)
+
+    elif graph_type == "bar":
+        width = spec.line_width/5
+        for bar in artist:
+            bar.set_x(bar.get_x() + (bar.get_width() - width)/2)
+            bar.set_width(width)
+            bar.set_facecolor(color)
+            bar.set_alpha(alpha)
+            if spec.add_shadow:
+                bar.set_linewidth(spec.edge_width + 1)
+                bar.set_edgecolor('gray')
+            else:
+                bar.set_linewidth(spec.edge_width)
+                bar.set_edgecolor(edge_color)
+
+    elif graph_type == "histogram":
+        for patch in artist:
+            patch.set_facecolor(color)
+            patch.set_alpha(alpha)
+            patch.set_edgecolor(edge_color if edge_color else 'black')
+            patch.set_linewidth(spec.edge_width)
+
+    elif graph_type == "3d_surface":
+        artist.set_cmap(spec.colormap)
+        artist.set_linewidth(spec.line_width/2)
+        artist.set_alpha(alpha)
+        artist.set_antialiased(spec.antialiased)
+
+    elif graph_type == "heatmap":
+        artist.set_cmap(spec.colormap)
+        artist.set_alpha(alpha)
+
+    with use_style(spec.plot_style):
+        apply_labels(spec, ax)
+        add_graph_legend(spec, ax)
+
+        # New labels or tick text may need a new layout; otherwise it is cached
+        state['layout_saved'] = None
+        if spec.tight_layout:
+            with stage('tight_layout') as info:
+                state['layout_saved'] = layout_cache.tight_layout(
+                    figure, (graph_type,) + label_key(spec))
+                info['cached'] = bool(state['layout_saved'])
+    return True
+
+
+def render(spec, sources=None, figsize=FIGURE_SIZE, output_dpi=None):
+    """Draw `spec` on a new Agg figure, rasterize it and return the figure
+
+    No Tk or display is needed. Pass output_dpi=EXPORT_DPI when the figure
+    will be saved at that resolution (sizes the level of detail), and save
+    under use_style(spec.plot_style) so the style also applies to export.
+    """
+    with use_style(spec.plot_style):
+        figure = Figure(figsize=figsize, dpi=spec.dpi)
+        canvas = FigureCanvasAgg(figure)
+        draw_graph(figure, spec, output_dpi=output_dpi, sources=sources)
+        canvas.draw()
+    return figure
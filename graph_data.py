@@ -0,0 +1,350 @@
+"""
+Data input helpers for the Professional Graph Generator
+Fast parsing of the numbers typed or pasted into the X/Y/Z fields,
+and file-backed data sources referenced as '@path'
+"""
+
+import math
+import os
+import threading
+import warnings
+import numpy as np
+
+# Commas and semicolons are folded into spaces so a single whitespace
+# separated pass can handle every accepted separator
+_SEPARATORS = bytes.maketrans(b',;', b'  ')
+# and semicolons into commas when looking for empty fields
+_EMPTY_FIELDS = bytes.maketrans(b';', b',')
+
+# Bytes scanned per step when counting tokens (bounds temporary memory)
+_COUNT_CHUNK = 1 << 20
+
+
+def _count_tokens(data):
+    """Count whitespace separated tokens in an ASCII byte string"""
+    count = 0
+    prev_space = True
+    for start in range(0, len(data), _COUNT_CHUNK):
+        raw = np.frombuffer(data, dtype=np.uint8, count=min(_COUNT_CHUNK, len(data) - start),
+                            offset=start)
+        space = (raw == 32) | ((raw >= 9) & (raw <= 13))
+        # A token starts at every non-space byte that follows a space
+        starts = ~space
+        starts[0] &= prev_space
+        starts[1:] &= space[:-1]
+        count += int(np.count_nonzero(starts))
+        prev_space = bool(space[-1])
+    return count
+
+
+def _find_empty_field(text):
+    """Return True when a comma or semicolon separated field is empty
+
+    Covers '1,,2', '1, ,2' and separators that start or end a line.
+    """
+    # With blanks removed and semicolons folded into commas, an empty field
+    # always leaves a comma next to another comma or a line end
+    packed = text.translate(_EMPTY_FIELDS, b' \t\r\x0b\x0c')
+    if packed.startswith(b',') or packed.endswith(b','):
+        return True
+    for start in range(0, len(packed) - 1, _COUNT_CHUNK):
+        # Chunks overlap by one byte so no adjacent pair is missed
+        raw = np.frombuffer(packed, dtype=np.uint8, offset=start,
+                            count=min(_COUNT_CHUNK + 1, len(packed) - start))
+        comma = raw == 44
+        boundary = comma | (raw == 10)
+        if np.any(comma[1:] & boundary[:-1]) or np.any(comma[:-1] & boundary[1:]):
+            return True
+    return False
+
+
+def line_field_counts(data):
+    """Number of values on every line of ASCII bytes (0 for blank lines)
+
+    Separated like parse_numbers input. Only complete lines are counted
+    when `data` ends with a newline; otherwise the last line is included.
+    """
+    raw = np.frombuffer(data.translate(_SEPARATORS), dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    space = (raw == 32) | ((raw >= 9) & (raw <= 13))
+    starts = ~space
+    starts[1:] &= space[:-1]
+    newlines = np.flatnonzero(raw == 10)
+    lines = len(newlines) + (raw[-1] != 10)
+    return np.bincount(np.searchsorted(newlines, np.flatnonzero(starts)), minlength=lines)
+
+
+def parse_numbers(text):
+    """Parse a list of numbers into a float64 array in one vectorized pass
+
+    Values may be separated by commas, semicolons, spaces, tabs or newlines.
+    Scientific notation (1e-3), inf and nan are accepted. The output buffer
+    is allocated once at its final size. Raises ValueError on bad tokens
+    and empty fields ('1,,2').
+    Accepts str or ASCII bytes.
+    """
+    if isinstance(text, str):
+        text = text.encode('ascii')
+    # Folding separators into spaces would otherwise drop empty fields and
+    # shift every later value one position
+    if (b',' in text or b';' in text) and _find_empty_field(text):
+        raise ValueError("Could not convert '' to a number")
+    data = text.translate(_SEPARATORS)
+    count = _count_tokens(data)
+    if count == 0:
+        raise ValueError("No numbers found")
+
+    with warnings.catch_warnings():
+        # Older NumPy only warns when the text cannot be read to its end
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(data, dtype=np.float64, count=count, sep=' ')
+        except DeprecationWarning as e:
+            raise ValueError(str(e))
+
+    # Reading stops after `count` values without looking at the rest, so a
+    # bad last token ('5a') would pass for its numeric prefix
+    last = data.rsplit(None, 1)[-1]
+    try:
+        last_value = float(last)
+    except ValueError:
+        last_value = None
+    if (values.size != count or last_value is None
+            or not (last_value == values[-1] or (math.isnan(last_value) and np.isnan(values[-1])))):
+        raise ValueError(f"Could not convert {last.decode('ascii', 'replace')!r} to a number")
+    return values
+
+
+# ===== FILE-BACKED DATA SOURCES =====
+# A data field starting with '@' refers to a file instead of typed values:
+#   @data.npy          NumPy array (memory-mapped, never copied into RAM)
+#   @data.npy:col2     one column of a 2D .npy array
+#   @raw.f32           headerless binary samples, dtype taken from extension
+#   @table.csv:col3    one column of a CSV file (by number or header name)
+
+# Raw binary extensions and the sample type they hold
+RAW_DTYPES = {
+    '.f32': np.float32, '.f64': np.float64,
+    '.i8': np.int8, '.i16': np.int16, '.i32': np.int32, '.i64': np.int64,
+    '.u8': np.uint8, '.u16': np.uint16, '.u32': np.uint32, '.u64': np.uint64,
+}
+
+TEXT_EXTENSIONS = ('.csv', '.txt', '.tsv')
+
+FILE_EXTENSIONS = ('.npy',) + TEXT_EXTENSIONS + tuple(RAW_DTYPES)
+
+
+def is_file_reference(text):
+    """Check whether a data field refers to a file ('@path')"""
+    return text.strip().startswith('@')
+
+
+def split_file_reference(text):
+    """Split '@path[:column]' into (path, column or None)"""
+    body = text.strip()[1:].strip()
+    path, sep, column = body.rpartition(':')
+    # Only treat the suffix as a column when what precedes it is a data file,
+    # so Windows drive letters (C:\\data.npy) keep working
+    if sep and os.path.splitext(path)[1].lower() in FILE_EXTENSIONS:
+        return os.path.expanduser(path), column.strip()
+    return os.path.expanduser(body), None
+
+
+def column_index(column, header=None):
+    """Resolve 'colN' (1-based), a plain number or a header name to an index"""
+    name = column.lower()
+    if name.startswith('col') and name[3:].isdigit():
+        return int(name[3:]) - 1
+    if name.isdigit():
+        return int(name) - 1
+    if header and column in header:
+        return header.index(column)
+    raise ValueError(f"Unknown column: {column}")
+
+
+def _read_header(path, delimiter):
+    """Return the header names of a text table, or None if it has no header"""
+    with open(path, 'r') as f:
+        first = f.readline()
+    try:
+        parse_numbers(first)
+        return None
+    except ValueError:
+        return [name.strip() for name in first.split(delimiter)]
+
+
+def load_data_file(text):
+    """Load the array behind an '@path[:column]' data field
+
+    Binary formats are memory-mapped read-only, so the returned array is a
+    view onto the file and very large series are never copied into RAM.
+    """
+    path, column = split_file_reference(text)
+    if not os.path.isfile(path):
+        raise ValueError(f"Data file not found: {path}")
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.npy':
+        data = np.load(path, mmap_mode='r')
+        if column is not None:
+            if data.ndim != 2:
+                raise ValueError(f"Column selection needs a 2D array: {path}")
+            data = data[:, column_index(column)]
+        return data
+
+    if ext in RAW_DTYPES:
+        if column is not None:
+            raise ValueError(f"Raw binary files have no columns: {path}")
+        return np.memmap(path, dtype=RAW_DTYPES[ext], mode='r')
+
+    if ext in TEXT_EXTENSIONS:
+        delimiter = '\t' if ext == '.tsv' else ','
+        header = _read_header(path, delimiter)
+        index = column_index(column, header) if column is not None else 0
+        return np.loadtxt(path, delimiter=delimiter, usecols=index, ndmin=1,
+                          skiprows=1 if header else 0, dtype=np.float64)
+
+    raise ValueError(f"Unsupported data file type: {ext or path}")
+
+
+# ===== STREAMING CSV INGEST =====
+
+# Bytes read from disk per chunk when streaming a CSV file
+CSV_CHUNK_BYTES = 4 << 20
+
+
+class ColumnBuffer:
+    """Growable columnar float64 buffer filled chunk by chunk
+
+    Each column is stored contiguously. Appends may happen on a worker thread
+    while another thread reads columns(); the views it returns stay valid
+    because growing replaces the storage instead of resizing it in place.
+    """
+
+    def __init__(self, n_columns, capacity=0):
+        self.lock = threading.Lock()
+        self._data = np.empty((n_columns, capacity), dtype=np.float64)
+        self.size = 0
+
+    @property
+    def capacity(self):
+        return self._data.shape[1]
+
+    def reserve(self, capacity):
+        """Make room for at least `capacity` rows"""
+        with self.lock:
+            self._grow(capacity)
+
+    def _grow(self, capacity):
+        if capacity <= self.capacity:
+            return
+        data = np.empty((self._data.shape[0], capacity), dtype=np.float64)
+        data[:, :self.size] = self._data[:, :self.size]
+        self._data = data
+
+    def append(self, rows):
+        """Append a (rows, columns) block"""
+        n = len(rows)
+        with self.lock:
+            if self.size + n > self.capacity:
+                self._grow(max(self.size + n, int(self.capacity * 1.5)))
+            self._data[:, self.size:self.size + n] = rows.T
+            self.size += n
+
+    def columns(self):
+        """Return views of the filled part of every column"""
+        with self.lock:
+            return [column[:self.size] for column in self._data]
+
+
+def iter_csv_chunks(path, columns, chunk_size=CSV_CHUNK_BYTES):
+    """Yield (rows, bytes_read) while reading a CSV file in fixed-size chunks
+
+    `columns` are column specs as accepted after '@table.csv:' (col3, 3 or a
+    header name). Each yielded block is a (n, len(columns)) float64 array.
+    """
+    delimiter = '\t' if path.lower().endswith('.tsv') else ','
+    header = _read_header(path, delimiter)
+    indices = [column_index(column, header) for column in columns]
+    n_fields = None
+    tail = b''
+
+    lines_read = 0
+    with open(path, 'rb') as f:
+        if header:
+            f.readline()
+            lines_read = 1
+        while True:
+            block = f.read(chunk_size)
+            data = tail + block
+            if block:
+                # Only parse complete lines; the rest waits for the next chunk
+                cut = data.rfind(b'\n') + 1
+                data, tail = data[:cut], data[cut:]
+            if data.strip():
+                if n_fields is None:
+                    first = data.lstrip().split(b'\n', 1)[0]
+                    n_fields = first.count(delimiter.encode()) + 1
+                    if max(indices) >= n_fields or min(indices) < 0:
+                        raise ValueError(f"Column out of range (file has {n_fields})")
+                # Every row must have all its fields: counts that merely add up
+                # would shift values into the wrong rows
+                counts = line_field_counts(data)
+                ragged = np.flatnonzero((counts != 0) & (counts != n_fields))
+                if ragged.size:
+                    line = lines_read + ragged[0] + 1
+                    raise ValueError(f"Line {line} has {counts[ragged[0]]} values, "
+                                     f"expected {n_fields}")
+                lines_read += len(counts)
+                values = parse_numbers(data)
+                yield values.reshape(-1, n_fields)[:, indices], f.tell()
+            if not block:
+                break
+
+
+def stream_csv(path, columns, buffer, cancel=None, progress=None,
+               chunk_size=CSV_CHUNK_BYTES):
+    """Stream CSV columns into a ColumnBuffer
+
+    After the first chunk the buffer is sized from the file length, so peak
+    memory stays close to one chunk plus the final arrays. `progress` is
+    called as progress(bytes_read, file_size, chunks) after every chunk.
+    Returns False if `cancel` (a threading.Event) was set, True otherwise.
+    """
+    file_size = os.path.getsize(path)
+    for chunk, (rows, bytes_read) in enumerate(iter_csv_chunks(path, columns, chunk_size), 1):
+        if cancel is not None and cancel.is_set():
+            return False
+        if chunk == 1 and bytes_read < file_size:
+            estimate = int(len(rows) * file_size / bytes_read * 1.05)
+            buffer.reserve(estimate)
+        buffer.append(rows)
+        if progress:
+            progress(bytes_read, file_size, chunk)
+    return True
+
+
+# Samples per chunk when reading a file-backed data field piece by piece
+FILE_CHUNK_SAMPLES = 1 << 20
+
+
+def iter_file_chunks(text, chunk_size=FILE_CHUNK_SAMPLES):
+    """Yield the data behind an '@path[:column]' field in pieces
+
+    Binary files are sliced from their memory map and text tables are read
+    with iter_csv_chunks, so files of any size pass in bounded memory.
+    2D arrays without a column are read row block by row block.
+    """
+    path, column = split_file_reference(text)
+    if os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS:
+        if not os.path.isfile(path):
+            raise ValueError(f"Data file not found: {path}")
+        for rows, _ in iter_csv_chunks(path, [column or 'col1']):
+            yield rows[:, 0]
+        return
+
+    data = load_data_file(text)
+    step = max(chunk_size // max(data[:1].size, 1), 1)
+    for start in range(0, len(data), step):
+        yield np.asarray(data[start:start + step])
@@ -0,0 +1,694 @@
+"""
+Expression engine for the Professional Graph Generator
+Parses equations and Z formulas once, checks them against a whitelist,
+and caches the compiled code so repeated renders skip parsing entirely
+"""
+
+import ast
+import copy
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+
+# Functions and constants available in every expression
+MATH_NAMESPACE = {
+    'np': np,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'exp': np.exp, 'log': np.log, 'log10': np.log10, 'log2': np.log2,
+    'sqrt': np.sqrt, 'abs': np.abs, 'floor': np.floor, 'ceil': np.ceil,
+    'sign': np.sign, 'where': np.where, 'minimum': np.minimum, 'maximum': np.maximum,
+    'pi': np.pi, 'e': np.e,
+}
+
+
+def _numpy_import(name, *args, **kwargs):
+    """Let NumPy's lazy internal imports (e.g. from X.mean()) run, nothing else"""
+    if name != 'numpy' and not name.startswith('numpy.'):
+        raise ImportError(f"Import of '{name}' is not allowed in expressions")
+    return __import__(name, *args, **kwargs)
+
+
+# Shared globals for eval - no other builtins, so only whitelisted names resolve
+_GLOBALS = dict(MATH_NAMESPACE, __builtins__={'__import__': _numpy_import})
+
+# Syntax allowed in expressions: arithmetic, comparisons, calls and literals
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.keyword, ast.Name, ast.Attribute, ast.Load, ast.Constant,
+    ast.Tuple, ast.List, ast.Subscript, ast.Slice,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.USub, ast.UAdd, ast.Not, ast.Invert, ast.And, ast.Or,
+    ast.BitAnd, ast.BitOr, ast.BitXor,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+# np.<name> that expressions may use: every ufunc plus array creation,
+# reductions and a few helpers. Anything else (file I/O, np.char, np.rec,
+# np.lib...) is rejected, as are the attributes not listed below
+NUMPY_ATTRIBUTES = {name for name in dir(np) if isinstance(getattr(np, name), np.ufunc)} | {
+    'pi', 'e', 'inf', 'nan', 'newaxis', 'random',
+    'array', 'asarray', 'arange', 'linspace', 'logspace', 'geomspace',
+    'zeros', 'ones', 'full', 'empty', 'zeros_like', 'ones_like', 'full_like',
+    'where', 'clip', 'round', 'around', 'abs', 'sinc', 'interp', 'polyval',
+    'sum', 'prod', 'mean', 'median', 'std', 'var', 'min', 'max', 'amin', 'amax',
+    'ptp', 'percentile', 'quantile', 'cumsum', 'cumprod', 'diff', 'gradient',
+    'sort', 'convolve', 'nansum', 'nanmean', 'nanmin', 'nanmax',
+}
+
+# np.random.<name>: the samplers
+RANDOM_ATTRIBUTES = {
+    'rand', 'randn', 'random', 'random_sample', 'randint', 'choice', 'permutation',
+    'standard_normal', 'standard_cauchy', 'standard_exponential', 'standard_t',
+    'normal', 'uniform', 'lognormal', 'exponential', 'poisson', 'chisquare',
+    'weibull', 'pareto', 'rayleigh', 'geometric', 'gamma', 'beta', 'laplace',
+    'logistic', 'gumbel', 'binomial', 'triangular',
+}
+
+# Attributes of arrays (and of anything else an expression produces)
+ARRAY_ATTRIBUTES = {
+    'shape', 'size', 'ndim', 'T', 'real', 'imag', 'conj',
+    'sum', 'prod', 'mean', 'std', 'var', 'min', 'max', 'ptp',
+    'argmin', 'argmax', 'any', 'all', 'cumsum', 'cumprod',
+    'round', 'clip', 'reshape', 'ravel', 'flatten', 'copy',
+}
+
+
+# Block evaluation: elements per block (about 512 KB of float64, so each
+# temporary stays in cache) and the output size where threading kicks in
+BLOCK_ELEMENTS = 1 << 16
+PARALLEL_THRESHOLD = 1 << 20
+
+_pool = None
+
+# Threads evaluate_parallel may use (None: one per CPU)
+_threads = None
+
+
+class CompiledExpression:
+    """A validated expression and the free variable names it uses"""
+
+    def __init__(self, text, code, names, elementwise, random=False):
+        self.text = text
+        self.code = code
+        self.names = names
+        # True when every output element depends only on the same element of
+        # the inputs, so the domain can be split into independent blocks
+        self.elementwise = elementwise
+        # True when it draws np.random samples (differs on every evaluation)
+        self.random = random
+
+    def evaluate(self, **variables):
+        """Evaluate with the given variables (x, X, Y...) in scope"""
+        missing = self.names - variables.keys() - MATH_NAMESPACE.keys()
+        if missing:
+            raise ValueError(f"Unknown name(s): {', '.join(sorted(missing))}")
+        return eval(self.code, _GLOBALS, variables)
+
+
+def _allowed_attributes(node):
+    """Attribute names allowed on the object `node` takes them from"""
+    owner = node.value
+    if isinstance(owner, ast.Name) and owner.id == 'np':
+        return NUMPY_ATTRIBUTES
+    if (isinstance(owner, ast.Attribute) and owner.attr == 'random'
+            and isinstance(owner.value, ast.Name) and owner.value.id == 'np'):
+        return RANDOM_ATTRIBUTES
+    return ARRAY_ATTRIBUTES
+
+
+def _validate(tree):
+    """Reject any syntax or attribute outside the whitelist"""
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"'{type(node).__name__}' is not allowed in expressions")
+        if isinstance(node, ast.Attribute) and node.attr not in _allowed_attributes(node):
+            raise ValueError(f"'{node.attr}' is not allowed in expressions")
+        elif isinstance(node, ast.Name) and node.id.startswith('_'):
+            raise ValueError(f"'{node.id}' is not allowed in expressions")
+
+
+def _is_elementwise(tree):
+    """Check that an expression only uses ufunc-style operations"""
+    calls = {id(node.func): node for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Subscript, ast.Tuple, ast.List, ast.BoolOp, ast.IfExp)):
+            return False
+        if isinstance(node, ast.Attribute):
+            # Only np.<ufunc>(...) or np.pi-style constants keep elements independent
+            if not (isinstance(node.value, ast.Name) and node.value.id == 'np'):
+                return False
+            target = getattr(np, node.attr, None)
+            if id(node) in calls and not isinstance(target, np.ufunc):
+                return False
+        elif isinstance(node, ast.Name) and id(node) in calls:
+            target = MATH_NAMESPACE.get(node.id)
+            # where(condition) returns indices; only where(c, a, b) picks elements
+            call = calls[id(node)]
+            if not (isinstance(target, np.ufunc)
+                    or (target is np.where and len(call.args) == 3 and not call.keywords)):
+                return False
+    return True
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text):
+    """Parse, validate and compile an expression (cached by its text)"""
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    _validate(tree)
+    names = frozenset(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+    code = compile(tree, '<expression>', 'eval')
+    return CompiledExpression(text, code, names, _is_elementwise(tree), _is_random(tree))
+
+
+def evaluate(text, **variables):
+    """Compile (or fetch from cache) and evaluate an expression"""
+    return compile_expression(text).evaluate(**variables)
+
+
+def evaluation_threads():
+    """Threads evaluate_parallel runs blocks on"""
+    return _threads or os.cpu_count() or 1
+
+
+def limit_threads(n):
+    """Run the blocks of evaluate_parallel on at most `n` threads from now on"""
+    global _threads, _pool
+    _threads = n
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _get_pool():
+    """Shared worker pool (NumPy releases the GIL inside ufunc loops)"""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=evaluation_threads(),
+                                   thread_name_prefix='expression')
+    return _pool
+
+
+def evaluate_parallel(text, **variables):
+    """Evaluate an expression over large arrays in cache-sized blocks
+
+    Array variables are broadcast to a common shape and split along their
+    first axis; blocks run on a thread pool and write into one preallocated
+    output, so peak memory stays near a single output array instead of one
+    temporary per operator. Small inputs and expressions that are not
+    elementwise (reductions, indexing, np.random...) are evaluated directly.
+    """
+    expression = compile_expression(text)
+    arrays = {name: value for name, value in variables.items() if isinstance(value, np.ndarray)}
+    if not arrays or not expression.elementwise:
+        return expression.evaluate(**variables)
+
+    shape = np.broadcast_shapes(*(a.shape for a in arrays.values()))
+    size = int(np.prod(shape))
+    if size < PARALLEL_THRESHOLD or len(shape) == 0:
+        return expression.evaluate(**variables)
+
+    arrays = {name: np.broadcast_to(a, shape) for name, a in arrays.items()}
+    row_elements = size // shape[0]
+    rows = max(1, BLOCK_ELEMENTS // max(row_elements, 1))
+
+    def run_block(start):
+        block = dict(variables)
+        block.update((name, a[start:start + rows]) for name, a in arrays.items())
+        return expression.evaluate(**block)
+
+    # The first block decides the output dtype (float, complex, bool...)
+    first = np.asarray(run_block(0))
+    out = np.empty(shape, dtype=first.dtype)
+    out[:rows] = first
+
+    def fill(start):
+        out[start:start + rows] = run_block(start)
+
+    for future in [_get_pool().submit(fill, start) for start in range(rows, shape[0], rows)]:
+        future.result()
+    return out
+
+
+def evaluate_grid(text, x, y):
+    """Evaluate a Z formula of X and Y over the grid np.meshgrid(x, y) would give
+
+    X and Y are passed as broadcast views, so the full-size coordinate grids
+    are never allocated.
+    """
+    shape = (len(y), len(x))
+    X = np.broadcast_to(np.asarray(x, dtype=np.float64)[np.newaxis, :], shape)
+    Y = np.broadcast_to(np.asarray(y, dtype=np.float64)[:, np.newaxis], shape)
+    return evaluate_parallel(text, X=X, Y=Y)
+
+
+# ===== BATCHED EVALUATION =====
+# Several expressions over the same variables (e.g. model variants sharing
+# one x grid) are evaluated together; sub-expressions that appear more than
+# once anywhere in the batch are computed a single time.
+
+_SHAREABLE = (ast.BinOp, ast.UnaryOp, ast.Call)
+
+
+def _is_random(node):
+    """np.random.* calls must run every time they appear"""
+    return any(isinstance(n, ast.Attribute) and _allowed_attributes(n) is RANDOM_ATTRIBUTES
+               for n in ast.walk(node))
+
+
+class _Hoist(ast.NodeTransformer):
+    """Replace shared sub-expressions with references to their cached value"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def visit(self, node):
+        if isinstance(node, _SHAREABLE):
+            name = self.table.get(ast.dump(node))
+            if name:
+                return ast.Name(id=name, ctx=ast.Load())
+        return self.generic_visit(node)
+
+
+def _compile_node(node):
+    return compile(ast.fix_missing_locations(ast.Expression(body=node)), '<expression>', 'eval')
+
+
+class ExpressionBatch:
+    """Several compiled expressions that share common sub-expressions"""
+
+    def __init__(self, texts, shared, codes, names):
+        self.texts = texts
+        self.shared = shared    # [(name, code)] in dependency order
+        self.codes = codes
+        self.names = names
+
+    def evaluate(self, **variables):
+        """Evaluate every expression; returns a list of results"""
+        missing = self.names - variables.keys() - MATH_NAMESPACE.keys()
+        if missing:
+            raise ValueError(f"Unknown name(s): {', '.join(sorted(missing))}")
+        scope = dict(variables)
+        for name, code in self.shared:
+            scope[name] = eval(code, _GLOBALS, scope)
+        return [eval(code, _GLOBALS, scope) for code in self.codes]
+
+
+@lru_cache(maxsize=64)
+def compile_batch(texts):
+    """Compile a tuple of expressions into one ExpressionBatch (cached)"""
+    names = frozenset().union(*(compile_expression(t).names for t in texts))
+    trees = [ast.parse(t.strip(), mode='eval').body for t in texts]
+
+    counts = {}
+    for tree in trees:
+        for node in ast.walk(tree):
+            if isinstance(node, _SHAREABLE) and not _is_random(node):
+                key = ast.dump(node)
+                counts[key] = counts.get(key, 0) + 1
+
+    # Smaller sub-expressions first, so larger ones can reuse them
+    repeated = sorted((key for key, n in counts.items() if n > 1), key=len)
+    table = {key: f'_shared{i}' for i, key in enumerate(repeated)}
+    hoist = _Hoist(table)
+
+    definitions = {}
+    for tree in trees:
+        for node in ast.walk(tree):
+            key = ast.dump(node) if isinstance(node, _SHAREABLE) else None
+            if key in table and key not in definitions:
+                definitions[key] = node
+    shared = []
+    for key in repeated:
+        body = _Hoist({k: v for k, v in table.items() if k != key}).visit(
+            copy.deepcopy(definitions[key]))
+        shared.append((table[key], _compile_node(body)))
+
+    codes = [_compile_node(hoist.visit(copy.deepcopy(tree))) for tree in trees]
+    return ExpressionBatch(texts, shared, codes, names)
+
+
+def evaluate_many(texts, **variables):
+    """Evaluate several expressions at once, sharing repeated work"""
+    return compile_batch(tuple(texts)).evaluate(**variables)
+
+
+# ===== ADAPTIVE SAMPLING =====
+
+# Refinement rounds and the smallest interval (relative to the x span)
+ADAPTIVE_MAX_DEPTH = 40
+ADAPTIVE_MIN_WIDTH = 1e-9
+
+
+def adaptive_sample(texts, x_start, x_end, max_points=1000, width_px=800, height_px=600,
+                    tolerance_px=0.5):
+    """Sample y = f(x) densely only where the curve needs it
+
+    Starts from a coarse uniform grid and repeatedly bisects the intervals
+    whose midpoint lies more than `tolerance_px` pixels off the straight
+    segment drawn between its ends, until the curve is exact on screen or
+    `max_points` evaluations are used. Jumps and poles (tan, 1/x, floor)
+    are detected and returned as NaN gaps so the line breaks there.
+
+    `texts` may be one expression or a list sharing one x grid; an interval
+    is then refined when any of the curves needs it.
+
+    Returns (x, y, y_limits). y has one row per expression when a list was
+    given. y_limits is a suggested y view when poles send the curve far
+    outside the range covered by the rest of it, else None.
+    """
+    single = isinstance(texts, str)
+    batch = compile_batch((texts,) if single else tuple(texts))
+
+    def f(x):
+        with np.errstate(all='ignore'):
+            return np.array([np.broadcast_to(np.asarray(y, dtype=np.float64), x.shape)
+                             for y in batch.evaluate(x=x)])
+
+    span = x_end - x_start
+    n_start = int(min(max(max_points // 4, 16), max(width_px // 4, 16), max_points))
+    x = np.linspace(x_start, x_end, max(n_start, 2))
+    y = f(x)
+
+    # Screen scale from the bulk of the coarse curve; poles would swamp a min/max
+    finite = y[np.isfinite(y)]
+    if finite.size:
+        low, high = np.percentile(finite, [2, 98])
+        y_span = (high - low) or max(abs(high), 1.0)
+    else:
+        y_span = 1.0
+    scale_y = height_px / y_span
+    # Parts of the curve far off screen need no accuracy
+    clip = (low - y_span, high + y_span) if finite.size else (-np.inf, np.inf)
+    min_width = abs(span) * ADAPTIVE_MIN_WIDTH
+
+    active = np.ones(len(x) - 1, dtype=bool)
+    for _ in range(ADAPTIVE_MAX_DEPTH):
+        budget = max_points - len(x)
+        left = np.flatnonzero(active)
+        left = left[np.abs(x[left + 1] - x[left]) > min_width]
+        if budget <= 0 or left.size == 0:
+            break
+
+        xm = (x[left] + x[left + 1]) / 2
+        ym = f(xm)
+        y0, y1 = y[:, left], y[:, left + 1]
+        with np.errstate(all='ignore'):
+            error = np.abs(np.clip(ym, *clip) - (np.clip(y0, *clip) + np.clip(y1, *clip)) / 2)
+            error *= scale_y
+        # Partly undefined intervals (domain edges, poles) always need a closer
+        # look; entirely undefined ones (sqrt of negatives) never do
+        n_finite = np.isfinite(y0).astype(int) + np.isfinite(y1) + np.isfinite(ym)
+        error[(n_finite > 0) & (n_finite < 3)] = np.inf
+        error[n_finite == 0] = 0
+        error = error.max(axis=0)
+
+        refine = np.flatnonzero(error > tolerance_px)
+        if refine.size == 0:
+            break
+        if refine.size > budget:
+            # Spend the remaining budget on the worst intervals; errors beyond
+            # the view height all count the same so one pole cannot take it all
+            priority = np.minimum(error[refine], height_px)
+            refine = refine[np.argpartition(-priority, budget - 1)[:budget]]
+            refine.sort()
+
+        chosen = left[refine]
+        x = np.insert(x, chosen + 1, xm[refine])
+        y = np.insert(y, chosen + 1, ym[:, refine], axis=1)
+        # Only the two halves of each bisected interval are tested next round
+        new = chosen + 1 + np.arange(len(chosen))
+        active = np.zeros(len(x) - 1, dtype=bool)
+        active[new - 1] = True
+        active[new] = True
+
+    x, y = _break_discontinuities(f, x, y, scale_y, clip, height_px, min_width, tolerance_px)
+
+    y_limits = None
+    if finite.size:
+        margin = 0.1 * y_span
+        view = (low - margin, high + margin)
+        if np.nanmin(y) < view[0] - y_span or np.nanmax(y) > view[1] + y_span:
+            y_limits = view
+    return x, (y[0] if single else y), y_limits
+
+
+def _break_discontinuities(f, x, y, scale_y, clip, height_px, min_width, tolerance_px):
+    """Insert NaN gaps where a sampled curve jumps instead of rising steeply"""
+    y[~np.isfinite(y)] = np.nan
+    with np.errstate(invalid='ignore'):
+        jump = np.abs(np.diff(np.clip(y, *clip), axis=1)) * scale_y
+    width = np.diff(x)
+
+    # Refined down to the minimum width and still jumping: a step or a pole
+    breaks = (width <= 2 * min_width) & (jump > tolerance_px)
+
+    # Jumps taller than the view whose midpoint overshoots both ends: a pole
+    # that the point budget did not allow refining all the way
+    curve, tall = np.nonzero((jump > height_px) & ~breaks)
+    if tall.size:
+        ym = f((x[tall] + x[tall + 1]) / 2)[curve, np.arange(len(tall))]
+        low = np.minimum(y[curve, tall], y[curve, tall + 1])
+        high = np.maximum(y[curve, tall], y[curve, tall + 1])
+        overshoot = ~((ym >= low) & (ym <= high))
+        breaks[curve[overshoot], tall[overshoot]] = True
+
+    # A gap point goes into the shared grid; curves without a break there get
+    # their real value so only the broken curves are interrupted
+    gaps = np.flatnonzero(breaks.any(axis=0))
+    if gaps.size:
+        xm = (x[gaps] + x[gaps + 1]) / 2
+        ym = f(xm)
+        ym[breaks[:, gaps]] = np.nan
+        x = np.insert(x, gaps + 1, xm)
+        y = np.insert(y, gaps + 1, ym, axis=1)
+    return x, y
+
+
+# ===== CHUNKED RANDOM SAMPLES =====
+# 'np.random.randn(10**9) * 2 + 1' describes a billion samples. Consumers
+# that only accumulate (histograms) draw such expressions in fixed-size
+# pieces instead of allocating the whole array.
+
+# Samples drawn per piece
+SAMPLE_CHUNK = 1 << 20
+
+# Position of the `size` argument of common np.random functions (rand and
+# randn take the shape as their only positional arguments instead)
+_SIZE_POSITION = {
+    'random': 0, 'random_sample': 0, 'standard_normal': 0, 'standard_cauchy': 0,
+    'standard_exponential': 0, 'exponential': 1, 'poisson': 1, 'chisquare': 1,
+    'standard_t': 1, 'weibull': 1, 'pareto': 1, 'rayleigh': 1, 'geometric': 1,
+    'normal': 2, 'uniform': 2, 'lognormal': 2, 'gamma': 2, 'beta': 2, 'laplace': 2,
+    'logistic': 2, 'gumbel': 2, 'binomial': 2, 'randint': 2, 'triangular': 3,
+}
+
+
+def _random_function(node):
+    """Name of an np.random.<name>(...) call, or None"""
+    func = node.func if isinstance(node, ast.Call) else None
+    if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Attribute) 
+            and func.value.attr == 'random' and isinstance(func.value.value, ast.Name) 
+            and func.value.value.id == 'np'):
+        return func.attr
+    return None
+
+
+def _size_slot(call):
+    """(container, key) holding the sample count argument of a random call"""
+    name = _random_function(call)
+    if name in ('rand', 'randn'):
+        return (call.args, 0) if len(call.args) == 1 and not call.keywords else None
+    for keyword in call.keywords:
+        if keyword.arg == 'size':
+            return keyword, 'value'
+    position = _SIZE_POSITION.get(name)
+    if position is not None and len(call.args) > position:
+        return call.args, position
+    return None
+
+
+def sample_chunks(text, chunk_size=SAMPLE_CHUNK):
+    """Draw a random-sample expression in pieces of `chunk_size` samples
+
+    Works for expressions with a single np.random call of constant 1D size
+    and only element-by-element operations around it, such as
+    'np.random.randn(10**9) * 2 + 1'. Returns an iterator of float64 arrays,
+    or None when the expression cannot be split (evaluate it whole then).
+    """
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+        _validate(tree)
+    except (SyntaxError, ValueError):
+        return None
+    calls = [node for node in ast.walk(tree) if isinstance(node, ast.Call) and _is_random(node.func)]
+    free = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)} - MATH_NAMESPACE.keys()
+    if len(calls) != 1 or free or _random_function(calls[0]) is None:
+        return None
+    slot = _size_slot(calls[0])
+    if slot is None:
+        return None
+    container, key = slot
+    size_node = container[key] if isinstance(container, list) else getattr(container, key)
+    try:
+        size = eval(_compile_node(size_node), _GLOBALS, {})
+    except Exception:
+        return None
+    if not isinstance(size, (int, np.integer)) or size < 0:
+        return None
+
+    # Everything around the random call must work element by element
+    placeholder = ast.Name(id='_size', ctx=ast.Load())
+    if isinstance(container, list):
+        container[key] = placeholder
+    else:
+        setattr(container, key, placeholder)
+    draw = _compile_node(tree.body)
+    outer = _Hoist({ast.dump(calls[0]): '_samples'}).visit(copy.deepcopy(tree))
+    if not _is_elementwise(outer):
+        return None
+
+    def chunks():
+        for start in range(0, int(size), chunk_size):
+            n = min(chunk_size, int(size) - start)
+            yield np.asarray(eval(draw, _GLOBALS, {'_size': n}), dtype=np.float64)
+    return chunks()
+
+
+# ===== SIZE ESTIMATES =====
+# How many elements the arrays created inside an expression hold, read
+# from the constant size arguments of its calls without evaluating
+# anything, so a typo such as 'np.random.randn(10**10)' can be refused
+# before it exhausts memory.
+
+# NumPy constructors: name of the count/shape argument and its position
+_COUNT_ARGUMENT = {
+    'zeros': ('shape', 0), 'ones': ('shape', 0), 'empty': ('shape', 0), 
+    'full': ('shape', 0), 'linspace': ('num', 2), 'logspace': ('num', 2), 
+    'geomspace': ('num', 2),
+}
+
+# Count used by constructors whose count argument was left out
+_COUNT_DEFAULT = {'linspace': 50, 'logspace': 50, 'geomspace': 50}
+
+_FOLD_OPERATORS = {
+    ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b, ast.Div: lambda a, b: a / b,
+    ast.FloorDiv: lambda a, b: a // b, ast.Mod: lambda a, b: a % b,
+    ast.Pow: lambda a, b: a ** b,
+}
+
+
+def _constant(node):
+    """Value of constant arithmetic as a float (a list for shapes), or None
+
+    Folded in floating point, so '10**10**10' overflows to inf instead of
+    computing a ten-billion-digit integer.
+    """
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return None
+    if isinstance(node, (ast.Tuple, ast.List)):
+        values = [_constant(element) for element in node.elts]
+        if any(value is None or isinstance(value, list) for value in values):
+            return None
+        return values
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant(node.operand)
+        if value is None or isinstance(value, list):
+            return None
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in _FOLD_OPERATORS:
+        left, right = _constant(node.left), _constant(node.right)
+        if left is None or right is None or isinstance(left, list) or isinstance(right, list):
+            return None
+        try:
+            return float(_FOLD_OPERATORS[type(node.op)](left, right))
+        except OverflowError:
+            return float('inf')
+        except (ZeroDivisionError, ValueError):
+            return None
+    return None
+
+
+def _elements(shape):
+    """Element count of a folded size or shape"""
+    if isinstance(shape, list):
+        count = 1.0
+        for size in shape:
+            count *= max(size, 0.0)
+        return count
+    return max(shape, 0.0)
+
+
+def _argument(call, name, position):
+    """The node passed as argument `name` (or at `position`), or None"""
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    if len(call.args) > position:
+        return call.args[position]
+    return None
+
+
+def _call_elements(call):
+    """Elements of the array a call creates, or None when unknown"""
+    random_name = _random_function(call)
+    if random_name in ('rand', 'randn'):
+        dims = [_constant(arg) for arg in call.args]
+        if any(dim is None or isinstance(dim, list) for dim in dims):
+            return None
+        return _elements(dims)
+    if random_name is not None:
+        slot = _size_slot(call)
+        if slot is None:
+            return None
+        container, key = slot
+        node = container[key] if isinstance(container, list) else getattr(container, key)
+        size = _constant(node)
+        return None if size is None else _elements(size)
+
+    func = call.func
+    if not (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) 
+            and func.value.id == 'np'):
+        return None
+    if func.attr == 'arange':
+        args = [_constant(arg) for arg in call.args]
+        if not args or len(args) > 3 or any(a is None or isinstance(a, list) for a in args):
+            return None
+        start, stop, step = (0.0, args[0], 1.0) if len(args) == 1 else (args + [1.0])[:3]
+        if step == 0:
+            return None
+        count = (stop - start) / step
+        return max(math.ceil(count), 0) if math.isfinite(count) else float('inf')
+    if func.attr in _COUNT_ARGUMENT:
+        node = _argument(call, *_COUNT_ARGUMENT[func.attr])
+        if node is None:
+            return _COUNT_DEFAULT.get(func.attr)
+        count = _constant(node)
+        return None if count is None else _elements(count)
+    return None
+
+
+def estimate_elements(text):
+    """Largest array created by a call in an expression (element count)
+
+    Only constant sizes are understood (np.random.randn(10**9),
+    np.zeros((1000, 1000)), np.arange(0, 1e9, 0.5)...); returns None when
+    the expression creates no array of known size.
+    """
+    try:
+        tree = ast.parse(text.strip(), mode='eval')
+    except SyntaxError:
+        return None
+    counts = [_call_elements(node) for node in ast.walk(tree) if isinstance(node, ast.Call)]
+    counts = [count for count in counts if count is not None]
+    return max(counts) if counts else None
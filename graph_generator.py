@@ -10,10 +10,62 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 from matplotlib import cm
+import argparse
 import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from graph_data import split_file_reference, ColumnBuffer, stream_csv
+from graph_lod import (DECIMATION_MODES, DENSITY_THRESHOLD, HISTOGRAM_RULES, PYRAMID_REDUCTIONS,
+                       decimate_line)
+from graph_render import EXPORT_DPI, MODE_STYLES, LayoutCache, use_style
+from graph_core import GraphSpec, draw_graph, get_memory_budget, update_graph
+from graph_cache import RenderCache, ExportCache, content_key, export_key, held_bytes
+from graph_worker import RenderWorker
+from graph_trace import EventLog, RenderTrace, stage, start_memory_tracing, summary, tracing
+from graph_memory import MEMORY_BUDGET_MB, check_values
+from graph_sandbox import (CPU_SECONDS, WALL_GRACE, ExpressionSandbox, install,
+                           sandbox_limits, sandboxed)
+from graph_live import LIVE_CAPACITIES, LIVE_CAPACITY, LIVE_FPS, LivePlot, LiveStream
+
+# Streaming CSV ingest: redraw the preview every N chunks, poll every N ms
+STREAM_REDRAW_CHUNKS = 4
+STREAM_POLL_MS = 50
+
+# Live streams: how often the sample count and rate under the button update
+LIVE_STATUS_SECONDS = 0.5
+
+# How often the GUI checks the render worker for finished figures
+RENDER_POLL_MS = 30
+
+# Where exported files are cached when "Cache Exported Files" is on
+EXPORT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'professional-graph-generator')
+
+# Live preview: settings that only restyle the artists or move the axes.
+# Any other change needs new data or a new figure structure
+STYLE_SETTINGS = {'color', 'custom_color', 'line_width', 'marker', 'marker_size', 
+                  'line_style', 'alpha', 'title', 'xlabel', 'ylabel', 'zlabel', 
+                  'font_size', 'edge_color', 'edge_width', 'colormap', 'antialiased'}
+AXIS_SETTINGS = {'auto_range', 'x_min', 'x_max', 'y_min', 'y_max', 'z_min', 'z_max'}
+
+# Settings that never trigger a live preview (equation plotter, streaming, UI)
+LIVE_PREVIEW_IGNORED = {'live_preview', 'beginner_mode', 'stream_columns', 'equation', 
+                        'eq_x_start', 'eq_x_end', 'eq_points', 'eq_adaptive', 
+                        'show_quadrants', 'cache_exports', 'show_timings', 'isolated_render', 
+                        'live_source', 'live_capacity'}
+
+# Debounce window per kind of change (ms): sliders restyle almost at once,
+# typed data waits for a pause in typing
+LIVE_PREVIEW_DELAYS = {'style': 40, 'axis': 120, 'data': 400}
 
 class GraphGenerator:
-    def __init__(self, root):
+    def __init__(self, root, event_log=None):
         self.root = root
         self.root.title("Professional Graph Generator")
         self.root.geometry("1600x950")
@@ -159,6 +211,62 @@ class GraphGenerator:
         ttk.Label(scrollable_frame, text="Tip: Use example data to get started quickly!", 
                  font=('Arial', 9, 'italic'), foreground='gray').pack(pady=2)
         
+        # Streaming CSV ingest for large log files
+        stream_frame = ttk.LabelFrame(scrollable_frame, text="Large CSV Files", padding=5)
+        stream_frame.pack(fill='x', padx=20, pady=5)
+        
+        stream_cols_frame = ttk.Frame(stream_frame)
+        stream_cols_frame.pack(fill='x')
+        ttk.Label(stream_cols_frame, text="Columns (X, Y):").pack(side=tk.LEFT)
+        self.stream_columns = tk.StringVar(value="1, 2")
+        ttk.Entry(stream_cols_frame, textvariable=self.stream_columns, width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Label(stream_cols_frame, text="numbers or header names", font=('Arial', 8, 'italic'), 
+                 foreground='gray').pack(side=tk.LEFT)
+        
+        stream_btn_frame = ttk.Frame(stream_frame)
+        stream_btn_frame.pack(fill='x', pady=2)
+        ttk.Button(stream_btn_frame, text="📂 Stream CSV File", 
+                  command=self.stream_csv_file).pack(side=tk.LEFT, fill='x', expand=True)
+        self.stream_cancel_btn = ttk.Button(stream_btn_frame, text="Cancel", 
+                                            command=self.cancel_stream, state='disabled')
+        self.stream_cancel_btn.pack(side=tk.LEFT, padx=2)
+        
+        self.stream_progress = ttk.Progressbar(stream_frame, mode='determinate', maximum=100)
+        self.stream_progress.pack(fill='x', pady=2)
+        self.stream_status = ttk.Label(stream_frame, text="", font=('Arial', 8, 'italic'), 
+                                       foreground='gray')
+        self.stream_status.pack(anchor=tk.W)
+
+        # Live telemetry: newest samples of a stream, redrawn at a fixed rate
+        live_frame = ttk.LabelFrame(scrollable_frame, text="Live Stream", padding=5)
+        live_frame.pack(fill='x', padx=20, pady=5)
+
+        live_source_frame = ttk.Frame(live_frame)
+        live_source_frame.pack(fill='x')
+        ttk.Label(live_source_frame, text="Source:").pack(side=tk.LEFT)
+        self.live_source = tk.StringVar(value="udp:5555")
+        ttk.Entry(live_source_frame, textvariable=self.live_source, width=16).pack(side=tk.LEFT, padx=5)
+        ttk.Button(live_source_frame, text="?", width=2,
+                  command=lambda: self.show_help("Live Stream")).pack(side=tk.LEFT)
+
+        live_capacity_frame = ttk.Frame(live_frame)
+        live_capacity_frame.pack(fill='x', pady=2)
+        ttk.Label(live_capacity_frame, text="Samples Kept:").pack(side=tk.LEFT)
+        self.live_capacity = tk.StringVar(value=str(LIVE_CAPACITY))
+        ttk.Combobox(live_capacity_frame, textvariable=self.live_capacity,
+                    values=LIVE_CAPACITIES, width=10).pack(side=tk.LEFT, padx=5)
+
+        live_btn_frame = ttk.Frame(live_frame)
+        live_btn_frame.pack(fill='x', pady=2)
+        ttk.Button(live_btn_frame, text="📡 Start Live Stream",
+                  command=self.start_live_stream).pack(side=tk.LEFT, fill='x', expand=True)
+        self.live_stop_btn = ttk.Button(live_btn_frame, text="Stop",
+                                        command=self.stop_live_stream, state='disabled')
+        self.live_stop_btn.pack(side=tk.LEFT, padx=2)
+        self.live_status = ttk.Label(live_frame, text="Columns (X, Y) as for CSV files",
+                                     font=('Arial', 8, 'italic'), foreground='gray')
+        self.live_status.pack(anchor=tk.W)
+
         # ===== APPEARANCE =====
         ttk.Separator(scrollable_frame, orient='horizontal').pack(fill='x', pady=10)
         self.appearance_label = ttk.Label(scrollable_frame, text="Appearance", 
@@ -391,6 +499,61 @@ class GraphGenerator:
         ttk.Combobox(cmap_frame, textvariable=self.colormap, values=colormaps, 
                     width=12).pack(side=tk.LEFT, padx=5)
         
+        # Downsampling for very long lines
+        decimate_frame = ttk.Frame(scrollable_frame)
+        decimate_frame.pack(fill='x', padx=20, pady=5)
+        ttk.Label(decimate_frame, text="Line Downsampling:").pack(side=tk.LEFT)
+        self.decimation = tk.StringVar(value="min/max")
+        ttk.Combobox(decimate_frame, textvariable=self.decimation, values=DECIMATION_MODES, 
+                    width=10, state='readonly').pack(side=tk.LEFT, padx=5)
+        ttk.Button(decimate_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Line Downsampling")).pack(side=tk.LEFT)
+        
+        # Density rendering for scatter plots with very many points
+        density_frame = ttk.Frame(scrollable_frame)
+        density_frame.pack(fill='x', padx=20, pady=5)
+        ttk.Label(density_frame, text="Scatter Density Above:").pack(side=tk.LEFT)
+        self.density_threshold = tk.StringVar(value=str(DENSITY_THRESHOLD))
+        ttk.Entry(density_frame, textvariable=self.density_threshold, width=9).pack(side=tk.LEFT, padx=5)
+        self.density_log = tk.BooleanVar(value=True)
+        ttk.Checkbutton(density_frame, text="Log", 
+                       variable=self.density_log).pack(side=tk.LEFT)
+        ttk.Button(density_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Scatter Density")).pack(side=tk.LEFT, padx=5)
+        
+        # Heatmap pyramid: how cells are combined when zoomed out
+        pyramid_frame = ttk.Frame(scrollable_frame)
+        pyramid_frame.pack(fill='x', padx=20, pady=5)
+        ttk.Label(pyramid_frame, text="Heatmap Zoomed Out:").pack(side=tk.LEFT)
+        self.heatmap_reduction = tk.StringVar(value="mean")
+        ttk.Combobox(pyramid_frame, textvariable=self.heatmap_reduction, 
+                    values=list(PYRAMID_REDUCTIONS), width=8, 
+                    state="readonly").pack(side=tk.LEFT, padx=5)
+        ttk.Button(pyramid_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Heatmap Pyramid")).pack(side=tk.LEFT, padx=5)
+        
+        # Histogram bins: a count or an automatic rule
+        hist_frame = ttk.Frame(scrollable_frame)
+        hist_frame.pack(fill='x', padx=20, pady=5)
+        ttk.Label(hist_frame, text="Histogram Bins:").pack(side=tk.LEFT)
+        self.hist_bins = tk.StringVar(value="20")
+        ttk.Combobox(hist_frame, textvariable=self.hist_bins, 
+                    values=["10", "20", "50", "100"] + HISTOGRAM_RULES, 
+                    width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Button(hist_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Histogram Bins")).pack(side=tk.LEFT, padx=5)
+        
+        # Memory budget: bigger data is refused, bigger Z grids thinned out
+        memory_frame = ttk.Frame(scrollable_frame)
+        memory_frame.pack(fill='x', padx=20, pady=5)
+        ttk.Label(memory_frame, text="Memory Budget (MB):").pack(side=tk.LEFT)
+        self.memory_budget = tk.StringVar(value=str(MEMORY_BUDGET_MB))
+        ttk.Combobox(memory_frame, textvariable=self.memory_budget, 
+                    values=["512", "1024", "2048", "4096", "8192"], 
+                    width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Button(memory_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Memory Budget")).pack(side=tk.LEFT, padx=5)
+        
         # Tight layout
         self.tight_layout = tk.BooleanVar(value=True)
         ttk.Checkbutton(scrollable_frame, text="Optimize Layout (Recommended)", 
@@ -455,10 +618,55 @@ class GraphGenerator:
                   command=self.generate_graph)
         generate_btn.pack(fill='x', pady=5)
         
+        # Abandon a slow render and kill the expression it is evaluating
+        stop_frame = ttk.Frame(button_frame)
+        stop_frame.pack(fill='x', pady=2)
+        ttk.Button(stop_frame, text="⛔ Stop Rendering", 
+                  command=self.stop_render).pack(side=tk.LEFT, fill='x', expand=True)
+        ttk.Button(stop_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Stop Rendering")).pack(side=tk.LEFT, padx=5)
+        
+        # Draw whole graphs in the sandbox process, not just their expressions
+        self.isolated_render = tk.BooleanVar(value=False)
+        isolated_frame = ttk.Frame(button_frame)
+        isolated_frame.pack(fill='x', pady=2)
+        ttk.Checkbutton(isolated_frame, text="🛡 Render in Separate Process", 
+                       variable=self.isolated_render).pack(side=tk.LEFT)
+        ttk.Button(isolated_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Separate Process")).pack(side=tk.LEFT, padx=5)
+        
+        # Live preview: re-render automatically when a setting changes
+        self.live_preview = tk.BooleanVar(value=False)
+        live_frame = ttk.Frame(button_frame)
+        live_frame.pack(fill='x', pady=2)
+        ttk.Checkbutton(live_frame, text="⚡ Live Preview", variable=self.live_preview, 
+                       command=self.toggle_live_preview).pack(side=tk.LEFT)
+        ttk.Button(live_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Live Preview")).pack(side=tk.LEFT, padx=5)
+        
         save_btn = ttk.Button(button_frame, text="💾 Save Graph", 
                   command=self.save_graph)
         save_btn.pack(fill='x', pady=5)
         
+        # Keep exported files on disk so saving the same graph again is a copy
+        self.cache_exports = tk.BooleanVar(value=False)
+        cache_frame = ttk.Frame(button_frame)
+        cache_frame.pack(fill='x', pady=2)
+        ttk.Checkbutton(cache_frame, text="🗄️ Cache Exported Files", 
+                       variable=self.cache_exports).pack(side=tk.LEFT)
+        ttk.Button(cache_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Render Cache")).pack(side=tk.LEFT, padx=5)
+        
+        # Timing overlay: how long each stage of the last render took
+        self.show_timings = tk.BooleanVar(value=False)
+        timings_frame = ttk.Frame(button_frame)
+        timings_frame.pack(fill='x', pady=2)
+        ttk.Checkbutton(timings_frame, text="⏱ Show Render Timings", 
+                       variable=self.show_timings, 
+                       command=self.toggle_timings).pack(side=tk.LEFT)
+        ttk.Button(timings_frame, text="?", width=2, 
+                  command=lambda: self.show_help("Render Timings")).pack(side=tk.LEFT, padx=5)
+        
         clear_btn = ttk.Button(button_frame, text="🗑️ Clear", 
                   command=self.clear_graph)
         clear_btn.pack(fill='x', pady=5)
@@ -525,9 +733,18 @@ class GraphGenerator:
         self.eq_x_end = tk.StringVar(value="10")
         ttk.Entry(range_frame, textvariable=self.eq_x_end, width=8).pack(side=tk.LEFT, padx=2)
         ttk.Label(range_frame, text="Points:").pack(side=tk.LEFT, padx=(5,2))
-        self.eq_points = tk.StringVar(value="200")
+        self.eq_points = tk.StringVar(value="1000")
         ttk.Entry(range_frame, textvariable=self.eq_points, width=8).pack(side=tk.LEFT, padx=2)
         
+        # Adaptive sampling
+        adaptive_frame = ttk.Frame(scrollable_frame)
+        adaptive_frame.pack(fill='x', padx=20, pady=2)
+        self.eq_adaptive = tk.BooleanVar(value=True)
+        ttk.Checkbutton(adaptive_frame, text="Adaptive Sampling", 
+                       variable=self.eq_adaptive).pack(side=tk.LEFT)
+        ttk.Label(adaptive_frame, text="Points = max budget; detail where the curve bends", 
+                 font=('Arial', 8, 'italic'), foreground='gray').pack(side=tk.LEFT, padx=5)
+        
         # Plot equation button
         plot_eq_frame = ttk.Frame(scrollable_frame)
         plot_eq_frame.pack(fill='x', padx=20, pady=5)
@@ -547,7 +764,8 @@ class GraphGenerator:
 • sin(x) + cos(2*x)  (Wave combination)
 • exp(-x**2/10) * sin(x)  (Damped wave)
 • x**3 - 3*x  (Cubic)
-• abs(x)  (Absolute value)"""
+• abs(x)  (Absolute value)
+• sin(x); sin(2*x); sin(3*x)  (Several curves)"""
         ttk.Label(scrollable_frame, text=examples_text, 
                  font=('Courier', 8), foreground='#555').pack(anchor=tk.W, padx=30)
         
@@ -555,10 +773,55 @@ class GraphGenerator:
         ttk.Frame(scrollable_frame, height=30).pack()
         
         # ===== GRAPH DISPLAY AREA =====
+        self.render_status = ttk.Label(right_panel, text="", foreground="gray")
+        self.render_status.pack(side=tk.BOTTOM, fill='x')
+        # Per-stage timings of the last render (shown with "Show Render Timings")
+        self.timing_status = ttk.Label(right_panel, text="", foreground="#2E86AB", 
+                                       font=('Courier', 8))
         self.figure = plt.Figure(figsize=(10, 8), dpi=100)
         self.canvas = FigureCanvasTkAgg(self.figure, right_panel)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # Streaming ingest state
+        self.stream_thread = None
+        self.stream_cancel = threading.Event()
+        self.stream_queue = queue.Queue()
+        self.streamed_data = {}
+        
+        # Live stream state: the reader, the plot it feeds, its style and the
+        # frame timer
+        self.live_stream = None
+        self.live_plot = None
+        self.live_style = None
+        self.live_frame_timer = None
+        
+        # Artists of the last render, reused when only styles change
+        self.render_state = None
+        
+        # Background rendering: figures are built off the Tk thread
+        self.render_worker = RenderWorker()
+        self.render_polling = False
+        self.render_build = None
+        self.layout_cache = LayoutCache()
+        
+        # Expressions run in a separate, limited process so a runaway one
+        # can be killed without freezing the window
+        self.sandbox = ExpressionSandbox()
+        install(self.sandbox)
+        
+        # Render events (stage timings) go to this JSON lines log, if any
+        self.event_log = event_log
+        
+        # Rendered graphs by content, shown again without drawing; the graph
+        # on screen is never in the cache while it can still change
+        self.render_cache = RenderCache()
+        self.export_cache = None
+        
+        # Live preview state: variable traces and the pending debounce timer
+        self.live_traces = []
+        self.live_changes = set()
+        self.live_timer = None
+        
         # Initialize
         self.update_input_fields()
         self.toggle_range_controls()  # Set initial state
@@ -672,7 +935,7 @@ Ready to create beautiful graphs!"""
         
         if mode == "professional":
             # Professional: Clean, elegant, publication-quality
-            self.plot_style.set("seaborn-v0_8")
+            self.plot_style.set(MODE_STYLES["professional"])
             self.line_width.set(2.5)
             self.marker_size.set(7)
             self.font_size.set(13)
@@ -691,7 +954,7 @@ Ready to create beautiful graphs!"""
         
         elif mode == "normal":
             # Normal: Balanced, general-purpose
-            self.plot_style.set("default")
+            self.plot_style.set(MODE_STYLES["normal"])
             self.line_width.set(2.0)
             self.marker_size.set(6)
             self.font_size.set(12)
@@ -710,7 +973,7 @@ Ready to create beautiful graphs!"""
         
         elif mode == "scientific":
             # Scientific: Grid-heavy, precise, academic
-            self.plot_style.set("bmh")
+            self.plot_style.set(MODE_STYLES["scientific"])
             self.line_width.set(1.5)
             self.marker_size.set(5)
             self.font_size.set(11)
@@ -731,7 +994,8 @@ Ready to create beautiful graphs!"""
     def plot_equation(self):
         """Plot mathematical equation from equation area"""
         try:
-            equation = self.equation.get().strip()
+            s = self.snapshot_settings()
+            equation = s.equation.strip()
             if not equation:
                 messagebox.showwarning("No Equation", 
                                      "Please enter an equation to plot!\n\n"
@@ -743,129 +1007,227 @@ Ready to create beautiful graphs!"""
                 return
             
             # Get range
-            x_start = float(self.eq_x_start.get())
-            x_end = float(self.eq_x_end.get())
-            n_points = int(self.eq_points.get())
+            x_start = float(s.eq_x_start)
+            x_end = float(s.eq_x_end)
+            n_points = int(s.eq_points)
             
-            # Generate x values
-            x = np.linspace(x_start, x_end, n_points)
+            # Several equations can be separated by ';' - they share one x grid
+            equations = [eq.strip() for eq in re.split(r'[;\n]', equation) if eq.strip()]
+            check_values(n_points * (len(equations) + 1), "The equation points",
+                         get_memory_budget(s))
             
-            # Evaluate equation
-            # Create safe namespace for eval
-            safe_dict = {
-                'x': x,
-                'np': np,
-                'sin': np.sin,
-                'cos': np.cos,
-                'tan': np.tan,
-                'exp': np.exp,
-                'log': np.log,
-                'log10': np.log10,
-                'sqrt': np.sqrt,
-                'abs': np.abs,
-                'pi': np.pi,
-                'e': np.e
-            }
+            key = self.equation_structure_key(s, equations, x_start, x_end, n_points)
+            trace = RenderTrace('plot_equation', curves=len(equations))
             
-            y = eval(equation, {"__builtins__": {}}, safe_dict)
+            def build(figure, job):
+                state = self.draw_equation(figure, job, s, equations, equation, 
+                                           x_start, x_end, n_points)
+                state['key'] = key
+                return state
             
-            # Clear figure and create plot
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            
-            # Apply style
-            plt.style.use(self.plot_style.get())
-            
-            # Get color
-            color = self.color.get()
-            if self.custom_color.get().strip():
-                color = self.custom_color.get().strip()
-            
-            # Plot the equation
-            ax.plot(x, y, color=color, linewidth=self.line_width.get(),
-                   label=f'y = {equation}', antialiased=self.antialiased.get())
-            
-            # Set title and labels
-            font_size = self.font_size.get()
-            ax.set_title(f'y = {equation}', fontsize=font_size+2, fontweight='bold', pad=20)
-            ax.set_xlabel('x', fontsize=font_size, fontweight='medium')
-            ax.set_ylabel('y', fontsize=font_size, fontweight='medium')
+            # Same curves as last time: restyle the existing artists in place
+            # (unless a newer figure is still on its way from the worker)
+            state = self.render_state
+            if state is not None and state['key'] == key and not self.render_worker.busy():
+                with tracing(trace):
+                    self.restyle_equation(s)
+                self.finish_trace(trace, self.figure)
+                self.render_build = (build, s.plot_style)
+                self.equation_plotted(s, equations, equation, x_start, x_end)
+                return
             
-            # Show 4 quadrants if enabled
-            if self.show_quadrants.get():
-                # Add axes through origin
-                ax.axhline(y=0, color='black', linewidth=1.5, alpha=0.7)
-                ax.axvline(x=0, color='black', linewidth=1.5, alpha=0.7)
-                
-                # Make sure we show all quadrants
-                x_max = max(abs(x_start), abs(x_end))
-                y_min, y_max = ax.get_ylim()
-                y_max_abs = max(abs(y_min), abs(y_max))
-                
-                ax.set_xlim(-x_max, x_max)
-                ax.set_ylim(-y_max_abs, y_max_abs)
-                
-                # Add quadrant labels
-                ax.text(0.95, 0.95, 'I', transform=ax.transAxes, 
-                       fontsize=12, alpha=0.5, ha='right', va='top')
-                ax.text(0.05, 0.95, 'II', transform=ax.transAxes,
-                       fontsize=12, alpha=0.5, ha='left', va='top')
-                ax.text(0.05, 0.05, 'III', transform=ax.transAxes,
-                       fontsize=12, alpha=0.5, ha='left', va='bottom')
-                ax.text(0.95, 0.05, 'IV', transform=ax.transAxes,
-                       fontsize=12, alpha=0.5, ha='right', va='bottom')
+            # Otherwise evaluate and draw on the render worker
+            self.submit_render(build, s.plot_style, 
+                               lambda job: self.equation_plotted(s, equations, equation, 
+                                                                 x_start, x_end),
+                               self.equation_failed, trace=trace)
             
-            # Grid
-            mode = self.graph_mode.get()
-            if mode == "scientific":
-                ax.grid(True, alpha=0.4, linestyle='-', linewidth=0.8)
-                ax.minorticks_on()
-                ax.grid(which='minor', alpha=0.2, linestyle=':', linewidth=0.5)
-            elif mode == "professional":
-                ax.grid(True, alpha=0.2, linestyle='--', linewidth=0.5)
+        except Exception as e:
+            self.equation_failed(e)
+    
+    def equation_plotted(self, s, equations, equation, x_start, x_end):
+        """Sync the data fields with a finished equation plot and report it"""
+        # Update data fields for consistency (first curve when there are several)
+        self.x_data.set(f"{x_start}:{x_end}")
+        self.y_data.set(equations[0])
+        self.title.set(self.render_state['title'])
+        self.xlabel.set("x")
+        self.ylabel.set("y")
+        self.graph_type.set("line")
+        # The synced fields describe the equation plot, not a new graph
+        self.cancel_live_preview()
+        
+        messagebox.showinfo("Success! 📈", 
+                          f"Equation plotted successfully!\n\n"
+                          f"Equation: y = {equation}\n"
+                          f"Curves: {len(equations)}\n"
+                          f"Range: [{x_start}, {x_end}]\n"
+                          f"Points: {self.render_state['points']}\n"
+                          f"Quadrants: {'Shown' if s.show_quadrants else 'Hidden'}")
+    
+    def equation_failed(self, e):
+        """Report an equation that could not be plotted"""
+        messagebox.showerror("Error", 
+                             f"Error plotting equation:\n{str(e)}\n\n"
+                             f"Tips:\n"
+                             f"• Use ** for powers (x**2, not x^2)\n"
+                             f"• Use * for multiplication (2*x, not 2x)\n"
+                             f"• Available functions: sin, cos, tan, exp, log, sqrt, abs\n"
+                             f"• Separate several equations with ;\n"
+                             f"• Check your X range values\n"
+                             f"• Make sure equation uses 'x' variable")
+    
+    def equation_structure_key(self, s, equations, x_start, x_end, n_points):
+        """Everything that needs a full redraw of an equation plot when it changes"""
+        return ('equation', tuple(equations), x_start, x_end, n_points, 
+                s.eq_adaptive, s.show_quadrants, s.graph_mode, 
+                s.plot_style, s.show_grid, s.show_legend, 
+                s.tight_layout, s.font_size)
+    
+    def draw_equation(self, figure, job, s, equations, equation, x_start, x_end, n_points):
+        """Evaluate the equations and build the equation plot on `figure`
+        
+        Runs on the render worker; returns the render state for restyling.
+        """
+        y_limits = None
+        with stage('eval', curves=len(equations)) as info, \
+                sandbox_limits(get_memory_budget(s), job.check):
+            if s.eq_adaptive:
+                # Sample densely only where the curves bend or jump on screen
+                width_px, height_px = figure.get_size_inches() * figure.dpi * 0.8
+                x, ys, y_limits = sandboxed('adaptive_sample', equations, x_start, x_end, 
+                                                  max_points=n_points,
+                                                  width_px=width_px, height_px=height_px)
             else:
-                if self.show_grid.get():
-                    ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
+                # Generate x values
+                x = np.linspace(x_start, x_end, n_points)
             
-            # Legend
-            if self.show_legend.get():
-                if mode == "professional":
-                    ax.legend(fontsize=font_size-2, framealpha=0.95, shadow=True, 
-                             fancybox=True, loc='best')
+                # Evaluate equations (compiled once and cached; a single large
+                # range runs in parallel blocks, several share sub-expressions)
+                if len(equations) == 1:
+                    ys = [sandboxed('evaluate_parallel', equations[0], x=x)]
                 else:
-                    ax.legend(fontsize=font_size-2, framealpha=0.9)
-            
-            # Tight layout
-            if self.tight_layout.get():
-                self.figure.tight_layout()
-            
-            # Redraw
-            self.canvas.draw()
-            
-            # Update data fields for consistency
-            self.x_data.set(f"{x_start}:{x_end}")
-            self.y_data.set(equation)
-            self.title.set(f"y = {equation}")
-            self.xlabel.set("x")
-            self.ylabel.set("y")
-            self.graph_type.set("line")
-            
-            messagebox.showinfo("Success! 📈", 
-                              f"Equation plotted successfully!\n\n"
-                              f"Equation: y = {equation}\n"
-                              f"Range: [{x_start}, {x_end}]\n"
-                              f"Points: {n_points}\n"
-                              f"Quadrants: {'Shown' if self.show_quadrants.get() else 'Hidden'}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", 
-                               f"Error plotting equation:\n{str(e)}\n\n"
-                               f"Tips:\n"
-                               f"• Use ** for powers (x**2, not x^2)\n"
-                               f"• Use * for multiplication (2*x, not 2x)\n"
-                               f"• Available functions: sin, cos, tan, exp, log, sqrt, abs\n"
-                               f"• Check your X range values\n"
-                               f"• Make sure equation uses 'x' variable")
+                    ys = sandboxed('evaluate_many', equations, x=x)
+                ys = np.array([np.broadcast_to(np.asarray(y, dtype=np.float64), x.shape)
+                               for y in ys])
+            info['points'] = len(x)
+        
+        job.check()
+        
+        # Create plot
+        ax = figure.add_subplot(111)
+        
+        # Get color
+        color = s.color
+        if s.custom_color.strip():
+            color = s.custom_color.strip()
+        
+        # Plot the equation
+        with stage('artists'):
+            if len(equations) == 1:
+                artist, = ax.plot(x, ys[0], color=color, linewidth=s.line_width,
+                                  label=f'y = {equation}', antialiased=s.antialiased)
+                title = f'y = {equation}'
+            else:
+                # All curves in one collection - a single artist to draw
+                colors = plt.get_cmap(s.colormap)(np.linspace(0, 1, len(equations)))
+                segments = np.stack([np.broadcast_to(x, ys.shape), ys], axis=-1)
+                artist = LineCollection(segments, colors=colors, linewidths=s.line_width,
+                                        antialiaseds=s.antialiased)
+                ax.add_collection(artist)
+                ax.autoscale_view()
+                title = f'{len(equations)} Equations'
+        
+        # Set title and labels
+        font_size = s.font_size
+        ax.set_title(title, fontsize=font_size+2, fontweight='bold', pad=20)
+        ax.set_xlabel('x', fontsize=font_size, fontweight='medium')
+        ax.set_ylabel('y', fontsize=font_size, fontweight='medium')
+        
+        # Keep poles (tan, 1/x) from flattening the rest of the curve
+        if y_limits is not None:
+            ax.set_ylim(*y_limits)
+        
+        # Show 4 quadrants if enabled
+        if s.show_quadrants:
+            # Add axes through origin
+            ax.axhline(y=0, color='black', linewidth=1.5, alpha=0.7)
+            ax.axvline(x=0, color='black', linewidth=1.5, alpha=0.7)
+        
+            # Make sure we show all quadrants
+            x_max = max(abs(x_start), abs(x_end))
+            y_min, y_max = ax.get_ylim()
+            y_max_abs = max(abs(y_min), abs(y_max))
+        
+            ax.set_xlim(-x_max, x_max)
+            ax.set_ylim(-y_max_abs, y_max_abs)
+        
+            # Add quadrant labels
+            ax.text(0.95, 0.95, 'I', transform=ax.transAxes, 
+                   fontsize=12, alpha=0.5, ha='right', va='top')
+            ax.text(0.05, 0.95, 'II', transform=ax.transAxes,
+                   fontsize=12, alpha=0.5, ha='left', va='top')
+            ax.text(0.05, 0.05, 'III', transform=ax.transAxes,
+                   fontsize=12, alpha=0.5, ha='left', va='bottom')
+            ax.text(0.95, 0.05, 'IV', transform=ax.transAxes,
+                   fontsize=12, alpha=0.5, ha='right', va='bottom')
+        
+        # Grid
+        mode = s.graph_mode
+        if mode == "scientific":
+            ax.grid(True, alpha=0.4, linestyle='-', linewidth=0.8)
+            ax.minorticks_on()
+            ax.grid(which='minor', alpha=0.2, linestyle=':', linewidth=0.5)
+        elif mode == "professional":
+            ax.grid(True, alpha=0.2, linestyle='--', linewidth=0.5)
+        else:
+            if s.show_grid:
+                ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
+        
+        # Legend
+        state = {'ax': ax, 'artist': artist, 'title': title, 
+                 'equations': equations, 'points': len(x)}
+        self.add_equation_legend(s, state)
+        
+        # Tight layout
+        if s.tight_layout:
+            with stage('tight_layout') as info:
+                state['layout_saved'] = self.layout_cache.tight_layout(
+                    figure, ('equation', title, s.font_size))
+                info['cached'] = bool(state['layout_saved'])
+        return state
+    
+    def restyle_equation(self, s):
+        """Apply colour/width changes to the current equation plot without rebuilding it"""
+        state = self.render_state
+        artist = state['artist']
+        if isinstance(artist, LineCollection):
+            colors = plt.get_cmap(s.colormap)(np.linspace(0, 1, len(state['equations'])))
+            artist.set_colors(colors)
+        else:
+            artist.set_color(s.custom_color.strip() or s.color)
+        artist.set_linewidth(s.line_width)
+        artist.set_antialiased(s.antialiased)
+        with use_style(s.plot_style):
+            self.add_equation_legend(s, state)
+            with stage('draw'):
+                self.canvas.draw()
+    
+    def add_equation_legend(self, s, state):
+        """(Re)create the equation plot legend from the current artist styles"""
+        if not s.show_legend:
+            return
+        ax, artist = state['ax'], state['artist']
+        handles = None
+        if isinstance(artist, LineCollection):
+            handles = [Line2D([], [], color=c, linewidth=s.line_width, label=f'y = {eq}')
+                       for c, eq in zip(artist.get_colors(), state['equations'])]
+        font_size = s.font_size
+        if s.graph_mode == "professional":
+            ax.legend(handles=handles, fontsize=font_size-2, framealpha=0.95, 
+                     shadow=True, fancybox=True, loc='best')
+        else:
+            ax.legend(handles=handles, fontsize=font_size-2, framealpha=0.9)
     
     def update_input_fields(self):
         """Show/hide Z data field based on graph type"""
@@ -875,237 +1237,582 @@ Ready to create beautiful graphs!"""
         else:
             self.z_frame.pack_forget()
     
-    def parse_data(self, data_str):
-        """Parse data string into numpy array"""
-        data_str = data_str.strip()
-        
-        # Check if it's a range expression
-        if ':' in data_str:
-            parts = data_str.split(':')
-            if len(parts) == 2:
-                return np.linspace(float(parts[0]), float(parts[1]), 100)
-            elif len(parts) == 3:
-                return np.arange(float(parts[0]), float(parts[1]), float(parts[2]))
-        
-        # Check if it's a mathematical expression
-        if any(op in data_str for op in ['sin', 'cos', 'exp', 'log', 'sqrt', 'tan']):
+    def stream_sources(self):
+        """Streamed arrays by file reference, skipping files changed since"""
+        sources = {}
+        for ref, (mtime, array) in self.streamed_data.items():
+            path = split_file_reference(ref)[0]
+            if os.path.isfile(path) and os.path.getmtime(path) == mtime:
+                sources[ref] = array
+        return sources
+    
+    def stream_csv_file(self):
+        """Stream a large CSV file on a background thread with live preview"""
+        path = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt *.tsv"), 
+                      ("All files", "*.*")]
+        )
+        if not path:
+            return
+        
+        columns = [c.strip() for c in self.stream_columns.get().split(',') if c.strip()]
+        if len(columns) not in (1, 2):
+            messagebox.showerror("Error", "Enter one (Y) or two (X, Y) columns, e.g. 1, 2")
+            return
+        
+        # Only one stream at a time - stop the previous one first
+        self.cancel_stream()
+        if self.stream_thread is not None:
+            self.stream_thread.join()
+        
+        self.stream_cancel = threading.Event()
+        self.stream_queue = queue.Queue()
+        self.stream_buffer = ColumnBuffer(len(columns))
+        self.stream_path = path
+        self.stream_column_names = columns
+        self.stream_artist = None
+        
+        def progress(bytes_read, file_size, chunks):
+            self.stream_queue.put(('progress', bytes_read, file_size, chunks))
+        
+        def worker():
             try:
-                x = np.linspace(0, 10, 100)
-                return eval(data_str, {"np": np, "x": x, "sin": np.sin, "cos": np.cos, 
-                                      "exp": np.exp, "log": np.log, "sqrt": np.sqrt, 
-                                      "tan": np.tan})
-            except:
-                pass
-        
-        # Parse as comma-separated values
-        try:
-            return np.array([float(x.strip()) for x in data_str.split(',')])
-        except:
-            raise ValueError(f"Cannot parse data: {data_str}")
+                finished = stream_csv(path, columns, self.stream_buffer, 
+                                      cancel=self.stream_cancel, progress=progress)
+                self.stream_queue.put(('done',) if finished else ('cancelled',))
+            except Exception as e:
+                self.stream_queue.put(('error', str(e)))
+        
+        self.stream_progress['value'] = 0
+        self.stream_status.config(text=f"Reading {os.path.basename(path)}...")
+        self.stream_cancel_btn.config(state='normal')
+        self.stream_thread = threading.Thread(target=worker, daemon=True)
+        self.stream_thread.start()
+        self.root.after(STREAM_POLL_MS, self.poll_stream, self.stream_queue)
     
-    def generate_graph(self):
-        """Generate the graph based on user inputs"""
-        try:
-            # Clear previous plot
-            self.figure.clear()
-            
-            # Apply style
-            plt.style.use(self.plot_style.get())
-            
-            # Parse data
-            x = self.parse_data(self.x_data.get())
-            y = self.parse_data(self.y_data.get())
-            
-            graph_type = self.graph_type.get()
-            mode = self.graph_mode.get()
-            
-            # Get color - check for custom hex color first
-            color = self.color.get()
-            if self.custom_color.get().strip():
-                color = self.custom_color.get().strip()
-            elif color == "custom":
-                color = "#1f77b4"  # Default matplotlib blue
-            
-            # Get marker
-            marker = self.marker.get()
-            if marker == "None":
-                marker = None
-            
-            # Get edge color
-            edge_color = self.edge_color.get()
-            if edge_color == "none":
-                edge_color = None
-            elif edge_color == "same as fill":
-                edge_color = color
-            
-            # Set figure DPI for quality
-            self.figure.set_dpi(self.dpi.get())
-            
-            # Create appropriate plot
-            if graph_type == "line":
-                ax = self.figure.add_subplot(111)
-                ax.plot(x, y, color=color, linewidth=self.line_width.get(), 
-                       marker=marker, markersize=self.marker_size.get(),
-                       linestyle=self.line_style.get(), alpha=self.alpha.get(),
-                       label='Data', antialiased=self.antialiased.get(),
-                       markeredgecolor=edge_color, markeredgewidth=self.edge_width.get())
-            
-            elif graph_type == "scatter":
-                ax = self.figure.add_subplot(111)
-                ax.scatter(x, y, color=color, s=self.marker_size.get()**2, 
-                          alpha=self.alpha.get(), marker=marker if marker else 'o',
-                          label='Data', edgecolors=edge_color, 
-                          linewidths=self.edge_width.get())
-            
-            elif graph_type == "bar":
-                ax = self.figure.add_subplot(111)
-                bars = ax.bar(x, y, color=color, alpha=self.alpha.get(), 
-                      width=self.line_width.get()/5, label='Data',
-                      edgecolor=edge_color, linewidth=self.edge_width.get())
-                
-                # Add shadow effect if enabled
-                if self.add_shadow.get():
-                    for bar in bars:
-                        bar.set_linewidth(self.edge_width.get() + 1)
-                        bar.set_edgecolor('gray')
-            
-            elif graph_type == "histogram":
-                ax = self.figure.add_subplot(111)
-                ax.hist(y, bins=20, color=color, alpha=self.alpha.get(), 
-                       edgecolor=edge_color if edge_color else 'black', 
-                       linewidth=self.edge_width.get())
-            
-            elif graph_type == "3d_surface":
-                z_str = self.z_data.get()
-                if not z_str:
-                    # Generate surface from x, y
-                    X, Y = np.meshgrid(x, y)
-                    Z = np.sin(np.sqrt(X**2 + Y**2))
-                else:
-                    X, Y = np.meshgrid(x, y)
-                    Z = eval(z_str, {"X": X, "Y": Y, "np": np})
-                
-                ax = self.figure.add_subplot(111, projection='3d')
-                surf = ax.plot_surface(X, Y, Z, cmap=self.colormap.get(), 
-                                      linewidth=self.line_width.get()/2,
-                                      alpha=self.alpha.get(),
-                                      antialiased=self.antialiased.get())
-                self.figure.colorbar(surf, ax=ax, shrink=0.5)
-                
-                # Add shadow/projection if enabled
-                if self.add_shadow.get():
-                    ax.contour(X, Y, Z, zdir='z', offset=Z.min(), 
-                              cmap=self.colormap.get(), alpha=0.3, linewidths=1)
-            
-            elif graph_type == "3d_scatter":
-                z_str = self.z_data.get()
-                if z_str:
-                    z = self.parse_data(z_str)
-                else:
-                    z = x + y  # Default
-                
-                ax = self.figure.add_subplot(111, projection='3d')
-                ax.scatter(x, y, z, color=color, s=self.marker_size.get()**2,
-                          alpha=self.alpha.get(), marker=marker if marker else 'o',
-                          edgecolors=edge_color, linewidths=self.edge_width.get())
+    def cancel_stream(self):
+        """Ask the running CSV stream to stop after its current chunk"""
+        self.stream_cancel.set()
+    
+    def poll_stream(self, stream_queue):
+        """Handle progress messages from the streaming worker (Tk thread only)"""
+        if stream_queue is not self.stream_queue:
+            return  # A newer stream has replaced this one
+        
+        redraw = False
+        while True:
+            try:
+                message = self.stream_queue.get_nowait()
+            except queue.Empty:
+                break
             
-            elif graph_type == "contour":
-                X, Y = np.meshgrid(x, y)
-                z_str = self.z_data.get()
-                if z_str:
-                    Z = eval(z_str, {"X": X, "Y": Y, "np": np})
+            kind = message[0]
+            if kind == 'progress':
+                _, bytes_read, file_size, chunks = message
+                self.stream_progress['value'] = 100.0 * bytes_read / max(file_size, 1)
+                self.stream_status.config(
+                    text=f"{self.stream_buffer.size:,} rows ({bytes_read / 1e6:.1f} MB)")
+                if chunks % STREAM_REDRAW_CHUNKS == 0:
+                    redraw = True
+            else:
+                self.stream_cancel_btn.config(state='disabled')
+                if kind == 'done':
+                    self.finish_stream()
+                elif kind == 'cancelled':
+                    self.stream_status.config(
+                        text=f"Cancelled after {self.stream_buffer.size:,} rows")
                 else:
-                    Z = np.sin(np.sqrt(X**2 + Y**2))
-                
+                    self.stream_status.config(text="Failed")
+                    messagebox.showerror("Error", f"Error reading CSV file:\n{message[1]}")
+                return
+        
+        if redraw:
+            self.draw_stream_preview()
+        self.root.after(STREAM_POLL_MS, self.poll_stream, stream_queue)
+    
+    def stream_arrays(self):
+        """Return (x, y) for the rows streamed so far"""
+        columns = self.stream_buffer.columns()
+        if len(columns) == 1:
+            return np.arange(len(columns[0]), dtype=np.float64), columns[0]
+        return columns[0], columns[1]
+    
+    def draw_stream_preview(self):
+        """Draw or update the partial line/scatter plot while streaming"""
+        x, y = self.stream_arrays()
+        if len(x) == 0:
+            return
+        
+        if self.stream_artist is None:
+            self.render_worker.cancel('display')
+            self.figure.clear()
+            self.render_state = None
+            self.render_build = None
+            color = self.custom_color.get().strip() or self.color.get()
+            with use_style(self.plot_style.get()):
                 ax = self.figure.add_subplot(111)
-                contour = ax.contour(X, Y, Z, levels=15, linewidths=self.line_width.get(),
-                                    cmap=self.colormap.get())
-                ax.clabel(contour, inline=True, fontsize=8)
-                self.figure.colorbar(contour, ax=ax)
-            
-            elif graph_type == "heatmap":
-                X, Y = np.meshgrid(x, y)
-                z_str = self.z_data.get()
-                if z_str:
-                    Z = eval(z_str, {"X": X, "Y": Y, "np": np})
+                if self.graph_type.get() == 'scatter':
+                    self.stream_artist = ax.scatter(x, y, color=color, s=4)
                 else:
-                    Z = np.sin(np.sqrt(X**2 + Y**2))
-                
-                ax = self.figure.add_subplot(111)
-                im = ax.imshow(Z, cmap=self.colormap.get(), aspect='auto', 
-                              alpha=self.alpha.get(), interpolation='bilinear')
-                self.figure.colorbar(im, ax=ax)
-            
-            # Set labels and title with custom font size
-            font_size = self.font_size.get()
-            ax.set_title(self.title.get(), fontsize=font_size+2, fontweight='bold', pad=20)
-            ax.set_xlabel(self.xlabel.get(), fontsize=font_size, fontweight='medium')
-            ax.set_ylabel(self.ylabel.get(), fontsize=font_size, fontweight='medium')
-            
-            if graph_type in ['3d_surface', '3d_scatter']:
-                ax.set_zlabel(self.zlabel.get(), fontsize=font_size, fontweight='medium')
-            
-            # Apply axis ranges if manual mode
-            if not self.auto_range.get():
-                try:
-                    if self.x_min.get() and self.x_max.get():
-                        ax.set_xlim(float(self.x_min.get()), float(self.x_max.get()))
-                    if self.y_min.get() and self.y_max.get():
-                        ax.set_ylim(float(self.y_min.get()), float(self.y_max.get()))
-                    if graph_type in ['3d_surface', '3d_scatter']:
-                        if self.z_min.get() and self.z_max.get():
-                            ax.set_zlim(float(self.z_min.get()), float(self.z_max.get()))
-                except ValueError:
-                    pass  # Ignore invalid range values
-            
-            # Apply mode-specific styling
-            if mode == "scientific":
-                # Scientific mode: Enhanced grid
-                if graph_type not in ['heatmap']:
-                    ax.grid(True, alpha=0.4, linestyle='-', linewidth=0.8, which='both')
-                    ax.minorticks_on()
-                    ax.grid(which='minor', alpha=0.2, linestyle=':', linewidth=0.5)
-            elif mode == "professional":
-                # Professional mode: Subtle grid
-                if graph_type not in ['heatmap']:
-                    ax.grid(True, alpha=0.2, linestyle='--', linewidth=0.5)
+                    self.stream_artist, = ax.plot([], [], color=color, linewidth=1)
+        
+        if self.graph_type.get() == 'scatter':
+            self.stream_artist.set_offsets(np.column_stack([x, y]))
+        else:
+            self.stream_artist.set_data(
+                *decimate_line(x, y, self.stream_artist.axes.bbox.width, self.decimation.get()))
+        
+        ax = self.stream_artist.axes
+        ax.set_title(f"Loading {os.path.basename(self.stream_path)} - {len(x):,} rows")
+        ax.relim()
+        ax.autoscale_view()
+        if self.graph_type.get() == 'scatter':
+            # Collections are not covered by relim, so fit the view directly
+            ax.set_xlim(np.nanmin(x), np.nanmax(x))
+            ax.set_ylim(np.nanmin(y), np.nanmax(y))
+        self.canvas.draw_idle()
+    
+    def finish_stream(self):
+        """Hand the streamed columns to the data fields and render the final graph"""
+        x, y = self.stream_arrays()
+        mtime = os.path.getmtime(self.stream_path)
+        
+        # Keep only the latest stream so memory stays bounded to one dataset
+        refs = [f"@{self.stream_path}:{name}" for name in self.stream_column_names]
+        self.streamed_data.clear()
+        for ref, array in zip(refs, self.stream_buffer.columns()):
+            self.streamed_data[ref] = (mtime, array)
+        
+        if len(refs) == 1:
+            self.x_data.set(f"0:{len(y)}:1")
+            self.y_data.set(refs[0])
+        else:
+            self.x_data.set(refs[0])
+            self.y_data.set(refs[1])
+        
+        self.stream_progress['value'] = 100
+        self.stream_status.config(text=f"Loaded {len(y):,} rows")
+        self.generate_graph()
+
+    def start_live_stream(self):
+        """Show the newest samples of a live source, redrawn LIVE_FPS times a second"""
+        columns = [c.strip() for c in self.stream_columns.get().split(',') if c.strip()]
+        source = self.live_source.get().strip()
+        try:
+            capacity = int(self.live_capacity.get())
+            if capacity < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Samples Kept must be a positive whole number")
+            return
+
+        # Only one live stream at a time
+        self.stop_live_stream()
+        try:
+            # Ring buffer plus display buffer, X and Y each
+            check_values(4 * capacity, "The live stream buffers",
+                         get_memory_budget(self.snapshot_settings()))
+            stream = LiveStream(source, columns, capacity)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Error", f"Cannot read live stream:\n{str(e)}")
+            return
+
+        # The live plot replaces whatever is on screen
+        self.cancel_live_preview()
+        self.cancel_stream()
+        self.render_worker.cancel('display')
+        self.figure.clear()
+        self.render_state = None
+        self.render_build = None
+        color = self.custom_color.get().strip() or self.color.get()
+        kind = 'scatter' if self.graph_type.get() == 'scatter' else 'line'
+        style = dict(markersize=2) if kind == 'scatter' else dict(linewidth=1)
+        self.live_style = self.plot_style.get()
+        with use_style(self.live_style):
+            self.live_plot = LivePlot(self.figure, self.canvas, stream.buffer, kind,
+                                      self.decimation.get(), color=color, **style)
+            ax = self.live_plot.ax
+            ax.set_title(self.title.get() or f"Live: {source}")
+            ax.set_xlabel("Sample" if len(columns) == 1 else self.xlabel.get())
+            ax.set_ylabel(self.ylabel.get())
+            ax.grid(True, alpha=0.3)
+
+        self.live_stream = stream
+        self.live_rate = (time.perf_counter(), 0)
+        stream.start()
+        self.live_stop_btn.config(state='normal')
+        self.live_status.config(text=f"Waiting for samples from {source}...")
+        self.live_frame_timer = self.root.after(0, self.draw_live_frame)
+
+    def stop_live_stream(self, status=None):
+        """Stop reading the live stream; its last frame stays on screen"""
+        if self.live_frame_timer is not None:
+            self.root.after_cancel(self.live_frame_timer)
+            self.live_frame_timer = None
+        if self.live_stream is None:
+            return
+        self.live_stream.stop()
+        self.live_plot.close()
+        total = self.live_stream.buffer.total
+        self.live_stream = None
+        self.live_plot = None
+        self.live_stop_btn.config(state='disabled')
+        self.live_status.config(text=status or f"Stopped after {total:,} samples")
+
+    def draw_live_frame(self):
+        """Blit one frame of the live stream and schedule the next (Tk thread only)"""
+        self.live_frame_timer = None
+        stream, plot = self.live_stream, self.live_plot
+        if plot.figure is not self.figure:
+            self.stop_live_stream("Stopped: another graph was drawn")
+            return
+
+        start = time.perf_counter()
+        # Checked first, so the last frame has everything the reader got
+        running = stream.running()
+        # Frames are drawn in the live plot's style; while a render elsewhere
+        # has rcParams, try again on the next tick instead of waiting
+        with use_style(self.live_style, blocking=False) as free:
+            if free:
+                shown = plot.frame()
+        if not free:
+            self.live_frame_timer = self.root.after(int(1000 / LIVE_FPS), self.draw_live_frame)
+            return
+        total = stream.buffer.total
+        if not running:
+            if stream.error is not None:
+                self.stop_live_stream("Failed")
+                messagebox.showerror("Error", f"Error reading live stream:\n{stream.error}")
             else:
-                # Normal mode: Standard grid
-                if self.show_grid.get() and graph_type not in ['heatmap']:
-                    ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.5)
-            
-            # Show axes through origin if enabled
-            if self.show_origin_axes.get() and graph_type not in ['heatmap', '3d_surface', '3d_scatter']:
-                ax.axhline(y=0, color='black', linewidth=1.5, alpha=0.8, zorder=5)
-                ax.axvline(x=0, color='black', linewidth=1.5, alpha=0.8, zorder=5)
-            
-            # Legend
-            if self.show_legend.get() and graph_type in ['line', 'scatter', 'bar']:
-                if mode == "professional":
-                    ax.legend(fontsize=font_size-2, framealpha=0.95, shadow=True, 
-                             fancybox=True, loc='best')
-                else:
-                    ax.legend(fontsize=font_size-2, framealpha=0.9, shadow=False)
-            
-            # Tight layout
-            if self.tight_layout.get():
-                self.figure.tight_layout()
-            
-            # Add mode watermark in corner (optional)
-            if mode == "professional":
-                self.figure.text(0.99, 0.01, '📊 Professional', 
-                               ha='right', va='bottom', fontsize=7, 
-                               alpha=0.3, style='italic')
-            elif mode == "scientific":
-                self.figure.text(0.99, 0.01, '🔬 Scientific', 
-                               ha='right', va='bottom', fontsize=7, 
-                               alpha=0.3, style='italic')
-            
-            # Redraw
-            self.canvas.draw()
-            
+                self.stop_live_stream(f"Stream ended after {total:,} samples")
+            return
+
+        last_time, last_total = self.live_rate
+        if start - last_time >= LIVE_STATUS_SECONDS:
+            rate = (total - last_total) / (start - last_time)
+            text = f"{total:,} samples · {rate:,.0f}/s · {shown:,} shown"
+            if stream.parser.dropped:
+                text += f" · {stream.parser.dropped:,} bad lines"
+            self.live_status.config(text=text)
+            self.live_rate = (start, total)
+
+        # Fixed frame rate: time spent drawing counts towards the interval
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.live_frame_timer = self.root.after(max(int(1000 / LIVE_FPS - elapsed_ms), 1),
+                                                self.draw_live_frame)
+    
+    def generate_graph(self):
+        """Generate the graph based on user inputs"""
+        self.render_graph(self.graph_failed)
+    
+    def render_graph(self, failed, action='generate_graph'):
+        """Update the graph in place when possible, otherwise rebuild it on the
+        render worker; errors are reported through `failed`"""
+        self.cancel_live_preview()
+        trace = RenderTrace(action, graph_type=self.graph_type.get())
+        try:
+            # Same structure as the last render: restyle the existing artists
+            # (unless a newer figure is still on its way from the worker)
+            spec = self.graph_spec()
+            sources = self.stream_sources()
+            content = content_key(spec)
+            if self.isolated_render.get():
+                build = lambda figure, job: self.draw_isolated(figure, job, spec, sources, 
+                                                               content)
+            else:
+                build = lambda figure, job: dict(draw_graph(
+                    figure, spec, job.check, EXPORT_DPI if job.filename else None, 
+                    sources, self.layout_cache), content=content)
+            # Rendered before at this size: show it without drawing
+            if content != (self.render_state or {}).get('content'):
+                with trace.stage('render_cache') as info:
+                    info['hit'] = self.show_cached_graph(content)
+                if info['hit']:
+                    self.finish_trace(trace, self.figure)
+                    return
+            if not self.render_worker.busy():
+                with tracing(trace):
+                    updated = self.update_graph_in_place(spec, sources, content)
+                if updated:
+                    self.finish_trace(trace, self.figure, in_place=True)
+                    self.render_build = (build, spec.plot_style)
+                    return
         except Exception as e:
-            messagebox.showerror("Error", f"Error generating graph:\n{str(e)}")
+            self.finish_trace(trace, error=e)
+            failed(e)
+            return
+        
+        # Otherwise build the whole figure on the render worker
+        self.submit_render(build, spec.plot_style, None, failed, trace=trace)
+    
+    def draw_isolated(self, figure, job, spec, sources, content):
+        """Render `spec` in the sandbox process instead of on this figure
+        
+        The finished pixels come back through shared memory and are shown
+        as they are; exports are written by the sandbox directly. The graph
+        cannot be restyled in place afterwards, so every change re-renders.
+        """
+        size = tuple(figure.get_size_inches())
+        with stage('sandbox_render'), sandbox_limits(get_memory_budget(spec), job.check):
+            if job.filename:
+                notes = sandboxed('render_file', spec, job.filename, size, EXPORT_DPI, sources)
+                job.written = True
+            else:
+                frame, notes = sandboxed('render_frame', spec, size, figure.dpi, sources)
+                # The figure keeps the pixels too, for redraws after a resize
+                figure.figimage(frame, origin='upper')
+                job.frame = frame
+        return {'key': None, 'content': content, 'notes': notes, 'layout_saved': None}
+    
+    def graph_failed(self, e):
+        """Report a graph that could not be generated"""
+        messagebox.showerror("Error", f"Error generating graph:\n{str(e)}")
+    
+    def preview_failed(self, e):
+        """Show live preview errors in the status line instead of a dialog,
+        since half-typed input is expected while the user is editing"""
+        self.render_status.config(text=f"⚠ {e}")
+    
+    def toggle_live_preview(self):
+        """Attach or remove the variable traces that drive the live preview"""
+        if self.live_preview.get():
+            for name, var in vars(self).items():
+                if isinstance(var, tk.Variable) and name not in LIVE_PREVIEW_IGNORED:
+                    trace = var.trace_add('write', 
+                                          lambda *args, name=name: self.setting_changed(name))
+                    self.live_traces.append((var, trace))
+            self.setting_changed('live_preview')
+        else:
+            for var, trace in self.live_traces:
+                var.trace_remove('write', trace)
+            self.live_traces = []
+            self.cancel_live_preview()
+    
+    def setting_changed(self, name):
+        """Collect a changed setting and restart the debounce timer"""
+        self.live_changes.add(name)
+        if self.live_timer is not None:
+            self.root.after_cancel(self.live_timer)
+        delay = LIVE_PREVIEW_DELAYS[self.classify_changes(self.live_changes)]
+        self.live_timer = self.root.after(delay, self.apply_live_changes)
+    
+    def classify_changes(self, names):
+        """Return the cheapest update covering all changed settings:
+        'style', 'axis' or 'data'"""
+        if names <= STYLE_SETTINGS:
+            return 'style'
+        if names <= STYLE_SETTINGS | AXIS_SETTINGS:
+            return 'axis'
+        return 'data'
+    
+    def cancel_live_preview(self):
+        """Drop a pending live preview (an explicit render supersedes it)"""
+        if self.live_timer is not None:
+            self.root.after_cancel(self.live_timer)
+            self.live_timer = None
+        self.live_changes.clear()
+    
+    def apply_live_changes(self):
+        """Render the settings changed during the last debounce window"""
+        self.live_timer = None
+        kind = self.classify_changes(self.live_changes)
+        self.live_changes.clear()
+        state = self.render_state
+        if kind == 'data':
+            # Data or structure changed: rebuild unless the artists can take it
+            self.render_graph(self.preview_failed, 'live_preview')
+        elif state is not None and 'equations' in state:
+            # Equation plots only restyle their curves
+            if kind == 'style' and not self.render_worker.busy():
+                try:
+                    self.restyle_equation(self.snapshot_settings())
+                except Exception as e:
+                    self.preview_failed(e)
+        elif state is not None:
+            # Style and axis changes only touch the existing artists
+            self.render_graph(self.preview_failed, 'live_preview')
+    
+    def update_graph_in_place(self, spec, sources, content=None):
+        """Restyle the artists of the last render without clearing the figure
+        
+        Returns False when the graph structure changed and a full rebuild is
+        needed. Otherwise the canvas is redrawn once and True is returned.
+        """
+        state = self.render_state
+        if state is None:
+            return False
+        # The figure may be half updated if this fails: never cache it then
+        shown, state['content'] = state.get('content'), None
+        if not update_graph(self.figure, state, spec, sources, self.layout_cache):
+            state['content'] = shown
+            return False
+        state['content'] = content
+        self.report_layout_saving(state['layout_saved'], state.get('notes'))
+        with use_style(spec.plot_style), stage('draw'):
+            self.canvas.draw()
+        return True
+    
+    def snapshot_settings(self):
+        """Copy every Tk variable into a plain namespace
+        
+        Tk variables may only be read on the GUI thread, so renders work from
+        this snapshot instead.
+        """
+        return SimpleNamespace(**{name: var.get() for name, var in vars(self).items()
+                                  if isinstance(var, tk.Variable)})
+    
+    def graph_spec(self):
+        """GraphSpec of the current graph controls (read on the GUI thread)"""
+        return GraphSpec(**{name: getattr(self, name).get() for name in GraphSpec._fields})
+    
+    def submit_render(self, build, style, done=None, failed=None, filename=None, trace=None):
+        """Build a figure in plot `style` on the render worker, then show it
+        (or save it to `filename`); a newer render of the same kind cancels this one"""
+        kind = 'export' if filename else 'display'
+        self.render_worker.submit(kind, build, self.figure.get_size_inches(), self.figure.dpi, 
+                                  style, filename, done, failed, trace)
+        self.set_render_busy(True)
+        if not self.render_polling:
+            self.render_polling = True
+            self.root.after(RENDER_POLL_MS, self.poll_render)
+    
+    def poll_render(self):
+        """Pick up finished renders on the GUI thread"""
+        finished = self.render_worker.poll()
+        if self.render_worker.busy():
+            self.root.after(RENDER_POLL_MS, self.poll_render)
+        else:
+            self.render_polling = False
+            self.set_render_busy(False)
+        
+        for job in finished:
+            if job.error is not None:
+                self.finish_trace(job.trace, error=job.error)
+                if job.failed:
+                    job.failed(job.error)
+                continue
+            if job.filename is None:
+                with tracing(job.trace):
+                    self.show_rendered_figure(job)
+            self.finish_trace(job.trace, job.figure)
+            if job.done:
+                job.done(job)
+    
+    def show_rendered_figure(self, job):
+        """Swap a figure rendered by the worker into the Tk canvas"""
+        figure = job.figure
+        size = self.figure.get_size_inches()
+        # The window may have been resized while the job was running
+        resized = tuple(figure.get_size_inches()) != tuple(size)
+        
+        self.cache_shown_graph()
+        figure.set_canvas(self.canvas)
+        self.canvas.figure = figure
+        self.figure = figure
+        self.render_state = job.result
+        self.render_build = (job.build, job.style)
+        self.report_layout_saving(job.result.get('layout_saved'), job.result.get('notes'))
+        
+        if resized:
+            figure.set_size_inches(size, forward=False)
+            with stage('draw', resized=True):
+                self.canvas.draw()
+        else:
+            # Already rasterized: just copy the finished buffer to the screen
+            with stage('blit'):
+                self.canvas.renderer = job.canvas.renderer
+                self.canvas.blit()
+    
+    def render_cache_key(self, content, figure):
+        """Render cache key: the graph content at the figure's size"""
+        return (content,) + tuple(np.round(figure.get_size_inches(), 3))
+    
+    def cache_shown_graph(self):
+        """Keep the graph on screen in the render cache before it is replaced"""
+        state = self.render_state
+        renderer = getattr(self.canvas, 'renderer', None)
+        if not state or not state.get('content') or not hasattr(renderer, 'copy_from_bbox'):
+            return
+        figure = self.figure
+        width, height = self.canvas.get_width_height(physical=True)
+        if (width, height) != (renderer.width, renderer.height):
+            return
+        pixels = renderer.copy_from_bbox(figure.bbox)
+        # The figure keeps its data alive too, not just the pixels
+        nbytes = width * height * 4 + held_bytes(figure, state)
+        self.render_cache.put(self.render_cache_key(state['content'], figure), 
+                              (figure, state, self.render_build, pixels), nbytes)
+    
+    def show_cached_graph(self, content):
+        """Swap a cached rendering of `content` onto the canvas, skipping
+        Matplotlib entirely; returns False on a cache miss"""
+        if content is None:
+            return False
+        key = self.render_cache_key(content, self.figure)
+        if self.render_cache.get(key) is None:
+            return False
+        figure, state, build, pixels = self.render_cache.pop(key)
+        self.render_worker.cancel('display')
+        self.cache_shown_graph()
+        
+        figure.set_canvas(self.canvas)
+        self.canvas.figure = figure
+        self.figure = figure
+        self.render_state = state
+        self.render_build = build
+        # Copy the stored pixels to the screen
+        self.canvas.get_renderer().restore_region(pixels)
+        self.canvas.blit()
+        
+        stats = self.render_cache.stats()
+        self.render_status.config(text=f"Shown from render cache "
+                                       f"({stats['hits']} hits, {stats['misses']} misses)")
+        return True
+    
+    def finish_trace(self, trace, figure=None, error=None, **fields):
+        """Close a render trace: log its event and update the timing overlay"""
+        if trace is None:
+            return
+        event = trace.finish(figure, error, **fields)
+        if self.event_log is not None:
+            self.event_log.write(event)
+        if self.show_timings.get():
+            self.timing_status.config(text=summary(event))
+    
+    def toggle_timings(self):
+        """Show or hide the render timing overlay"""
+        if self.show_timings.get():
+            self.timing_status.pack(side=tk.BOTTOM, fill='x', before=self.render_status)
+            self.timing_status.config(text="⏱ Timings appear after the next render")
+        else:
+            self.timing_status.pack_forget()
+    
+    def report_layout_saving(self, saved, notes=None):
+        """Show in the status line how much time the layout cache saved, and
+        anything the render changed about the graph (e.g. thinned grids)"""
+        parts = [f"⚠ {note}" for note in notes or []]
+        if saved:
+            parts.append(f"Layout reused from cache - saved {saved * 1000:.0f} ms "
+                         f"({self.layout_cache.total_saved:.1f} s this session)")
+        self.render_status.config(text=" | ".join(parts))
+    
+    def set_render_busy(self, busy):
+        """Show or hide the busy state while a render is in flight"""
+        if busy:
+            self.render_status.config(text="⏳ Rendering...")
+        elif self.render_status.cget('text') == "⏳ Rendering...":
+            self.render_status.config(text="")
+        self.root.config(cursor='watch' if busy else '')
+    
+    def stop_render(self):
+        """Abandon the renders in flight and kill any expression still running"""
+        if not self.render_worker.busy():
+            return
+        self.render_worker.cancel('display')
+        self.render_worker.cancel('export')
+        self.sandbox.stop()
+        self.set_render_busy(False)
+        self.render_status.config(text="⛔ Render stopped")
     
     def save_graph(self):
         """Save the current graph"""
@@ -1114,13 +1821,68 @@ Ready to create beautiful graphs!"""
             filetypes=[("PNG files", "*.png"), ("PDF files", "*.pdf"), 
                       ("SVG files", "*.svg"), ("All files", "*.*")]
         )
-        if filename:
-            self.figure.savefig(filename, dpi=300, bbox_inches='tight')
+        if not filename:
+            return
+        
+        fmt = os.path.splitext(filename)[1].lstrip('.').lower() or 'png'
+        trace = RenderTrace('save_graph', format=fmt)
+        if self.render_build is None:
+            # A live plot's artist is left out of full draws unless told otherwise
+            live_artist = self.live_plot.artist if self.live_plot is not None else None
+            if live_artist is not None:
+                live_artist.set_animated(False)
+            try:
+                with trace.stage('savefig'):
+                    self.figure.savefig(filename, dpi=EXPORT_DPI, bbox_inches='tight')
+            finally:
+                if live_artist is not None:
+                    live_artist.set_animated(True)
+            self.finish_trace(trace, self.figure)
             messagebox.showinfo("Success", f"Graph saved to:\n{filename}")
+            return
+        
+        # Saved before with the export cache on: copy the file instead
+        content = (self.render_state or {}).get('content')
+        cache = self.get_export_cache() if content else None
+        key = export_key(content, fmt, self.figure.get_size_inches(), EXPORT_DPI) if cache else None
+        if cache is not None:
+            with trace.stage('export_cache') as info:
+                info['hit'] = cache.fetch(key, fmt, filename)
+            if info['hit']:
+                self.finish_trace(trace)
+                messagebox.showinfo("Success", f"Graph saved to:\n{filename}\n\n"
+                                               f"(copied from the export cache)")
+                return
+        
+        def saved(job):
+            if cache is not None:
+                cache.store(key, fmt, filename)
+            messagebox.showinfo("Success", f"Graph saved to:\n{filename}")
+        
+        # Rebuild the shown graph off the GUI thread and write it there
+        build, style = self.render_build
+        self.submit_render(build, style, saved,
+                           lambda e: messagebox.showerror("Error", 
+                                                          f"Error saving graph:\n{str(e)}"),
+                           filename, trace)
+    
+    def get_export_cache(self):
+        """The on-disk export cache, or None while it is switched off"""
+        if not self.cache_exports.get():
+            return None
+        if self.export_cache is None:
+            try:
+                self.export_cache = ExportCache(EXPORT_CACHE_DIR)
+            except OSError:
+                return None
+        return self.export_cache
     
     def clear_graph(self):
         """Clear the graph"""
+        self.render_worker.cancel('display')
         self.figure.clear()
+        self.render_state = None
+        self.render_build = None
         self.canvas.draw()
     
     def load_example_data(self):
@@ -1252,6 +2014,123 @@ Ready to create beautiful graphs!"""
                         "  III(-,-)  |  IV (+,-)\n\n"
                         "Use with equation plotter for best results!",
             
+            "Line Downsampling": "Speeds up line plots with huge numbers of points.\n\n"
+                                "A screen can only show a few thousand columns\n"
+                                "of pixels, so long lines are reduced first:\n\n"
+                                "- min/max: Keeps every peak and dip (exact look)\n"
+                                "- LTTB: Smoother, keeps the overall shape\n"
+                                "- off: Draw every single point (slow)\n\n"
+                                "Only lines with more than ~4 points per pixel\n"
+                                "are reduced.",
+            
+            "Scatter Density": "Draws huge scatter plots as a density image.\n\n"
+                              "Above the given number of points, each pixel\n"
+                              "is coloured by how many points fall in it\n"
+                              "(using the selected colormap) instead of drawing\n"
+                              "one marker per point. Millions of points render\n"
+                              "in a fraction of a second and exports stay small.\n\n"
+                              "- Log: colour by log of the count, so sparse\n"
+                              "  outliers stay visible next to dense clusters\n"
+                              "- Zooming (axis ranges) re-bins at full detail",
+            
+            "Heatmap Pyramid": "Keeps big heatmaps fast while zooming.\n\n"
+                              "Z is reduced once into zoom levels, each half\n"
+                              "the size of the one before. Every redraw uses\n"
+                              "the coarsest level that still has a cell per\n"
+                              "screen pixel, and only the visible part of it.\n\n"
+                              "Zoomed out, each pixel shows the cells it covers as:\n"
+                              "- mean: the average (smooth overview)\n"
+                              "- max: the largest value (peaks stay visible)\n"
+                              "- min: the smallest value (dips stay visible)",
+            
+            "Render Cache": "Shows graphs you made before instantly.\n\n"
+                           "The last few graphs are kept in memory. Going back\n"
+                           "to the same data and settings (at the same window\n"
+                           "size) shows the kept picture without redrawing.\n\n"
+                           "With 'Cache Exported Files' on, saved files are also\n"
+                           "kept on disk, so saving the same graph again is\n"
+                           "just a copy. The oldest files are removed once\n"
+                           "the cache grows past 512 MB.\n\n"
+                           "Graphs with np.random data are never cached.",
+            
+            "Stop Rendering": "Stops the graph or equation being drawn.\n\n"
+                             "Expressions are computed in a separate process,\n"
+                             "so a slow or runaway one never freezes the window:\n"
+                             "- Stop Rendering kills it at once\n"
+                             "- It runs on one core and is stopped by itself\n"
+                             f"  after {CPU_SECONDS} s of CPU time (or killed if still\n"
+                             f"  stuck {WALL_GRACE} s later)\n"
+                             "- It may not use more than the Memory Budget\n\n"
+                             "The previous graph stays on screen.",
+            
+            "Separate Process": "Draws whole graphs in the separate expression\n"
+                               "process, not just their expressions.\n\n"
+                               "- Stop Rendering and the time and memory limits\n"
+                               "  then cover everything, including drawing\n"
+                               "- The finished picture comes back through shared\n"
+                               "  memory, without being copied\n"
+                               "- Saving writes the file in that process too\n\n"
+                               "Style changes redraw the whole graph instead of\n"
+                               "updating it in place, so leave this off for\n"
+                               "quick live previews.",
+            
+            "Render Timings": "Shows where the time of each render goes.\n\n"
+                             "Below the graph, after every render:\n"
+                             "- parse_data: reading X/Y values or files\n"
+                             "- eval_z / eval: computing Z or the equations\n"
+                             "- artists: creating lines, bars, surfaces...\n"
+                             "- colorbar, tight_layout: decorations and layout\n"
+                             "- sandbox_render: drawn in a separate process\n"
+                             "- draw / savefig: painting pixels or the file\n"
+                             "- other: labels, grid, legend and bookkeeping\n"
+                             "plus the number of points and artists drawn\n"
+                             "and the memory in use (RSS).\n\n"
+                             "Start the app with --events FILE to also write\n"
+                             "every render as a JSON line to FILE.",
+            
+            "Histogram Bins": "Number of bars, or a rule that picks it.\n\n"
+                             "- auto: the smaller of 'fd' and 'sturges'\n"
+                             "- fd: Freedman-Diaconis, robust to outliers\n"
+                             "- scott: based on the standard deviation\n"
+                             "- sturges / sqrt / rice: based on the count\n\n"
+                             "Data is counted in chunks, so huge files and\n"
+                             "expressions like np.random.randn(10**9) work\n"
+                             "without loading everything into memory.",
+            
+            "Live Stream": "Watches live data as it arrives.\n\n"
+                          "Source is one of:\n"
+                          "- udp:PORT (or udp:HOST:PORT): datagrams of text lines\n"
+                          "- a named pipe (mkfifo), read whenever a writer is there\n"
+                          "- a file, followed as lines are appended (like tail -f)\n"
+                          "- '-': standard input, e.g. producer | python graph_generator.py --live -\n\n"
+                          "Each line holds numbers separated by commas, spaces or\n"
+                          "semicolons; Columns (X, Y) under Large CSV Files picks\n"
+                          "them (one column: Y against the sample number). A\n"
+                          "header line lets you pick columns by name.\n\n"
+                          "Only the newest Samples Kept are shown, on a line\n"
+                          "(or scatter) plot redrawn 30 times a second; the axes\n"
+                          "move ahead of the data now and then.",
+            
+            "Memory Budget": "Most memory one graph may use, in MB.\n\n"
+                            "Sizes are worked out before anything is allocated:\n"
+                            "- X/Y data over the budget is refused with a message\n"
+                            "  (e.g. a typo like np.random.randn(10**10) or\n"
+                            "  0:1e12:1) instead of freezing the computer\n"
+                            "- Contour and heatmap grids over the budget are\n"
+                            "  thinned out, and the status line says so\n\n"
+                            "Histograms and data files are read in pieces,\n"
+                            "so they are not limited by the budget.\n\n"
+                            "Start the app with --trace-memory to see how much\n"
+                            "each render stage allocates in Render Timings.",
+            
+            "Live Preview": "Redraws the graph automatically while you edit.\n\n"
+                           "- Colours, widths, sliders: update almost at once\n"
+                           "- Axis ranges: update after a short pause\n"
+                           "- Data and graph type: update when you stop typing\n\n"
+                           "Style changes reuse the existing graph, so even\n"
+                           "big datasets stay smooth. Errors from half-typed\n"
+                           "input appear under the graph instead of a popup.",
+            
             "Origin Axes": "Draw X and Y axes through the origin (0,0).\n\n"
                           "What it does:\n"
                           "- Draws thick black lines at X=0 and Y=0\n"
@@ -1317,9 +2196,10 @@ GRAPH TYPES GUIDE
 - Color intensity represents value magnitude
 
 DATA INPUT FORMATS:
-1. Comma-separated: 1, 2, 3, 4, 5
+1. Comma-separated: 1, 2, 3, 4, 5 (spaces, semicolons or new lines work too)
 2. Range: 0:10 (creates 100 points from 0 to 10)
 3. Expression: sin(x), x**2, exp(x)
+4. File: @data.npy, @raw.f32, @table.csv:col3 (large files are not copied)
         """
         
         window = tk.Toplevel(self.root)
@@ -1408,6 +2288,16 @@ Y: exp(x)        → Exponential
 Y: sqrt(x)       → Square root
 Y: x**3 - 2*x    → Polynomial
 
+DATA FILES (start with @):
+X: @data.npy         → NumPy array file
+X: @data.npy:col2    → Column 2 of a 2D array
+Y: @raw.f32          → Raw binary (.f32 .f64 .i16 .i32 .u8 ...)
+Y: @table.csv:col3   → Column 3 of a CSV file
+Y: @table.csv:temp   → CSV column by header name
+
+Large CSV logs: use "📂 Stream CSV File" to load them
+in the background with a live preview and Cancel button.
+
 3D EXPRESSIONS (Z data):
 Z: np.sin(np.sqrt(X**2 + Y**2))
 Z: X**2 + Y**2
@@ -1645,9 +2535,34 @@ You got this! 💪
                   command=window.destroy).pack(pady=5)
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        # Headless batch rendering: no window is created
+        from graph_batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    parser = argparse.ArgumentParser(
+        description="Professional Graph Generator ('batch' renders without a window)")
+    parser.add_argument('--events', metavar='FILE', 
+                        help="append render timings as JSON lines to FILE ('-' for stdout)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="record how much memory each render stage allocates (slower)")
+    parser.add_argument('--live', metavar='SOURCE',
+                        help="show a live stream at startup: '-' (stdin), udp:PORT, "
+                             "a named pipe or a file to follow")
+    args = parser.parse_args()
+    if args.trace_memory:
+        start_memory_tracing()
+    event_log = EventLog(args.events) if args.events else None
     root = tk.Tk()
-    app = GraphGenerator(root)
+    app = GraphGenerator(root, event_log)
+    if args.live:
+        app.live_source.set(args.live)
+        root.after(0, app.start_live_stream)
     root.mainloop()
+    if app.live_stream is not None:
+        app.live_stream.stop()
+    app.sandbox.close()
+    if event_log is not None:
+        event_log.close()
 
 if __name__ == "__main__":
     main()
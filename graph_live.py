@@ -0,0 +1,424 @@
+"""
+Live data streams for the Professional Graph Generator
+Samples read from stdin, a named pipe, a file that is being appended to or
+a local UDP socket are parsed on a background thread into a fixed-capacity
+ring buffer; the GUI shows the newest of them at a fixed frame rate by
+blitting a single line or scatter artist
+"""
+
+import os
+import re
+import select
+import socket
+import stat
+import sys
+import threading
+import time
+import warnings
+import numpy as np
+from graph_data import column_index, line_field_counts, parse_numbers
+from graph_lod import DECIMATE_ABOVE_PER_PIXEL, FrameDecimator
+
+# Samples kept on screen by default, and the choices offered in the GUI
+LIVE_CAPACITY = 100_000
+LIVE_CAPACITIES = ["10000", "100000", "1000000"]
+
+# Frames drawn per second while a stream is running
+LIVE_FPS = 30
+
+# Bytes read per call, and how long a reader waits for data before
+# checking whether it was asked to stop
+LIVE_READ_BYTES = 1 << 16
+LIVE_IDLE_SECONDS = 0.05
+
+# Datagrams are drained in batches of up to this many bytes
+UDP_BATCH_BYTES = 1 << 20
+
+# The X axis runs this far (share of the data span) ahead of the newest
+# sample, and the Y axis leaves this margin, so the axes only move - and
+# need a full redraw - every so often
+LIVE_HEADROOM = 0.25
+LIVE_MARGIN = 0.1
+
+_FIELD_SEPARATORS = re.compile(rb'[\s,;]+')
+
+
+class RingBuffer:
+    """Fixed-capacity float64 buffer keeping the newest rows
+
+    Storage is allocated once; appending overwrites the oldest rows. A
+    reader thread appends while the GUI copies the rows out with copy_to(),
+    so neither side allocates per frame.
+    """
+
+    def __init__(self, n_columns, capacity):
+        self.lock = threading.Lock()
+        self._data = np.empty((n_columns, capacity), dtype=np.float64)
+        self.capacity = capacity
+        self.head = 0   # Slot the next row goes to
+        self.size = 0
+        self.total = 0  # Rows appended since the start, dropped ones included
+
+    def append(self, rows):
+        """Append a (rows, columns) block; only its newest `capacity` rows fit"""
+        n = len(rows)
+        block = rows[-self.capacity:].T
+        m = block.shape[1]
+        with self.lock:
+            first = min(m, self.capacity - self.head)
+            self._data[:, self.head:self.head + first] = block[:, :first]
+            self._data[:, :m - first] = block[:, first:]
+            self.head = (self.head + m) % self.capacity
+            self.size = min(self.size + m, self.capacity)
+            self.total += n
+
+    def copy_to(self, out):
+        """Copy the rows, oldest first, into `out` (columns x capacity, may be
+        a strided view); returns how many were copied"""
+        with self.lock:
+            start = (self.head - self.size) % self.capacity
+            first = min(self.size, self.capacity - start)
+            out[:, :first] = self._data[:, start:start + first]
+            out[:, first:self.size] = self._data[:, :self.size - first]
+            return self.size
+
+
+class SampleParser:
+    """Turns a byte stream of text lines into (n, 2) X/Y rows
+
+    Values on a line are separated like in the data fields. `columns` picks
+    the X and Y columns; with a single column it is Y and the sample number
+    is X. Column names refer to a header line at the start of the stream.
+    Lines that do not parse or have a different number of fields are
+    dropped and counted in `dropped`.
+    """
+
+    def __init__(self, columns):
+        if len(columns) not in (1, 2):
+            raise ValueError("Enter one (Y) or two (X, Y) columns, e.g. 1, 2")
+        self.columns = columns
+        self.indices = None
+        self.n_fields = None
+        self.count = 0
+        self.dropped = 0
+        self.tail = b''
+
+    def feed(self, data, final=False):
+        """Parse the complete lines of `data` (and what was left over from
+        the last call); returns the new rows, or None if there are none"""
+        data = self.tail + data
+        if final:
+            self.tail = b''
+        else:
+            # Only parse complete lines; the rest waits for the next call
+            cut = data.rfind(b'\n') + 1
+            data, self.tail = data[:cut], data[cut:]
+        if self.indices is None:
+            data = self._start(data)
+        if not data.strip():
+            return None
+
+        # Fast path: one vectorized parse when every line has all its fields
+        counts = line_field_counts(data)
+        values = None
+        if np.all((counts == 0) | (counts == self.n_fields)):
+            try:
+                values = parse_numbers(data).reshape(-1, self.n_fields)
+            except ValueError:
+                pass
+        if values is None:
+            values = self._parse_lines(data)
+        return self._rows(values) if len(values) else None
+
+    def _start(self, data):
+        """Work out the fields from the first line; returns the data after
+        the header line, if there is one"""
+        stripped = data.lstrip()
+        if not stripped:
+            return data
+        first, _, rest = stripped.partition(b'\n')
+        names = _FIELD_SEPARATORS.split(first.strip())
+        try:
+            parse_numbers(first)
+            header = None
+        except ValueError:
+            header = [name.decode('utf-8', 'replace') for name in names]
+        self.n_fields = len(names)
+        indices = [column_index(column, header) for column in self.columns]
+        if max(indices) >= self.n_fields or min(indices) < 0:
+            raise ValueError(f"Column out of range (stream has {self.n_fields})")
+        self.indices = indices
+        return rest if header else stripped
+
+    def _parse_lines(self, data):
+        """Slow path: parse line by line, dropping the lines that do not fit"""
+        rows = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                values = parse_numbers(line)
+            except ValueError:
+                values = None
+            if values is None or values.size != self.n_fields:
+                self.dropped += 1
+            else:
+                rows.append(values)
+        if not rows:
+            return np.empty((0, self.n_fields))
+        return np.vstack(rows)
+
+    def _rows(self, values):
+        n = len(values)
+        if len(self.indices) == 2:
+            rows = values[:, self.indices]
+        else:
+            rows = np.empty((n, 2), dtype=np.float64)
+            rows[:, 0] = np.arange(self.count, self.count + n)
+            rows[:, 1] = values[:, self.indices[0]]
+        self.count += n
+        return rows
+
+
+# ===== SOURCES =====
+
+class _DescriptorSource:
+    """stdin or a named pipe; a pipe is waited on again when its writer
+    goes away, stdin ends with its input"""
+
+    def __init__(self, fd, reopen):
+        self.fd = fd
+        self.reopen = reopen
+
+    def read(self):
+        """Bytes read (b'' if none arrived in time), None at the end"""
+        if os.name != 'nt':
+            ready, _, _ = select.select([self.fd], [], [], LIVE_IDLE_SECONDS)
+            if not ready:
+                return b''
+        try:
+            data = os.read(self.fd, LIVE_READ_BYTES)
+        except BlockingIOError:
+            return b''
+        if data:
+            return data
+        if not self.reopen:
+            return None
+        # No writer at the moment: wait for the next one
+        time.sleep(LIVE_IDLE_SECONDS)
+        return b''
+
+    def close(self):
+        if self.reopen:
+            os.close(self.fd)
+
+
+class _TailSource:
+    """A regular file, followed from its current end like `tail -f`"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.file.seek(0, os.SEEK_END)
+
+    def read(self):
+        data = self.file.read(LIVE_READ_BYTES)
+        if data:
+            return data
+        # Truncated or rotated: start again from the top
+        if os.path.getsize(self.path) < self.file.tell():
+            self.file.seek(0)
+        time.sleep(LIVE_IDLE_SECONDS)
+        return b''
+
+    def close(self):
+        self.file.close()
+
+
+class _UdpSource:
+    """A UDP socket on this machine; every datagram holds whole lines"""
+
+    def __init__(self, host, port):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_BATCH_BYTES * 4)
+        self.socket.bind((host, port))
+
+    def read(self):
+        ready, _, _ = select.select([self.socket], [], [], LIVE_IDLE_SECONDS)
+        parts = []
+        size = 0
+        # Drain what has arrived, so a flood of small datagrams is parsed in one go
+        while ready and size < UDP_BATCH_BYTES:
+            data = self.socket.recv(LIVE_READ_BYTES)
+            parts.append(data if data.endswith(b'\n') else data + b'\n')
+            size += len(data)
+            ready, _, _ = select.select([self.socket], [], [], 0)
+        return b''.join(parts)
+
+    def close(self):
+        self.socket.close()
+
+
+def open_source(text):
+    """Open a live source: '-' (stdin), 'udp:PORT' or 'udp:HOST:PORT' (a
+    local socket), the path of a named pipe, or of a file to follow"""
+    text = text.strip()
+    if text == '-':
+        if sys.stdin is None:
+            raise ValueError("No standard input to read from")
+        return _DescriptorSource(sys.stdin.fileno(), reopen=False)
+    if text.lower().startswith('udp:'):
+        host, _, port = text[4:].rpartition(':')
+        if not port.isdigit():
+            raise ValueError(f"Expected udp:PORT or udp:HOST:PORT, got {text}")
+        return _UdpSource(host or '127.0.0.1', int(port))
+    if not os.path.exists(text):
+        raise ValueError(f"Live source not found: {text}")
+    if stat.S_ISFIFO(os.stat(text).st_mode):
+        # Non-blocking, so opening does not wait for a writer
+        return _DescriptorSource(os.open(text, os.O_RDONLY | os.O_NONBLOCK), reopen=True)
+    return _TailSource(text)
+
+
+class LiveStream:
+    """Reads a live source into a RingBuffer of X/Y rows on a background thread
+
+    Read errors end the stream and are kept in `error`; `ended` is set when
+    the source itself has ended (stdin closed).
+    """
+
+    def __init__(self, source, columns, capacity=LIVE_CAPACITY):
+        self.parser = SampleParser(columns)
+        self.buffer = RingBuffer(2, capacity)
+        self.reader = open_source(source)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.ended = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def running(self):
+        return self.thread.is_alive()
+
+    def stop(self):
+        """Ask the reader to stop and wait briefly for it"""
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=1)
+
+    def _run(self):
+        try:
+            while not self.stop_event.is_set():
+                data = self.reader.read()
+                final = data is None
+                rows = self.parser.feed(b'' if final else data, final)
+                if rows is not None:
+                    self.buffer.append(rows)
+                if final:
+                    self.ended = True
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.reader.close()
+
+
+# ===== DRAWING =====
+
+class LivePlot:
+    """Shows the newest rows of a RingBuffer as a line or scatter plot
+
+    The display buffer is allocated once at the buffer's capacity, and
+    frames are decimated into a FrameDecimator's buffers. The artist
+    is animated, so full draws leave it out: each frame restores the saved
+    axes background, draws the artist on top and blits the axes. A full
+    redraw only happens when the data leaves the axes limits, which are set
+    with room to spare.
+    """
+
+    def __init__(self, figure, canvas, buffer, kind='line', decimation="min/max", **style):
+        self.figure = figure
+        self.canvas = canvas
+        self.buffer = buffer
+        self.kind = kind
+        self.decimation = decimation
+        self.background = None
+        self.total = None
+        self.ax = figure.add_subplot(111)
+        self.out = np.empty((2, buffer.capacity), dtype=np.float64)
+        self.decimator = FrameDecimator(buffer.capacity)
+        if kind == 'scatter':
+            # Markers on a Line2D are stamped much faster than a collection
+            style = dict(dict(linestyle='none', marker='o', markersize=2), **style)
+        self.artist, = self.ax.plot([], [], animated=True, **style)
+        self.draw_id = canvas.mpl_connect('draw_event', self._drawn)
+
+    def close(self):
+        """Stop following full draws; the artist is drawn with the rest from now on"""
+        self.canvas.mpl_disconnect(self.draw_id)
+        self.artist.set_animated(False)
+
+    def _drawn(self, event):
+        """After every full draw: keep the new background, put the artist back"""
+        if self.canvas.figure is not self.figure:
+            return
+        if event.canvas.is_saving():
+            # Drawn at another size for a file: the next frame redraws in full
+            self.background = None
+            return
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.artist)
+
+    def frame(self):
+        """Show the newest rows; returns how many are shown"""
+        if self.buffer.total == self.total and self.background is not None:
+            return self.buffer.size  # Nothing new since the last frame
+        self.total = self.buffer.total
+        n = self.buffer.copy_to(self.out)
+        x, y = self.out[0, :n], self.out[1, :n]
+        moved = self._fit(x, y)
+        if self.kind != 'scatter':
+            self.artist.set_data(*self.decimator.line(x, y, self.ax.bbox.width, self.decimation))
+        elif self.decimation != "off" and n > DECIMATE_ABOVE_PER_PIXEL * self.ax.bbox.width:
+            # Thinned after the limits are final: pixels depend on them
+            self.artist.set_data(*self.decimator.markers(x, y, self.ax.transData, self.ax.bbox))
+        else:
+            self.artist.set_data(x, y)
+
+        if moved or self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.ax.draw_artist(self.artist)
+            self.canvas.blit(self.ax.bbox)
+        return n
+
+    def _fit(self, x, y):
+        """Move the axes limits if the data has left them; True if they moved"""
+        if not len(x):
+            return False
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN
+            x_lo, x_hi = np.nanmin(x), np.nanmax(x)
+            y_lo, y_hi = np.nanmin(y), np.nanmax(y)
+        if not np.all(np.isfinite([x_lo, x_hi, y_lo, y_hi])):
+            return False
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        if x0 <= x_lo and x_hi <= x1 and y0 <= y_lo and y_hi <= y1:
+            return False
+        x_span = _span(x_lo, x_hi)
+        if self.kind == 'scatter':
+            self.ax.set_xlim(x_lo - LIVE_MARGIN * x_span, x_hi + LIVE_MARGIN * x_span)
+        else:
+            # Time runs to the right: leave the room ahead of the newest sample
+            self.ax.set_xlim(x_lo, x_hi + LIVE_HEADROOM * x_span)
+        y_span = _span(y_lo, y_hi)
+        self.ax.set_ylim(y_lo - LIVE_MARGIN * y_span, y_hi + LIVE_MARGIN * y_span)
+        return True
+
+
+def _span(lo, hi):
+    """Width of a data range, never zero"""
+    return hi - lo if hi > lo else max(abs(hi), 1.0)
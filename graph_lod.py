@@ -0,0 +1,686 @@
+"""
+Level-of-detail helpers for the Professional Graph Generator
+Reduce huge datasets to what the canvas can actually show before they
+reach Matplotlib, so draw time depends on screen size, not data size
+"""
+
+import numpy as np
+
+# Line decimation modes offered in the GUI
+DECIMATION_MODES = ["min/max", "LTTB", "off"]
+
+# Points kept per pixel column: min/max emits up to 4 (first, min, max, last)
+# per bucket, so 2 buckets per pixel keeps the drawing pixel-exact
+MINMAX_BUCKETS_PER_PIXEL = 2
+LTTB_POINTS_PER_PIXEL = 2
+
+# Only decimate lines with more points than this many per pixel column
+DECIMATE_ABOVE_PER_PIXEL = 4
+
+
+def minmax_decimate(x, y, n_buckets):
+    """Keep the first, last, minimum and maximum point of each bucket
+
+    Buckets are consecutive runs of points, so peaks and dips always
+    survive and the output stays in the original drawing order. NaN gaps
+    are kept (a NaN wins both min and max of its bucket).
+    """
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return x, y
+
+    size = -(-n // n_buckets)
+    full = n // size * size
+    blocks = np.asarray(y[:full]).reshape(-1, size)
+    starts = np.arange(0, full, size)
+    picks = [starts, starts + size - 1,
+             starts + np.argmin(blocks, axis=1), starts + np.argmax(blocks, axis=1)]
+
+    if full < n:
+        tail = np.asarray(y[full:])
+        picks.append(np.array([full, n - 1, full + np.argmin(tail), full + np.argmax(tail)]))
+
+    index = np.unique(np.concatenate(picks))
+    return np.asarray(x)[index], np.asarray(y)[index]
+
+
+def lttb_decimate(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling to `n_out` points
+
+    Keeps the point of each bucket that forms the largest triangle with the
+    previously kept point and the average of the next bucket, which tracks
+    the visual shape of the line closely.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    index = np.empty(n_out, dtype=np.int64)
+    index[0], index[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        area[np.isnan(area)] = -1
+        prev = start + int(np.argmax(area))
+        index[i + 1] = prev
+    return x[index], y[index]
+
+
+def crop_to_range(x, y, x_range):
+    """Drop points outside a manual x range (sorted x only), keeping one
+    point beyond each edge so the line still reaches the axes"""
+    if x_range is None or len(x) < 2 or not np.all(x[1:] >= x[:-1]):
+        return x, y
+    start = max(np.searchsorted(x, x_range[0], side='left') - 1, 0)
+    stop = min(np.searchsorted(x, x_range[1], side='right') + 1, len(x))
+    return x[start:stop], y[start:stop]
+
+
+def decimate_line(x, y, width_px, mode="min/max", x_range=None):
+    """Reduce a line to about what `width_px` pixel columns can show"""
+    if mode == "off" or len(y) <= DECIMATE_ABOVE_PER_PIXEL * width_px:
+        return x, y
+    x, y = crop_to_range(x, y, x_range)
+    if mode == "LTTB":
+        return lttb_decimate(x, y, int(LTTB_POINTS_PER_PIXEL * width_px))
+    return minmax_decimate(x, y, int(MINMAX_BUCKETS_PER_PIXEL * width_px))
+
+
+# ===== DENSITY RENDERING =====
+
+# Scatter plots with more points than this are drawn as a density image
+DENSITY_THRESHOLD = 200_000
+
+# Points binned per step (bounds temporary memory for memory-mapped data)
+_DENSITY_CHUNK = 1 << 20
+
+
+def density_grid(x, y, x_range, y_range, width, height):
+    """Count the points that fall in each pixel of a width x height grid
+
+    The grid covers x_range by y_range; row 0 is the bottom (y_range[0]).
+    Points outside the ranges and NaNs are skipped.
+    """
+    width, height = max(int(width), 1), max(int(height), 1)
+    (x0, x1), (y0, y1) = sorted(x_range), sorted(y_range)
+    counts = np.zeros(width * height, dtype=np.int64)
+    if x1 <= x0 or y1 <= y0:
+        return counts.reshape(height, width)
+
+    x_scale, y_scale = width / (x1 - x0), height / (y1 - y0)
+    for start in range(0, len(x), _DENSITY_CHUNK):
+        cx = np.asarray(x[start:start + _DENSITY_CHUNK], dtype=np.float64)
+        cy = np.asarray(y[start:start + _DENSITY_CHUNK], dtype=np.float64)
+        ix = np.floor((cx - x0) * x_scale)
+        iy = np.floor((cy - y0) * y_scale)
+        keep = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+        index = iy[keep].astype(np.int64) * width + ix[keep].astype(np.int64)
+        counts += np.bincount(index, minlength=width * height)
+    return counts.reshape(height, width)
+
+
+def thin_to_pixels(x, y, transform, bbox):
+    """Keep one point per pixel of `bbox` (display coordinates) that holds any
+
+    For markers redrawn many times a second: each occupied pixel becomes a
+    single point at its centre, mapped back through `transform` (data to
+    display), so drawing costs at most one marker per pixel. Points outside
+    the box and NaNs are dropped.
+    """
+    width, height = max(int(bbox.width), 1), max(int(bbox.height), 1)
+    pixels = transform.transform(np.column_stack([x, y]))
+    ix = np.floor(pixels[:, 0] - bbox.x0)
+    iy = np.floor(pixels[:, 1] - bbox.y0)
+    keep = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+    occupied = np.zeros(width * height, dtype=bool)
+    occupied[iy[keep].astype(np.int64) * width + ix[keep].astype(np.int64)] = True
+    row, column = np.divmod(np.flatnonzero(occupied), width)
+    centres = np.column_stack([bbox.x0 + column + 0.5, bbox.y0 + row + 0.5])
+    points = transform.inverted().transform(centres)
+    return points[:, 0], points[:, 1]
+
+
+class FrameDecimator:
+    """decimate_line() and thin_to_pixels() for views redrawn many times a
+    second, writing into buffers instead of allocating new arrays
+
+    Scratch space for up to `capacity` points is allocated once; the output
+    buffers again only when the pixel size of the view changes. The returned
+    arrays are views of those buffers and valid until the next call. Min/max
+    lines keep a point that is picked twice twice (a zero-length segment),
+    and LTTB lines and non-linear axes go through the allocating functions.
+    """
+
+    def __init__(self, capacity):
+        self.scratch = np.empty((2, capacity), dtype=np.float64)
+        self.flags = np.empty((2, capacity), dtype=bool)
+        self.flat = np.empty(capacity, dtype=np.int64)
+        self.n_buckets = None
+        self.pixels = None
+
+    def _size_line(self, n_buckets):
+        """Allocate the min/max buffers for `n_buckets` buckets, plus a tail"""
+        if self.n_buckets == n_buckets:
+            return
+        self.n_buckets = n_buckets
+        self.ramp = np.arange(n_buckets + 1, dtype=np.int64)
+        self.starts = np.empty((2, n_buckets + 1), dtype=np.int64)
+        self.picks = np.empty((n_buckets + 1, 4), dtype=np.int64)
+        self.line_out = np.empty((2, 4 * (n_buckets + 1)), dtype=np.float64)
+
+    def _size_markers(self, width, height):
+        """Allocate the buffers for a width x height pixel grid"""
+        if self.pixels == (width, height):
+            return
+        self.pixels = width, height
+        pixels = width * height
+        self.pixel_ids = np.arange(pixels, dtype=np.float64)
+        self.occupied = np.empty(pixels + 1, dtype=bool)  # Last slot: outside
+        self.rank = np.empty(pixels, dtype=np.int64)
+        self.picked = np.empty(pixels + 1, dtype=np.float64)  # Last slot: unused
+        self.marker_out = np.empty((2, pixels), dtype=np.float64)
+
+    def line(self, x, y, width_px, mode="min/max"):
+        """Like decimate_line() without an x range"""
+        if mode != "min/max" or len(y) <= DECIMATE_ABOVE_PER_PIXEL * width_px:
+            return decimate_line(x, y, width_px, mode)
+        n_buckets = int(MINMAX_BUCKETS_PER_PIXEL * width_px)
+        n = len(y)
+        if n <= 4 * n_buckets:
+            return x, y
+        self._size_line(n_buckets)
+
+        size = -(-n // n_buckets)
+        m = n // size
+        full = m * size
+        blocks = y[:full].reshape(m, size)
+        picks = self.picks[:m + (full < n)]
+        # Reductions into contiguous rows: strided or overlapping output
+        # would make NumPy buffer it
+        starts, found = self.starts[0, :m], self.starts[1, :m]
+        np.multiply(self.ramp[:m], size, out=starts)
+        picks[:m, 0] = starts
+        np.add(starts, size - 1, out=picks[:m, 1])
+        np.argmin(blocks, axis=1, out=found)
+        np.add(found, starts, out=picks[:m, 2])
+        np.argmax(blocks, axis=1, out=found)
+        np.add(found, starts, out=picks[:m, 3])
+        if full < n:
+            tail = y[full:]
+            picks[m] = full, n - 1, full + np.argmin(tail), full + np.argmax(tail)
+        # Drawing order within each bucket; the buckets are in order already
+        picks.sort(axis=1)
+
+        k = picks.size
+        out_x, out_y = self.line_out[0, :k], self.line_out[1, :k]
+        np.take(x, picks, out=out_x.reshape(picks.shape), mode='clip')
+        np.take(y, picks, out=out_y.reshape(picks.shape), mode='clip')
+        return out_x, out_y
+
+    def markers(self, x, y, transform, bbox):
+        """Like thin_to_pixels()"""
+        if not transform.is_affine:
+            return thin_to_pixels(x, y, transform, bbox)
+        width, height = max(int(bbox.width), 1), max(int(bbox.height), 1)
+        self._size_markers(width, height)
+        (sx, _, tx), (_, sy, ty), _ = transform.get_affine().get_matrix()
+
+        n = len(x)
+        ix, iy = self.scratch[0, :n], self.scratch[1, :n]
+        inside, test = self.flags[0, :n], self.flags[1, :n]
+        np.multiply(x, sx, out=ix)
+        ix += tx - bbox.x0
+        np.floor(ix, out=ix)
+        np.multiply(y, sy, out=iy)
+        iy += ty - bbox.y0
+        np.floor(iy, out=iy)
+        # NaNs compare False, so they end up outside with the rest
+        np.greater_equal(ix, 0, out=inside)
+        inside &= np.less(ix, width, out=test)
+        inside &= np.greater_equal(iy, 0, out=test)
+        inside &= np.less(iy, height, out=test)
+
+        # Pixel number of each point; points outside all go to the last slot
+        iy *= width
+        iy += ix
+        np.copyto(iy, width * height, where=np.logical_not(inside, out=test))
+        flat = self.flat[:n]
+        np.copyto(flat, iy, casting='unsafe')
+        occupied = self.occupied
+        occupied.fill(False)
+        occupied[flat] = True
+
+        # Pack the occupied pixel numbers: each goes to its rank among them,
+        # the empty ones all to the unused last slot
+        occupied, rank = occupied[:-1], self.rank
+        np.copyto(rank, occupied)
+        np.cumsum(rank, out=rank)
+        k = int(rank[-1])
+        rank -= 1
+        np.copyto(rank, -1, where=np.logical_not(occupied, out=occupied))
+        self.picked[rank] = self.pixel_ids
+        out_x, out_y = self.marker_out[0, :k], self.marker_out[1, :k]
+        np.divmod(self.picked[:k], width, out=(out_y, out_x))
+        # Pixel centres back to data coordinates
+        out_x += bbox.x0 + 0.5 - tx
+        out_x /= sx
+        out_y += bbox.y0 + 0.5 - ty
+        out_y /= sy
+        return out_x, out_y
+
+
+# ===== 3D SURFACE LEVEL OF DETAIL =====
+
+# Screen pixels per surface polygon: smaller polygons cannot be told apart
+SURFACE_PIXELS_PER_POLYGON = 100
+
+# Upper bound for any render, exports included
+SURFACE_MAX_POLYGONS = 250_000
+
+
+def surface_budget(width_px, height_px):
+    """Polygon budget for a surface drawn on a width x height pixel canvas"""
+    return int(min(width_px * height_px / SURFACE_PIXELS_PER_POLYGON, SURFACE_MAX_POLYGONS))
+
+
+def grid_indices(n, stride):
+    """Every `stride`-th index below n, always keeping the last one"""
+    index = np.arange(0, n, stride)
+    if n and index[-1] != n - 1:
+        index = np.append(index, n - 1)
+    return index
+
+
+def surface_lod(n_rows, n_cols, max_polygons):
+    """Row and column indices that keep an n_rows x n_cols grid within
+    `max_polygons` cells, thinning both directions by the same stride"""
+    cells = max(n_rows - 1, 1) * max(n_cols - 1, 1)
+    stride = max(1, int(np.ceil(np.sqrt(cells / max(max_polygons, 1)))))
+    return grid_indices(n_rows, stride), grid_indices(n_cols, stride)
+
+
+# ===== HEATMAP TILE PYRAMID =====
+
+# Reductions that combine 2x2 cells into one on the next pyramid level
+PYRAMID_REDUCTIONS = {"mean": np.mean, "max": np.max, "min": np.min}
+
+# Levels are added until the coarsest one fits this size in both directions
+PYRAMID_MIN_SIZE = 512
+
+# Elements read per step while building a level (bounds temporary memory)
+_PYRAMID_CHUNK = 1 << 23
+
+
+def _pad_even(block):
+    """Repeat the last row/column so a block has an even shape"""
+    rows, cols = block.shape
+    if rows % 2:
+        block = np.concatenate([block, block[-1:]], axis=0)
+    if cols % 2:
+        block = np.concatenate([block, block[:, -1:]], axis=1)
+    return block
+
+
+def reduce_level(Z, reduction="mean"):
+    """Halve a 2D array in both directions by reducing 2x2 blocks
+
+    Works through the rows in chunks, so Z may be a memory-mapped file much
+    larger than RAM. Odd edges are padded by repeating the last row/column.
+    The result is float32 to keep the pyramid small.
+    """
+    reduce = PYRAMID_REDUCTIONS[reduction]
+    rows, cols = Z.shape
+    out = np.empty(((rows + 1) // 2, (cols + 1) // 2), dtype=np.float32)
+    step = max(2, _PYRAMID_CHUNK // max(cols, 1) // 2 * 2)
+    for start in range(0, rows, step):
+        block = np.asarray(Z[start:start + step], dtype=np.float32)
+        block = _pad_even(block)
+        h, w = block.shape
+        out[start // 2:start // 2 + h // 2] = reduce(block.reshape(h // 2, 2, w // 2, 2),
+                                                   axis=(1, 3))
+    return out
+
+
+def build_pyramid(Z, reduction="mean", min_size=PYRAMID_MIN_SIZE):
+    """Return [Z, Z/2, Z/4, ...] down to a level that fits `min_size`
+
+    Level 0 is Z itself (not copied); every further level halves the
+    previous one with `reduction` ('mean', 'max' or 'min').
+    """
+    levels = [Z]
+    while max(levels[-1].shape) > min_size:
+        levels.append(reduce_level(levels[-1], reduction))
+    return levels
+
+
+def pyramid_level(levels, cells_x, cells_y, width_px, height_px):
+    """Index of the coarsest level that still has at least one cell per
+    pixel when cells_x x cells_y base cells fill width_px x height_px"""
+    per_pixel = min(cells_x / max(width_px, 1), cells_y / max(height_px, 1))
+    if per_pixel < 2:
+        return 0
+    return min(int(np.log2(per_pixel)), len(levels) - 1)
+
+
+# ===== STREAMING HISTOGRAM =====
+
+# Automatic bin width rules (same definitions as numpy.histogram_bin_edges)
+HISTOGRAM_RULES = ["auto", "fd", "scott", "sturges", "sqrt", "rice"]
+
+# Samples kept per quantile sketch level (rank error is roughly 1/size)
+SKETCH_SIZE = 4096
+
+# Up to this many samples are kept as-is and binned exactly; beyond it the
+# histogram switches to a fixed-size fine grid plus a quantile sketch
+HISTOGRAM_EXACT_SAMPLES = 1 << 20
+
+# Resolution of the fine grid, and the most bins an automatic rule may pick
+_FINE_BINS = 1 << 14
+_HALF_SPAN = _FINE_BINS // 2
+HISTOGRAM_MAX_BINS = _FINE_BINS // 16
+
+# Samples binned per step (bounds temporary memory)
+_HISTOGRAM_CHUNK = 1 << 20
+
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch (a KLL-style compactor stack)
+
+    Level h holds up to `size` samples that each stand for 2**h inputs.
+    A full level is sorted and every other sample moves up one level, so
+    memory stays at about size * log2(n / size) samples for n inputs.
+    """
+
+    def __init__(self, size=SKETCH_SIZE, seed=None):
+        self.size = size
+        self.levels = []
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Add finite samples"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        self.count += values.size
+        self._add(0, values)
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        for level, values in enumerate(other.levels):
+            self._add(level, values)
+        self.count += other.count
+        return self
+
+    def _add(self, level, values):
+        while values.size:
+            while level >= len(self.levels):
+                self.levels.append(np.empty(0))
+            values = np.concatenate([self.levels[level], values])
+            if values.size <= self.size:
+                self.levels[level] = values
+                return
+            values.sort()
+            # An odd sample out stays behind; a random half moves up
+            keep = values.size % 2
+            self.levels[level] = values[values.size - keep:]
+            values = values[self.rng.integers(2):values.size - keep:2]
+            level += 1
+
+    def quantile(self, q):
+        """Approximate quantile(s) q in [0, 1] of everything added so far"""
+        if not self.count:
+            raise ValueError("Quantile of an empty sketch")
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2.0 ** h) for h, v in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, weights = values[order], weights[order]
+        ranks = np.cumsum(weights) - weights / 2
+        return np.interp(np.asarray(q) * weights.sum(), ranks, values)
+
+
+class StreamingHistogram:
+    """Histogram accumulated chunk by chunk in constant memory
+
+    `bins` is a bin count, a sequence of bin edges or one of
+    HISTOGRAM_RULES. Edges or a count with a `range` are counted exactly.
+    Otherwise the edges depend on the data: small inputs are kept and
+    binned exactly like numpy.histogram, larger ones are counted on a fine
+    grid that widens as needed, with a QuantileSketch supplying the IQR for
+    the 'fd' rule; their counts are interpolated (see `exact` and
+    exact_histogram). Histograms with the same bins can be merged, e.g.
+    partial results of parallel workers.
+    """
+
+    def __init__(self, bins=20, range=None, sketch_size=SKETCH_SIZE):
+        self.edges = None
+        if isinstance(bins, str):
+            if bins not in HISTOGRAM_RULES:
+                raise ValueError(f"Unknown bin rule '{bins}' (use one of: "
+                                 f"{', '.join(HISTOGRAM_RULES)})")
+        elif np.ndim(bins) == 1:
+            self.edges = np.asarray(bins, dtype=np.float64)
+            if self.edges.size < 2 or np.any(np.diff(self.edges) <= 0):
+                raise ValueError("Bin edges must increase monotonically")
+        else:
+            bins = int(bins)
+            if bins < 1:
+                raise ValueError("Number of bins must be at least 1")
+            if range is not None:
+                self.edges = np.linspace(range[0], range[1], bins + 1)
+        self.bins = bins
+        self.sketch_size = sketch_size
+        self.counts = None if self.edges is None else np.zeros(len(self.edges) - 1, np.int64)
+
+        # Running moments of all finite samples
+        self.count = 0
+        self.min, self.max = np.inf, -np.inf
+        self.mean = 0.0
+        self._m2 = 0.0
+
+        # Exact samples until HISTOGRAM_EXACT_SAMPLES, then a fine grid of
+        # _FINE_BINS bins 2**exp wide, starting at a multiple of half its span
+        # (start * _HALF_SPAN * 2**exp) so it can straddle zero
+        self._samples = []
+        self._held = 0
+        self._fine = None
+        self._exp = self._start = 0
+        self.sketch = None
+
+    @property
+    def exact(self):
+        """Whether result() gives exact counts (False once samples went to
+        the fine grid)"""
+        return self._fine is None
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    def update(self, values):
+        """Count another chunk of samples (NaN and inf are skipped)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        for start in range(0, values.size, _HISTOGRAM_CHUNK):
+            chunk = values[start:start + _HISTOGRAM_CHUNK]
+            chunk = chunk[np.isfinite(chunk)]
+            if chunk.size:
+                mean = chunk.mean()
+                self._add_moments(chunk.size, mean, np.square(chunk - mean).sum(), 
+                                  chunk.min(), chunk.max())
+                self._bin(chunk)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another histogram built with the same bins"""
+        same_edges = (self.edges is None and other.edges is None) or (
+            self.edges is not None and other.edges is not None 
+            and np.array_equal(self.edges, other.edges))
+        if not same_edges or (self.edges is None and self.bins != other.bins):
+            raise ValueError("Only histograms with the same bins can be merged")
+        if not other.count:
+            return self
+        self._add_moments(other.count, other.mean, other._m2, other.min, other.max)
+        if self.edges is not None:
+            self.counts += other.counts
+            return self
+        for samples in other._samples:
+            self._bin(samples)
+        if other._fine is not None:
+            if self._fine is None:
+                self._start_grid(other._exp, other._start)
+            self._merge_grid(other)
+        return self
+
+    def result(self):
+        """Return (counts, edges) like numpy.histogram"""
+        if self.edges is not None:
+            return self.counts.copy(), self.edges.copy()
+        if self._fine is None:
+            samples = np.concatenate(self._samples) if self._samples else np.empty(0)
+            return np.histogram(samples, bins=self.bins)
+        edges = self._auto_edges()
+        if self.min == self.max:
+            return np.histogram([self.min], edges)[0] * self.count, edges
+        # Cumulative counts are exact at fine grid lines and pinned to the
+        # true min and max; in between they are interpolated linearly
+        fine_edges = self._grid_lo() + np.ldexp(np.arange(_FINE_BINS + 1.0), self._exp)
+        cumulative = np.concatenate([[0], np.cumsum(self._fine)])
+        inside = (fine_edges > self.min) & (fine_edges < self.max)
+        xp = np.concatenate([[self.min], fine_edges[inside], [self.max]])
+        fp = np.concatenate([[0], cumulative[inside], [self.count]])
+        return np.diff(np.rint(np.interp(edges, xp, fp))).astype(np.int64), edges
+
+    def _add_moments(self, n, mean, m2, lo, hi):
+        """Combine running moments with those of n more samples (Chan et al.)"""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min, self.max = min(self.min, lo), max(self.max, hi)
+
+    def _bin(self, values):
+        if self.edges is not None:
+            self.counts += np.histogram(values, self.edges)[0]
+            return
+        if self._fine is None:
+            self._samples.append(values)
+            self._held += values.size
+            if self._held > HISTOGRAM_EXACT_SAMPLES:
+                self._start_grid(*self._fit_grid(self.min, self.max))
+            return
+        self._grow(values.min(), values.max())
+        index = ((values - self._grid_lo()) / np.ldexp(1.0, self._exp)).astype(np.int64)
+        np.clip(index, 0, _FINE_BINS - 1, out=index)
+        self._fine += np.bincount(index, minlength=_FINE_BINS)
+        self.sketch.update(values)
+
+    def _grid_lo(self):
+        return np.ldexp(float(self._start * _HALF_SPAN), self._exp)
+
+    def _covers(self, lo, hi):
+        half = np.ldexp(float(_HALF_SPAN), self._exp)
+        return self._start * half <= lo and hi < (self._start + 2) * half
+
+    def _fit_grid(self, lo, hi):
+        """Smallest grid (exp, start) whose range holds [lo, hi]"""
+        width = (hi - lo) / _FINE_BINS or max(abs(lo), 1.0) * 2.0 ** -40
+        exp = int(np.floor(np.log2(width)))
+        while True:
+            half = np.ldexp(float(_HALF_SPAN), exp)
+            start = int(np.floor(lo / half))
+            if (start + 2) * half > hi:
+                return exp, start
+            exp += 1
+
+    def _start_grid(self, exp, start):
+        """Switch from exact samples to the fine grid, binning those held"""
+        self._fine = np.zeros(_FINE_BINS, dtype=np.int64)
+        self._exp, self._start = exp, start
+        self.sketch = QuantileSketch(self.sketch_size)
+        samples, self._samples, self._held = self._samples, [], 0
+        for values in samples:
+            self._bin(values)
+
+    def _grow(self, lo, hi, exp=None):
+        """Widen the grid (merging bin pairs) until it holds [lo, hi] and its
+        bins are at least 2**exp wide; old bins stay aligned with new ones"""
+        while not self._covers(lo, hi) or (exp is not None and self._exp < exp):
+            pairs = self._fine.reshape(-1, 2).sum(axis=1)
+            self._fine = np.zeros(_FINE_BINS, dtype=np.int64)
+            offset = self._start % 2 * _FINE_BINS // 4
+            self._fine[offset:offset + _FINE_BINS // 2] = pairs
+            self._exp += 1
+            self._start //= 2
+
+    def _merge_grid(self, other):
+        """Add the fine grid (and sketch) of another histogram to this one"""
+        other_lo = other._grid_lo()
+        other_hi = other_lo + np.ldexp(float(_FINE_BINS), other._exp)
+        self._grow(other_lo, np.nextafter(other_hi, -np.inf), other._exp)
+        # Both grids are aligned to powers of two: map whole bins by index
+        scale = 2 ** (self._exp - other._exp)
+        index = (other._start * _HALF_SPAN + np.arange(_FINE_BINS, dtype=np.int64)
+                 - self._start * _HALF_SPAN * scale) // scale
+        self._fine += np.bincount(index, weights=other._fine, 
+                                  minlength=_FINE_BINS).astype(np.int64)
+        self.sketch.merge(other.sketch)
+
+    def _auto_edges(self):
+        """Bin edges from the bin count or rule, over the exact data range"""
+        span = self.max - self.min
+        if isinstance(self.bins, str):
+            width = self._rule_width(self.bins, span) if span else 0.0
+            n_bins = min(int(np.ceil(span / width)), HISTOGRAM_MAX_BINS) if width else 1
+        else:
+            n_bins = self.bins
+        if not span:
+            return np.linspace(self.min - 0.5, self.max + 0.5, n_bins + 1)
+        return np.linspace(self.min, self.max, n_bins + 1)
+
+    def _rule_width(self, rule, span):
+        n = self.count
+        sturges = span / (np.log2(n) + 1.0)
+        if rule == "sturges":
+            return sturges
+        if rule == "sqrt":
+            return span / np.sqrt(n)
+        if rule == "rice":
+            return span / (2.0 * n ** (1.0 / 3))
+        if rule == "scott":
+            return (24.0 * np.sqrt(np.pi) / n) ** (1.0 / 3) * self.std
+        q1, q3 = self.sketch.quantile([0.25, 0.75])
+        fd = 2.0 * (q3 - q1) * n ** (-1.0 / 3)
+        if rule == "fd":
+            return fd
+        return min(fd, sturges) if fd > 0 else sturges
+
+
+def exact_histogram(chunks, bins=20, check=None):
+    """StreamingHistogram with exact counts of the data yielded by chunks()
+
+    `chunks` is called again, and must yield the same data, when there were
+    too many samples to keep: the first pass only settles the edges (as
+    numpy.histogram would place them for a bin count), the second counts
+    against them. `check` is called after every chunk.
+    """
+    check = check or (lambda: None)
+    histogram = StreamingHistogram(bins)
+    for chunk in chunks():
+        histogram.update(chunk)
+        check()
+    if histogram.exact:
+        return histogram
+    histogram = StreamingHistogram(histogram.result()[1])
+    for chunk in chunks():
+        histogram.update(chunk)
+        check()
+    return histogram
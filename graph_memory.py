@@ -0,0 +1,118 @@
+"""
+Memory accounting for the Professional Graph Generator
+Estimates how much memory data fields and Z grids will take before they
+are allocated, so a render over the memory budget is refused (1D data)
+or downsampled (grids) with a clear message instead of running out of
+memory, and measures how much memory the process really uses
+"""
+
+import math
+import os
+import sys
+from graph_data import is_file_reference
+from graph_expressions import estimate_elements
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Default memory budget of one render, in MB
+MEMORY_BUDGET_MB = 2048
+
+# Data is converted to float64
+VALUE_BYTES = 8
+
+# Full-size arrays a Z grid needs at once: X, Y, Z and one temporary
+GRID_ARRAYS = 4
+
+# Values in the default 'a:b' range
+RANGE_POINTS = 100
+
+
+class MemoryBudgetError(ValueError):
+    """Raised before allocating data that would not fit the memory budget"""
+
+
+def format_bytes(n):
+    """Human readable size: '0.4 MB', '512 MB', '7.5 GB'"""
+    if n >= 1e9:
+        return f"{n / 1e9:.1f} GB"
+    if n < 1e7:
+        return f"{n / 1e6:.1f} MB"
+    return f"{n / 1e6:.0f} MB"
+
+
+def estimate_values(text):
+    """Number of values a data field will allocate, or None when unknown
+
+    Ranges are counted from their bounds and step; expressions from the
+    constant sizes of the arrays they create. File references are
+    memory-mapped or streamed, so they are not counted here.
+    """
+    text = text.strip()
+    if is_file_reference(text):
+        return None
+    if ':' in text:
+        parts = text.split(':')
+        try:
+            bounds = [float(part) for part in parts]
+        except ValueError:
+            return None
+        if len(bounds) == 2:
+            return RANGE_POINTS
+        if len(bounds) == 3:
+            start, stop, step = bounds
+            if step == 0:
+                return None
+            count = (stop - start) / step
+            return max(math.ceil(count), 0) if math.isfinite(count) else float('inf')
+        return None
+    return estimate_elements(text)
+
+
+def check_values(count, what, budget):
+    """Refuse `count` float64 values of `what` if they exceed `budget` bytes"""
+    if count is None or count * VALUE_BYTES <= budget:
+        return
+    size = format_bytes(count * VALUE_BYTES) if math.isfinite(count) else "unlimited memory"
+    values = f"{count:,.0f} values" if math.isfinite(count) else "an endless number of values"
+    raise MemoryBudgetError(f"{what} would need about {size} ({values}), more than the "
+                            f"{format_bytes(budget)} memory budget.\n"
+                            f"Use a smaller size or a larger step, or raise the "
+                            f"Memory Budget setting.")
+
+
+def grid_stride(columns, rows, budget, arrays=GRID_ARRAYS):
+    """Smallest step through x and y that keeps a Z grid within `budget` bytes"""
+    stride = 1
+    if columns * rows * VALUE_BYTES * arrays > budget:
+        stride = max(int(math.sqrt(columns * rows * VALUE_BYTES * arrays / budget)), 1)
+        while math.ceil(columns / stride) * math.ceil(rows / stride) * VALUE_BYTES * arrays > budget:
+            stride += 1
+    return stride
+
+
+def address_space_bytes():
+    """Virtual memory size of this process in bytes, or None where unknown
+    (what an address-space limit is measured against)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def rss_bytes():
+    """Resident memory of this process in bytes (its peak where the current
+    value is not available; 0 if neither is)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
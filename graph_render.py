@@ -0,0 +1,276 @@
+"""
+Rendering helpers for the Professional Graph Generator
+Plot styles are resolved into rcParams once and applied per render, and
+put back when it ends, so a style never leaks into other figures. Renders
+on different threads take turns, so each draws with its own style. Tight
+layout results are cached so unchanged layouts skip the text measurement pass,
+huge scatter plots are drawn as a density image binned at screen resolution
+and heatmaps draw from a multi-resolution pyramid
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm, Normalize
+from matplotlib.image import AxesImage
+from matplotlib.transforms import Bbox
+from graph_lod import density_grid, pyramid_level
+
+# DPI used for saved graphs
+EXPORT_DPI = 300
+
+# Plot style chosen by each mode preset
+MODE_STYLES = {"professional": "seaborn-v0_8", "normal": "default", "scientific": "bmh"}
+
+# rcParams are process-global and artists read them while being created
+# and drawn, so a render holds this lock from its first artist to its last
+# pixel: no other thread switches rcParams under it. Re-entrant, so a
+# render may enter use_style again (e.g. to save what it drew)
+_RENDER_LOCK = threading.RLock()
+
+# rcParams before any style was applied; every style starts from these
+_baseline = None
+
+
+@lru_cache(maxsize=None)
+def _resolve_style(style):
+    """Read and validate a style sheet once; return the rcParams it changes"""
+    with mpl.rc_context():
+        mpl.rcdefaults()
+        plt.style.use(style)
+        return {key: value for key, value in mpl.rcParams.items()
+                if value != mpl.rcParamsDefault[key]}
+
+
+def style_params(style):
+    """Return the cached rcParams dict of a style name (or style file path)"""
+    with _RENDER_LOCK:
+        return _resolve_style(style)
+
+
+@contextmanager
+def use_style(style, blocking=True):
+    """Apply a cached plot style for the duration of one render
+
+    Renders on other threads wait until the block ends; rcParams are then
+    put back as they were. With blocking=False nothing is applied and False
+    is yielded when another thread is rendering (True otherwise).
+    """
+    global _baseline
+    if not _RENDER_LOCK.acquire(blocking):
+        yield False
+        return
+    try:
+        params = _resolve_style(style)
+        saved = {key: value for key, value in dict.items(mpl.rcParams) if key != 'backend'}
+        if _baseline is None:
+            _baseline = saved
+        # Already validated: skip the per-key checks of rcParams.update
+        dict.update(mpl.rcParams, _baseline)
+        dict.update(mpl.rcParams, params)
+        try:
+            yield True
+        finally:
+            dict.update(mpl.rcParams, saved)
+    finally:
+        _RENDER_LOCK.release()
+
+
+# ===== LAYOUT CACHE =====
+
+# Subplot parameters that tight_layout computes
+_SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+
+def _tick_labels(figure):
+    """Tick label text of every axis: wider labels need a different layout"""
+    labels = []
+    for ax in figure.axes:
+        for axis in (ax.xaxis, ax.yaxis, getattr(ax, 'zaxis', None)):
+            if axis is not None and axis.get_visible():
+                locs = axis.get_majorticklocs()
+                labels.append(tuple(axis.get_major_formatter().format_ticks(locs)))
+    return tuple(labels)
+
+
+class LayoutCache:
+    """Remembers tight_layout results by everything that affects them
+
+    The caller's key covers graph type, font size and label text; figure
+    size, DPI and tick labels are added here. A hit applies the stored
+    subplot parameters directly. `total_saved` sums the seconds saved.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self._layouts = OrderedDict()
+        self.total_saved = 0.0
+
+    def tight_layout(self, figure, key):
+        """Lay out `figure` like figure.tight_layout(), reusing cached results
+
+        Returns the seconds saved by the cache (0.0 when it had to compute).
+        """
+        start = time.perf_counter()
+        key = (key, tuple(figure.get_size_inches()), figure.dpi, _tick_labels(figure))
+        with self.lock:
+            cached = self._layouts.get(key)
+            if cached is not None:
+                self._layouts.move_to_end(key)
+
+        if cached is None:
+            figure.tight_layout()
+            params = {name: getattr(figure.subplotpars, name) for name in _SUBPLOT_PARAMS}
+            with self.lock:
+                self._layouts[key] = (params, time.perf_counter() - start)
+                if len(self._layouts) > self.maxsize:
+                    self._layouts.popitem(last=False)
+            return 0.0
+
+        params, cost = cached
+        figure.subplots_adjust(**params)
+        saved = max(cost - (time.perf_counter() - start), 0.0)
+        with self.lock:
+            self.total_saved += saved
+        return saved
+
+
+# ===== DENSITY SCATTER =====
+
+class DensityImage(AxesImage):
+    """Scatter points shown as a per-pixel count image
+
+    The points are binned again whenever the view or the canvas size
+    changes, so zooming in always shows full detail. Empty pixels are
+    transparent; `log` scales the colours by the log of the count.
+    """
+
+    def __init__(self, ax, x, y, log=True, **kwargs):
+        super().__init__(ax, origin='lower', interpolation='nearest', 
+                         norm=LogNorm() if log else Normalize(), **kwargs)
+        self._view = None
+        self.set_points(x, y)
+
+    def set_points(self, x, y):
+        """Replace the points and extend the data limits of the axes to them"""
+        self.x, self.y = x, y
+        self._view = None
+        if len(x):
+            x0, x1, y0, y1 = np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y)
+            self.axes.update_datalim([(x0, y0), (x1, y1)])
+            # Bin once over the whole data so the colour scale starts valid
+            self._rebin((x0, x1, y0, y1))
+        self.stale = True
+
+    def get_extent(self):
+        """The image always covers exactly the current view"""
+        (x0, x1), (y0, y1) = sorted(self.axes.get_xlim()), sorted(self.axes.get_ylim())
+        return x0, x1, y0, y1
+
+    def get_window_extent(self, renderer=None):
+        return self.axes.bbox
+
+    def _rebin(self, extent):
+        bbox = self.axes.bbox
+        view = tuple(extent) + (int(bbox.width), int(bbox.height))
+        if view == self._view:
+            return
+        counts = density_grid(self.x, self.y, extent[:2], extent[2:], bbox.width, bbox.height)
+        self._view = view
+        self.set_data(np.ma.masked_equal(counts, 0))
+        if counts.any():
+            self.norm.vmin = self.norm.vmax = None
+            self.autoscale_None()
+
+    def make_image(self, renderer, magnification=1.0, unsampled=False):
+        self._rebin(self.get_extent())
+        return super().make_image(renderer, magnification, unsampled)
+
+
+def density_scatter(ax, x, y, log=True, **kwargs):
+    """Add a DensityImage of the points to `ax` and fit the view to them"""
+    image = DensityImage(ax, x, y, log, **kwargs)
+    ax.add_image(image)
+    ax.autoscale_view()
+    return image
+
+
+# ===== HEATMAP PYRAMID =====
+
+class PyramidImage(AxesImage):
+    """Heatmap drawn from a precomputed multi-resolution pyramid
+
+    Uses the same cell coordinates as imshow (cell centres at 0, 1, 2, ...,
+    row 0 at the top). On every draw only the visible window of the coarsest
+    level that still has a cell per screen pixel is resampled, so the cost
+    depends on the canvas size rather than the size of Z. The colour scale
+    is fixed from the coarsest level, so colours stay put while zooming.
+    """
+
+    def __init__(self, ax, levels, **kwargs):
+        super().__init__(ax, origin='upper', **kwargs)
+        self.levels = levels
+        self._view = None
+        self._slice_extent = None
+        rows, cols = levels[0].shape
+        self.full_extent = (-0.5, cols - 0.5, rows - 0.5, -0.5)
+        top = np.asarray(levels[-1])
+        finite = top[np.isfinite(top)]
+        if finite.size:
+            self.norm.vmin, self.norm.vmax = finite.min(), finite.max()
+        self._select((-0.5, cols - 0.5, -0.5, rows - 0.5), 
+                     top.shape[1], top.shape[0])
+
+    def get_extent(self):
+        """Extent of the level window currently loaded as image data"""
+        return self._slice_extent
+
+    def get_window_extent(self, renderer=None):
+        x0, x1, y0, y1 = self.get_extent()
+        return Bbox([[x0, y0], [x1, y1]]).transformed(self.axes.transData)
+
+    def _select(self, view, width_px, height_px):
+        """Load the visible window of the level that suits the view"""
+        key = tuple(view) + (int(width_px), int(height_px))
+        if key == self._view:
+            return
+        x0, x1, y0, y1 = view
+        level = pyramid_level(self.levels, x1 - x0, y1 - y0, width_px, height_px)
+        data, size = self.levels[level], 2 ** level
+        rows, cols = data.shape
+        # Cell i of this level covers base cells [i*size, (i+1)*size)
+        c0 = min(max(int(np.floor((x0 + 0.5) / size)), 0), cols - 1)
+        c1 = min(max(int(np.ceil((x1 + 0.5) / size)), c0 + 1), cols)
+        r0 = min(max(int(np.floor((y0 + 0.5) / size)), 0), rows - 1)
+        r1 = min(max(int(np.ceil((y1 + 0.5) / size)), r0 + 1), rows)
+        self._view = key
+        self._slice_extent = (c0 * size - 0.5, c1 * size - 0.5, 
+                              r1 * size - 0.5, r0 * size - 0.5)
+        self.set_data(np.asarray(data[r0:r1, c0:c1]))
+
+    def make_image(self, renderer, magnification=1.0, unsampled=False):
+        (x0, x1), (y0, y1) = sorted(self.axes.get_xlim()), sorted(self.axes.get_ylim())
+        bbox = self.axes.bbox
+        self._select((x0, x1, y0, y1), bbox.width, bbox.height)
+        return super().make_image(renderer, magnification, unsampled)
+
+
+def pyramid_heatmap(ax, levels, **kwargs):
+    """Draw a pyramid from graph_lod.build_pyramid like
+    ax.imshow(levels[0], aspect='auto') would draw its base"""
+    image = PyramidImage(ax, levels, **kwargs)
+    ax.add_image(image)
+    x0, x1, y0, y1 = image.full_extent
+    image.sticky_edges.x[:] = [x0, x1]
+    image.sticky_edges.y[:] = [y1, y0]
+    ax.update_datalim([(x0, y1), (x1, y0)])
+    ax.set_aspect('auto')
+    ax.autoscale_view()
+    ax.invert_yaxis()
+    return image
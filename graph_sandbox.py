@@ -0,0 +1,396 @@
+"""
+Sandboxed expression evaluation for the Professional Graph Generator
+Expressions typed by the user (data fields, Z formulas, equations) run in
+a pre-started worker process with CPU-time and address-space limits, so a
+runaway expression can be stopped or killed without taking the GUI down.
+Whole graphs can be rendered there too. Large arrays and rendered frames
+travel through shared memory (graph_shm) instead of being pickled
+"""
+
+import math
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+from contextlib import contextmanager
+import multiprocessing
+import numpy as np
+import graph_expressions
+import graph_shm
+from graph_memory import (MEMORY_BUDGET_MB, MemoryBudgetError, address_space_bytes,
+                          format_bytes)
+
+try:
+    import resource
+except ImportError:  # Windows: only the parent's wall-clock limit applies
+    resource = None
+
+# graph_expressions functions the sandbox may run (besides render_frame
+# and render_file below)
+EXPRESSION_FUNCTIONS = ('evaluate', 'evaluate_grid', 'evaluate_parallel', 'evaluate_many',
+                        'adaptive_sample')
+
+# CPU seconds one evaluation may use (on a single thread), and the extra
+# wall-clock time after which a worker stuck inside a single NumPy call is
+# killed
+CPU_SECONDS = 30
+WALL_GRACE = 5
+
+# How often a waiting caller checks for cancellation (seconds)
+POLL_SECONDS = 0.05
+
+# Active sandbox of this process (None: evaluate in process)
+_sandbox = None
+
+# Limits of the evaluations made on each thread
+_limits = threading.local()
+
+
+class ExpressionTimeout(Exception):
+    """Raised when an expression runs past its time limit"""
+
+    def __init__(self, seconds=CPU_SECONDS):
+        super().__init__(f"Expression took longer than {seconds:g} s and was stopped.\n"
+                         f"Use fewer points or a simpler expression.")
+        self.seconds = seconds
+
+    def __reduce__(self):
+        return (ExpressionTimeout, (self.seconds,))
+
+
+class ExpressionStopped(Exception):
+    """Raised when the evaluation was stopped (or its worker died)"""
+
+
+# ===== WORKER PROCESS =====
+
+def _xcpu(signum, frame):
+    raise ExpressionTimeout()
+
+
+@contextmanager
+def _limited(budget, cpu_seconds):
+    """Apply the CPU-time and address-space limits around one evaluation"""
+    if resource is None:
+        yield
+        return
+    cpu = resource.getrlimit(resource.RLIMIT_CPU)
+    memory = resource.getrlimit(resource.RLIMIT_AS)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    # Soft limits only: a process cannot raise its hard limits again.
+    # Evaluations run on one thread here (see _serve), so CPU time keeps
+    # pace with the clock and this fires before the parent's deadline
+    soft = math.ceil(used) + math.ceil(cpu_seconds)
+    if cpu[1] == resource.RLIM_INFINITY or soft <= cpu[1]:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu[1]))
+    size = address_space_bytes()
+    if size is not None:
+        soft = size + budget
+        if memory[1] == resource.RLIM_INFINITY or soft <= memory[1]:
+            resource.setrlimit(resource.RLIMIT_AS, (soft, memory[1]))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, cpu)
+        resource.setrlimit(resource.RLIMIT_AS, memory)
+
+
+def render_frame(spec, figsize, dpi, sources=None):
+    """Draw `spec` on an Agg canvas of `figsize` inches at `dpi`
+
+    Returns the RGBA pixels (height x width x 4) and the notes of the
+    render (e.g. thinned grids).
+    """
+    figure, notes = _render(spec, figsize, dpi, sources)
+    return graph_shm.frame_pixels(figure.canvas), notes
+
+
+def render_file(spec, filename, figsize, dpi, sources=None):
+    """Draw `spec` and save it to `filename` at `dpi`; returns the notes"""
+    return _render(spec, figsize, dpi, sources, filename)[1]
+
+
+def _render(spec, figsize, dpi, sources, filename=None):
+    # Imported here: graph_core evaluates its expressions through this module
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from graph_core import draw_graph
+    from graph_render import use_style
+    with use_style(spec.plot_style):
+        figure = Figure(figsize=figsize, dpi=dpi)
+        canvas = FigureCanvasAgg(figure)
+        state = draw_graph(figure, spec, output_dpi=dpi if filename else None, sources=sources)
+        if filename:
+            figure.savefig(filename, dpi=dpi, bbox_inches='tight')
+        else:
+            canvas.draw()
+    return figure, state['notes']
+
+
+# What the sandbox may run, by name
+SANDBOX_FUNCTIONS = {name: getattr(graph_expressions, name) for name in EXPRESSION_FUNCTIONS}
+SANDBOX_FUNCTIONS.update(render_frame=render_frame, render_file=render_file)
+
+
+def _warm_up():
+    """Compile and run a first expression so the first real one starts hot"""
+    x = np.linspace(0, 1, graph_expressions.PARALLEL_THRESHOLD)
+    graph_expressions.evaluate_parallel('sin(x) * x', x=x)
+    graph_expressions.evaluate_grid('X + Y', x[:16], x[:16])
+
+
+def _error_reply(error, budget):
+    if isinstance(error, MemoryError) and not isinstance(error, MemoryBudgetError):
+        error = MemoryBudgetError(f"The expression needed more than the "
+                                  f"{format_bytes(budget)} memory budget.\n"
+                                  f"Use fewer points, or raise the Memory Budget setting.")
+    try:
+        pickle.dumps(error)
+    except Exception:
+        error = ValueError(str(error))
+    return ('error', error)
+
+
+def _serve(conn):
+    """Main loop of a sandbox worker: run requested functions until closed"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGXCPU'):
+        signal.signal(signal.SIGXCPU, _xcpu)
+    # RLIMIT_CPU adds up the CPU time of every thread: with more than one,
+    # cpu_seconds would run out early, or a limit scaled to match would
+    # never fire before the parent's deadline
+    graph_expressions.limit_threads(1)
+    _warm_up()
+    conn.send(('ready', None))
+    handed = []
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        # The parent has adopted the blocks of the last reply by now
+        graph_shm.hand_over(handed)
+        if request is None:
+            return
+        function, args, kwargs, budget, cpu_seconds, prefix = request
+        handed = []
+        try:
+            # Inputs stay owned by the parent; they are only mapped here
+            args, kwargs = graph_shm.unpack(args), graph_shm.unpack(kwargs)
+            with _limited(budget, cpu_seconds):
+                value = SANDBOX_FUNCTIONS[function](*args, **kwargs)
+            reply = ('ok', graph_shm.pack(value, prefix, handed))
+        except ExpressionTimeout:
+            reply = ('error', ExpressionTimeout(cpu_seconds))
+        except Exception as e:
+            reply = _error_reply(e, budget)
+        finally:
+            args = kwargs = value = None
+        conn.send(reply)
+        # Windows frees a block with its last handle, so keep ours until the
+        # parent has adopted it; elsewhere its name keeps it alive
+        if os.name != 'nt':
+            graph_shm.hand_over(handed)
+            handed = []
+
+
+class SandboxWorker:
+    """One sandbox process and the pipe it is driven through"""
+
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True,
+                                       name='expression-sandbox')
+        self.process.start()
+        child.close()
+        self.killed = False
+
+    def wait_ready(self, timeout):
+        if not self.conn.poll(timeout):
+            raise ExpressionStopped("The expression worker did not start")
+        self.conn.recv()
+
+    def kill(self):
+        """Kill the process; a caller waiting on it sees the pipe close"""
+        self.killed = True
+        if self.process.is_alive():
+            self.process.kill()
+
+    def close(self):
+        self.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class ExpressionSandbox:
+    """Pool of pre-started sandbox processes
+
+    Up to `size` workers are kept warm; one is taken per evaluation and
+    returned afterwards. A worker that times out, is stopped or is
+    abandoned by a cancelled render is killed and replaced in the
+    background, so the next evaluation does not pay the start-up cost.
+    """
+
+    START_SECONDS = 60
+
+    def __init__(self, size=1, cpu_seconds=CPU_SECONDS):
+        self.size = size
+        self.cpu_seconds = cpu_seconds
+        self.context = multiprocessing.get_context('spawn')
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.busy = set()
+        self.workers = 0
+        self.closed = False
+        for _ in range(size):
+            self._start()
+
+    def _start(self):
+        """Start a worker in the background; it joins the idle queue when ready"""
+        with self.lock:
+            if self.closed or self.workers >= self.size:
+                return
+            self.workers += 1
+
+        def start():
+            try:
+                worker = SandboxWorker(self.context)
+                worker.wait_ready(self.START_SECONDS)
+            except Exception as e:
+                with self.lock:
+                    self.workers -= 1
+                self.idle.put(e)
+                return
+            self.idle.put(worker)
+
+        threading.Thread(target=start, daemon=True, name='sandbox-start').start()
+
+    def _acquire(self, check):
+        self._start()
+        while True:
+            try:
+                worker = self.idle.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if check is not None:
+                    check()
+                continue
+            if isinstance(worker, Exception):
+                raise ExpressionStopped(f"Cannot start the expression worker: {worker}")
+            if worker.process.is_alive():
+                with self.lock:
+                    self.busy.add(worker)
+                return worker
+            self._discard(worker)
+
+    def _discard(self, worker):
+        """Kill a worker and start its replacement"""
+        worker.close()
+        with self.lock:
+            self.busy.discard(worker)
+            self.workers -= 1
+        self._start()
+
+    def run(self, function, args=(), kwargs=None, budget=None, check=None):
+        """Run SANDBOX_FUNCTIONS[function](*args, **kwargs) in a worker
+
+        `budget` (bytes) caps the memory the evaluation may add; `check` is
+        called while waiting and may raise to abandon it (the worker is
+        killed then). Errors raised by the expression are re-raised here.
+        Array results are mapped straight from the worker's shared memory.
+        """
+        if function not in SANDBOX_FUNCTIONS:
+            raise ValueError(f"'{function}' cannot run in the sandbox")
+        budget = budget or MEMORY_BUDGET_MB * 1000000
+        worker = self._acquire(check)
+        prefix = graph_shm.transfer_prefix()
+        inputs = []
+        reply = None
+        try:
+            worker.conn.send((function, graph_shm.pack(tuple(args), prefix + 'i', inputs),
+                              graph_shm.pack(kwargs or {}, prefix + 'i', inputs),
+                              budget, self.cpu_seconds, prefix + 'o'))
+            deadline = time.monotonic() + self.cpu_seconds + WALL_GRACE
+            while not worker.conn.poll(POLL_SECONDS):
+                if check is not None:
+                    check()
+                if time.monotonic() > deadline:
+                    raise ExpressionTimeout(self.cpu_seconds)
+            try:
+                reply = worker.conn.recv()
+            except (EOFError, OSError):
+                if worker.killed:
+                    raise ExpressionStopped("Expression stopped")
+                raise ExpressionStopped("The expression worker crashed "
+                                        "(probably out of memory)")
+        except BaseException:
+            self._discard(worker)
+            # Results the worker shared before it was killed
+            graph_shm.sweep(prefix + 'o')
+            raise
+        finally:
+            graph_shm.release(inputs)
+
+        status, value = reply
+        try:
+            if status == 'error':
+                raise value
+            return graph_shm.unpack(value, take=True)
+        finally:
+            with self.lock:
+                self.busy.discard(worker)
+            self.idle.put(worker)
+
+    def stop(self):
+        """Kill every running evaluation (their callers get ExpressionStopped)"""
+        with self.lock:
+            running = list(self.busy)
+        for worker in running:
+            worker.kill()
+
+    def close(self):
+        """Shut all workers down"""
+        with self.lock:
+            self.closed = True
+            running = list(self.busy)
+        for worker in running:
+            worker.kill()
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(worker, Exception):
+                worker.close()
+
+
+# ===== ENTRY POINTS =====
+
+def install(sandbox):
+    """Evaluate the expressions of this process in `sandbox` (None: in process)"""
+    global _sandbox
+    _sandbox = sandbox
+
+
+@contextmanager
+def sandbox_limits(budget=None, check=None):
+    """Memory `budget` (bytes) and cancellation `check` of the sandboxed
+    evaluations made on this thread inside the block"""
+    previous = getattr(_limits, 'value', None)
+    _limits.value = (budget, check)
+    try:
+        yield
+    finally:
+        _limits.value = previous
+
+
+def sandboxed(function, *args, **kwargs):
+    """Call SANDBOX_FUNCTIONS[function] in the installed sandbox, under the
+    limits of sandbox_limits(); runs in process when no sandbox is installed"""
+    sandbox = _sandbox
+    if sandbox is None:
+        return SANDBOX_FUNCTIONS[function](*args, **kwargs)
+    budget, check = getattr(_limits, 'value', None) or (None, None)
+    return sandbox.run(function, args, kwargs, budget, check)
@@ -0,0 +1,193 @@
+"""
+Shared-memory transport for the Professional Graph Generator
+NumPy arrays and Agg RGBA frame buffers are handed between processes by
+the name, shape and dtype of a shared-memory block: the receiver maps the
+same memory, so large arrays are neither pickled nor copied on the way.
+
+The process that creates a block owns it until it is handed over; the
+receiver adopts it, which removes its name at once, and the memory is
+freed when the last array using it is garbage collected. Blocks are named
+after a per-transfer prefix, so the ones left behind by a killed process
+can be swept up.
+"""
+
+import atexit
+import itertools
+import os
+from collections import namedtuple
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7: arrays are pickled instead
+    shared_memory = None
+
+# Arrays from this size on are worth a block of their own
+SHARED_ARRAY_BYTES = 1 << 16
+
+# What travels instead of an array
+SharedArray = namedtuple('SharedArray', 'name shape dtype')
+
+# Blocks created by this process and not handed over yet, by name
+_owned = {}
+
+_transfers = itertools.count()
+
+
+class _Mapping:
+    """Keeps a block mapped for as long as any array uses its memory
+
+    Arrays see the memory through __array_interface__ rather than the
+    buffer protocol, so closing the block when the last of them is gone
+    never trips over an exported buffer.
+    """
+
+    def __init__(self, block, shape, dtype):
+        self.block = block
+        view = np.ndarray(shape, dtype, buffer=block.buf)
+        self.__array_interface__ = {'version': 3, 'shape': tuple(shape),
+                                    'typestr': view.dtype.str,
+                                    'data': (view.ctypes.data, False)}
+        del view
+
+    def __del__(self):
+        self.block.close()
+
+
+def transfer_prefix():
+    """Name prefix for the blocks of one transfer, unique on this machine"""
+    return f"pgg{os.getpid()}_{next(_transfers)}_"
+
+
+def shareable(value):
+    """Check whether `value` is an array worth passing through shared memory"""
+    return (shared_memory is not None and isinstance(value, np.ndarray)
+            and value.nbytes >= SHARED_ARRAY_BYTES and value.dtype.fields is None
+            and not value.dtype.hasobject)
+
+
+def share(array, name=None):
+    """Copy `array` into a new block owned by this process; returns the
+    SharedArray describing it"""
+    block = shared_memory.SharedMemory(name=name, create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    _owned[block.name] = block
+    return SharedArray(block.name, array.shape, array.dtype.str)
+
+
+def empty(shape, dtype, name=None):
+    """New block for a producer to fill in place: (array, SharedArray)"""
+    dtype = np.dtype(dtype)
+    size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    block = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _owned[block.name] = block
+    shared = SharedArray(block.name, tuple(shape), dtype.str)
+    return attach(shared), shared
+
+
+def attach(shared):
+    """Map a SharedArray into this process as an array, without copying"""
+    block = shared_memory.SharedMemory(name=shared.name)
+    return np.asarray(_Mapping(block, shared.shape, shared.dtype))
+
+
+def adopt(shared):
+    """Attach a SharedArray and take it over: its name is removed now and
+    the memory is freed with the last array using it"""
+    array = attach(shared)
+    _unlink(shared.name)
+    return array
+
+
+def hand_over(names=None):
+    """Close this process's handles of blocks a receiver has adopted (all
+    owned blocks if `names` is None), without removing them"""
+    for name in list(_owned) if names is None else names:
+        block = _owned.pop(name, None)
+        if block is not None:
+            block.close()
+
+
+def release(names=None):
+    """Remove owned blocks nobody adopted (all of them if `names` is None)"""
+    for name in list(_owned) if names is None else names:
+        block = _owned.pop(name, None)
+        if block is not None:
+            block.close()
+            _unlink(name)
+
+
+def sweep(prefix):
+    """Remove the blocks of a transfer whose producer died before handing
+    them over (named `prefix` + 0, 1, 2...)"""
+    if shared_memory is None:
+        return
+    for index in itertools.count():
+        try:
+            block = shared_memory.SharedMemory(name=f"{prefix}{index}")
+        except (FileNotFoundError, ValueError):
+            return
+        block.close()
+        _unlink(block.name)
+
+
+def _unlink(name):
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+atexit.register(release)
+
+
+# ===== NESTED VALUES =====
+
+def pack(value, prefix, names=None):
+    """Replace the large arrays in `value` (nested tuples, lists and dicts)
+    by SharedArrays in blocks named `prefix` + n; the names of the new
+    blocks are appended to `names`"""
+    names = [] if names is None else names
+    # Plain containers only: named tuples (e.g. GraphSpec) travel as they are
+    if type(value) in (tuple, list):
+        return type(value)(pack(item, prefix, names) for item in value)
+    if type(value) is dict:
+        return {key: pack(item, prefix, names) for key, item in value.items()}
+    if not shareable(value):
+        return value
+    shared = share(value, f"{prefix}{len(names)}")
+    names.append(shared.name)
+    return shared
+
+
+def unpack(value, take=False):
+    """Inverse of pack(): SharedArrays become arrays mapped onto their
+    blocks (adopted if `take`, merely attached otherwise)"""
+    if isinstance(value, SharedArray):
+        return adopt(value) if take else attach(value)
+    if type(value) in (tuple, list):
+        return type(value)(unpack(item, take) for item in value)
+    if type(value) is dict:
+        return {key: unpack(item, take) for key, item in value.items()}
+    return value
+
+
+# ===== FRAMES =====
+
+def frame_pixels(canvas):
+    """RGBA pixels of a drawn Agg canvas (height x width x 4), as a view"""
+    return np.asarray(canvas.buffer_rgba())
+
+
+class FrameRenderer:
+    """Stands in for the Agg renderer of a canvas whose pixels were drawn
+    elsewhere (e.g. in another process), so canvas.blit() can show them"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.height, self.width = frame.shape[:2]
+
+    def buffer_rgba(self):
+        return memoryview(self.frame)
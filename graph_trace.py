@@ -0,0 +1,181 @@
+"""
+Render instrumentation for the Professional Graph Generator
+A RenderTrace times the stages of one render (parsing, evaluating Z,
+creating artists, colorbars, layout, drawing...) together with array sizes,
+artist counts and memory use. Code that runs inside a render marks its stages with
+stage(); they are recorded on the trace active on that thread, and cost
+next to nothing when no trace is active. Finished traces become events
+that can be shown as a summary line or written out as JSON lines
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from graph_memory import format_bytes, rss_bytes
+
+# Trace of the render running on each thread
+_active = threading.local()
+
+
+class RenderTrace:
+    """Stage timings of one render
+
+    `action` names what was rendered (generate_graph, plot_equation,
+    save_graph, batch...); keyword fields are added to the event as is.
+    """
+
+    def __init__(self, action, **fields):
+        self.action = action
+        self.fields = fields
+        self.stages = []
+        self.time = time.time()
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time the body as stage `name`; the yielded dict takes extra fields
+        (array sizes, counts) that are only known inside it
+
+        Every stage records the resident memory after it ('rss_mb'). While
+        tracemalloc is running it also records the most memory allocated on
+        top of what was in use when the stage began ('alloc_mb'); tracemalloc
+        is process-wide, so stages running at the same time on other threads
+        count towards it too.
+        """
+        info = dict(fields)
+        traced = tracemalloc.is_tracing()
+        if traced:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            record = {'stage': name, 'seconds': time.perf_counter() - start}
+            record['rss_mb'] = round(rss_bytes() / 1e6, 1)
+            if traced:
+                record['alloc_mb'] = round((tracemalloc.get_traced_memory()[1] - base) / 1e6, 1)
+            record.update(info)
+            with self.lock:
+                self.stages.append(record)
+
+    def finish(self, figure=None, error=None, **fields):
+        """Close the trace and return its event (a JSON-serializable dict)"""
+        event = {'event': 'render', 'action': self.action, 'time': round(self.time, 3),
+                 'seconds': time.perf_counter() - self.start}
+        event.update(self.fields)
+        event.update(fields)
+        if figure is not None:
+            event['artists'] = count_artists(figure)
+        with self.lock:
+            event['stages'] = list(self.stages)
+        event['rss_mb'] = round(rss_bytes() / 1e6, 1)
+        if any('alloc_mb' in record for record in event['stages']):
+            event['alloc_peak_mb'] = max(record.get('alloc_mb', 0.0)
+                                         for record in event['stages'])
+        event['ok'] = error is None
+        if error is not None:
+            event['error'] = f"{type(error).__name__}: {error}"
+        return event
+
+
+def count_artists(figure):
+    """Number of artists drawn for `figure` (the figure itself excluded)"""
+    return len(figure.findobj()) - 1
+
+
+@contextmanager
+def tracing(trace):
+    """Make `trace` the active trace of this thread (None: no tracing)"""
+    previous = getattr(_active, 'trace', None)
+    _active.trace = trace
+    try:
+        yield trace
+    finally:
+        _active.trace = previous
+
+
+@contextmanager
+def stage(name, **fields):
+    """Time the body as a stage of the active trace, if any
+
+    Yields a dict for fields known only inside the stage; it is simply
+    discarded when nothing is being traced.
+    """
+    trace = getattr(_active, 'trace', None)
+    if trace is None:
+        yield dict(fields)
+        return
+    with trace.stage(name, **fields) as info:
+        yield info
+
+
+def summary(event):
+    """One status line for an event, e.g. for the timing overlay"""
+    totals = _stage_totals(event)
+    # Time outside the marked stages (labels, grid, legend, bookkeeping)
+    other = event['seconds'] - sum(totals.values())
+    if other >= 0.0005:
+        totals['other'] = other
+    parts = [f"{name} {seconds * 1000:.0f}" for name, seconds in totals.items()]
+    text = f"⏱ {event['action']} {event['seconds'] * 1000:.0f} ms"
+    if parts:
+        text += " — " + " · ".join(parts) + " ms"
+    counts = []
+    points = sum(record.get('points', 0) for record in event['stages'])
+    if points:
+        counts.append(f"{points:,} points")
+    if 'artists' in event:
+        counts.append(f"{event['artists']} artists")
+    if 'alloc_peak_mb' in event:
+        counts.append(f"peak +{format_bytes(event['alloc_peak_mb'] * 1e6)}")
+    counts.append(f"RSS {format_bytes(event['rss_mb'] * 1e6)}")
+    text += " | " + ", ".join(counts)
+    if not event['ok']:
+        text += " | failed"
+    return text
+
+
+def _stage_totals(event):
+    """Seconds per stage name, in order of first appearance"""
+    totals = {}
+    for record in event['stages']:
+        totals[record['stage']] = totals.get(record['stage'], 0.0) + record['seconds']
+    return totals
+
+
+def start_memory_tracing():
+    """Track Python and NumPy allocations so stages report their peak
+    (slows allocation-heavy code down somewhat)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+class EventLog:
+    """Writes events as JSON lines to a file (or '-' for stdout)
+
+    Safe to share between threads; every event is flushed as soon as it is
+    written, so the log can be tailed by a metrics shipper.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        if path == '-':
+            self.file = sys.stdout
+        else:
+            self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, event):
+        line = json.dumps(event, separators=(',', ':'), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
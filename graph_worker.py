@@ -0,0 +1,141 @@
+"""
+Background rendering for the Professional Graph Generator
+Figures are built and rasterized on an Agg canvas off the Tk event thread;
+the GUI only picks up the finished result, so heavy renders never freeze it
+"""
+
+import queue
+import threading
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from graph_render import EXPORT_DPI, use_style
+from graph_shm import FrameRenderer
+from graph_trace import stage, tracing
+
+
+class RenderCancelled(Exception):
+    """Raised inside a render job that was superseded by a newer one"""
+
+
+class RenderJob:
+    """One figure to build, either for display or for saving to a file
+
+    `build(figure, job)` draws onto a fresh figure and returns whatever the
+    GUI needs afterwards (kept in `result`). Long builds should call
+    job.check() between steps so a superseded job stops early. The whole
+    job runs under the plot `style`, with `trace` (a RenderTrace) active.
+
+    A build that gets its pixels from elsewhere (e.g. a graph rendered in
+    the sandbox process) sets job.frame to them and the canvas shows them
+    as they are; one that wrote `filename` itself sets job.written.
+    """
+
+    def __init__(self, kind, build, figsize, dpi, style="default", filename=None, 
+                 done=None, failed=None, trace=None):
+        self.kind = kind
+        self.build = build
+        self.figsize = figsize
+        self.dpi = dpi
+        self.style = style
+        self.filename = filename
+        self.done = done
+        self.failed = failed
+        self.trace = trace
+        self.cancelled = threading.Event()
+        self.figure = None
+        self.canvas = None
+        self.result = None
+        self.error = None
+        self.frame = None
+        self.written = False
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        """Stop the build if a newer job of the same kind was submitted"""
+        if self.cancelled.is_set():
+            raise RenderCancelled()
+
+    def run(self):
+        with tracing(self.trace), use_style(self.style):
+            self.figure = Figure(figsize=self.figsize, dpi=self.dpi)
+            self.canvas = FigureCanvasAgg(self.figure)
+            self.result = self.build(self.figure, self)
+            self.check()
+            if self.filename:
+                if not self.written:
+                    with stage('savefig'):
+                        self.figure.savefig(self.filename, dpi=EXPORT_DPI, bbox_inches='tight')
+            elif self.frame is not None:
+                self.canvas.renderer = FrameRenderer(self.frame)
+            else:
+                with stage('draw'):
+                    self.canvas.draw()
+
+
+class RenderWorker:
+    """Single background thread that runs RenderJobs in submission order
+
+    Jobs of the same kind supersede each other: submitting one cancels the
+    previous job of that kind, whether it is still queued or already
+    running. Finished jobs are collected on the GUI thread with poll().
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = {}
+        self.running = None
+        self.thread = None
+
+    def submit(self, kind, build, figsize, dpi, style="default", filename=None, 
+               done=None, failed=None, trace=None):
+        """Queue a new job, cancelling the previous one of the same kind"""
+        self.cancel(kind)
+        job = RenderJob(kind, build, figsize, dpi, style, filename, done, failed, trace)
+        self.latest[kind] = job
+        self.jobs.put(job)
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return job
+
+    def cancel(self, kind):
+        """Cancel the pending job of `kind`, if any"""
+        job = self.latest.pop(kind, None)
+        if job is not None:
+            job.cancel()
+
+    def busy(self):
+        """Check whether any job is still queued or running (cancelled ones
+        included, until they get to a check and stop)"""
+        return bool(self.latest) or self.running is not None
+
+    def poll(self):
+        """Return the finished jobs that were not superseded meanwhile"""
+        finished = []
+        while True:
+            try:
+                job = self.results.get_nowait()
+            except queue.Empty:
+                return finished
+            if self.latest.get(job.kind) is job:
+                del self.latest[job.kind]
+                finished.append(job)
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job.cancelled.is_set():
+                continue
+            self.running = job
+            try:
+                job.run()
+            except RenderCancelled:
+                continue
+            except Exception as e:
+                job.error = e
+            finally:
+                self.running = None
+            self.results.put(job)